@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Local stub for the DummyJSON products API (paginated, like the real one).
+
+    python benchmarks/catalog_stub.py --products 500 --port 8765
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_PAGE_SIZE = 100
+
+def make_products(count, first_id=1):
+    return [
+        {'id': i, 'title': f'Product {i}', 'category': 'electronics', 'brand': 'Acme',
+         'price': 10.0 + i % 90, 'rating': round(3 + (i % 20) / 10, 1)}
+        for i in range(first_id, first_id + count)
+    ]
+
+def start_catalog_stub(products=200, host='127.0.0.1', port=0):
+    """Serve products on a background thread. Returns (server, products_url)."""
+    catalog = make_products(products) if isinstance(products, int) else products
+
+    class CatalogHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            skip = int(query.get('skip', ['0'])[0])
+            limit = min(int(query.get('limit', ['30'])[0]) or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+            body = json.dumps({'products': catalog[skip:skip + limit], 'total': len(catalog),
+                               'skip': skip, 'limit': limit}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), CatalogHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/products"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    server, url = start_catalog_stub(args.products, port=args.port)
+    print(f"Serving {args.products} products at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic generator for sales_data.txt-format files.
+
+    python benchmarks/generate_sales_data.py --rows 1000000 -o data/bench_1m.txt
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+BASE_PRODUCTS = ['Laptop', 'Mouse', 'Keyboard', 'Monitor', 'Webcam', 'Headphones',
+                 'USB Cable', 'External Hard Drive', 'Laptop Charger', 'Wireless Mouse']
+BASE_REGIONS = ['North', 'South', 'East', 'West', 'Central']
+DIRTY_KINDS = ['comma_number', 'comma_name', 'bad_id', 'zero_qty', 'missing_customer',
+               'missing_region', 'bad_field_count', 'bad_number']
+WRITE_BATCH = 100000  # rows per write
+
+def _names(base, count, fmt):
+    """count distinct names, cycling through base and numbering the repeats"""
+    return [base[i % len(base)] if i < len(base) else fmt.format(base[i % len(base)], i // len(base))
+            for i in range(count)]
+
+def generate_rows(rows, seed=42, regions=4, products=10, customers=30, days=30,
+                  dirty_rate=0.1, start_date=date(2024, 12, 1)):
+    """Yield data lines (no header). Same seed and options → same output."""
+    rng = random.Random(seed)
+    region_names = _names(BASE_REGIONS, regions, '{} {}')
+    product_names = _names(BASE_PRODUCTS, products, '{} Mk{}')
+    prices = [rng.randint(100, 90000) for _ in range(products)]
+    dates = [(start_date + timedelta(days=i)).isoformat() for i in range(days)]
+
+    for n in range(1, rows + 1):
+        p = rng.randrange(products)
+        fields = [
+            f"T{n:03d}", rng.choice(dates), f"P{101 + p}", product_names[p],
+            str(rng.randint(1, 10)), str(prices[p]),
+            f"C{rng.randint(1, customers):03d}", rng.choice(region_names)
+        ]
+        if dirty_rate and rng.random() < dirty_rate:
+            kind = rng.choice(DIRTY_KINDS)
+            if kind == 'comma_number':
+                fields[5] = f"{int(fields[5]):,}"
+            elif kind == 'comma_name':
+                fields[3] = fields[3].replace(' ', ',') if ' ' in fields[3] else fields[3] + ',Pro'
+            elif kind == 'bad_id':
+                fields[0] = 'X' + fields[0][1:]
+            elif kind == 'zero_qty':
+                fields[4] = rng.choice(['0', '-1'])
+            elif kind == 'missing_customer':
+                fields[6] = ''
+            elif kind == 'missing_region':
+                fields[7] = ''
+            elif kind == 'bad_field_count':
+                fields.append('extra')
+            else:
+                fields[4] = 'n/a'
+        yield '|'.join(fields)
+
+def write_sales_file(path, rows, **options):
+    """Write a complete sales file (header + rows) and return its path"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + '\n')
+        batch = []
+        for line in generate_rows(rows, **options):
+            batch.append(line)
+            if len(batch) >= WRITE_BATCH:
+                f.write('\n'.join(batch) + '\n')
+                batch = []
+        if batch:
+            f.write('\n'.join(batch) + '\n')
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--products', type=int, default=10)
+    parser.add_argument('--customers', type=int, default=30)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--dirty-rate', type=float, default=0.1)
+    parser.add_argument('-o', '--output', default='data/bench_sales_data.txt')
+    args = parser.parse_args(argv)
+
+    write_sales_file(args.output, args.rows, seed=args.seed, regions=args.regions, products=args.products,
+                     customers=args.customers, days=args.days, dirty_rate=args.dirty_rate)
+    print(f"Wrote {args.rows:,} rows to {args.output} ({os.path.getsize(args.output):,} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark: wall time, CPU time and peak memory for every stage.
+
+    python benchmarks/run_benchmarks.py --rows 1000000 -o bench_1m.json
+    python benchmarks/run_benchmarks.py --input data/sales_data.txt
+
+Results are JSON so runs can be compared across commits.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.catalog_stub import start_catalog_stub
+from benchmarks.generate_sales_data import write_sales_file
+from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter_transactions
+from utils.data_processor import (
+    aggregate_transactions, calculate_total_revenue, region_wise_sales, top_selling_products,
+    customer_analysis, daily_sales_trend, find_peak_sales_day, low_performing_products
+)
+from utils.api_handler import fetch_all_products, create_product_mapping, iter_enriched, save_enriched_data
+from utils.report_generator import generate_sales_report
+from utils.columnar import has_numpy
+from utils.fast_parser import parse_sales_columns
+
+def _reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux); False if unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Process lifetime peak
+
+class StageTimer:
+    """Runs stages, silencing their console output, and records a result per stage"""
+
+    def __init__(self, trace_python_memory=False):
+        self.trace_python_memory = trace_python_memory
+        self.stages = []
+
+    def run(self, name, func, *args, rows_in=None, **kwargs):
+        rss_is_per_stage = _reset_peak_rss()
+        if self.trace_python_memory:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        stage = {
+            'stage': name,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': round(_peak_rss_mb(), 2),
+            'peak_rss_is_per_stage': rss_is_per_stage,
+        }
+        if self.trace_python_memory:
+            stage['python_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+        if rows_in is not None:
+            stage['rows_in'] = rows_in
+        if isinstance(result, (list, dict)):
+            stage['rows_out'] = len(result)
+        self.stages.append(stage)
+        print(f"{name:<28} {wall:>9.3f}s  {stage['peak_rss_mb']:>9.1f} MB", file=sys.stderr)
+        return result
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_pipeline(input_file, out_dir, catalog_products=200, trace_python_memory=False):
+    """Time every stage of the main.py pipeline against input_file"""
+    timer = StageTimer(trace_python_memory)
+    server, url = start_catalog_stub(catalog_products)
+    try:
+        raw_lines = timer.run('read', read_sales_data, input_file)
+        transactions = timer.run('parse', parse_transactions, raw_lines, rows_in=len(raw_lines))
+        valid, _, _ = timer.run('validate', validate_and_filter_transactions, transactions,
+                                rows_in=len(transactions))
+        n = len(valid)
+        if has_numpy():
+            timer.run('parse_columnar', parse_sales_columns, input_file)  # read + parse in one bulk pass
+
+        # Legacy per-function scans, then the single-pass aggregate feeding all of them
+        for func, kwargs in [
+            (calculate_total_revenue, {}), (region_wise_sales, {}), (top_selling_products, {'n': 5}),
+            (customer_analysis, {}), (daily_sales_trend, {}), (find_peak_sales_day, {}),
+            (low_performing_products, {'threshold': 10}),
+        ]:
+            timer.run(func.__name__, func, valid, rows_in=n, **kwargs)
+        results = timer.run('aggregate_transactions', aggregate_transactions, valid, rows_in=n)
+        timer.run('analyses_from_aggregate', lambda: [
+            calculate_total_revenue(results), region_wise_sales(results), top_selling_products(results, n=5),
+            customer_analysis(results), daily_sales_trend(results), find_peak_sales_day(results),
+            low_performing_products(results, threshold=10)
+        ])
+
+        products = timer.run('fetch_all_products', fetch_all_products, url)
+        mapping = timer.run('create_product_mapping', create_product_mapping, products, rows_in=len(products))
+        enriched = timer.run('enrich', lambda: list(iter_enriched(valid, mapping)), rows_in=n)
+        timer.run('save', save_enriched_data, enriched, os.path.join(out_dir, 'enriched_sales_data.txt'), rows_in=n)
+        timer.run('report', generate_sales_report, valid, enriched, os.path.join(out_dir, 'sales_report.txt'),
+                  rows_in=n)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return timer.stages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', help='existing sales file (default: generate one)')
+    parser.add_argument('--rows', type=int, default=10000, help='rows to generate (10k – 50M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--products', type=int, default=10)
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--dirty-rate', type=float, default=0.1)
+    parser.add_argument('--catalog-products', type=int, default=200)
+    parser.add_argument('--tracemalloc', action='store_true', help='also record Python heap peak per stage (slower)')
+    parser.add_argument('-o', '--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        input_file = args.input
+        generator = None
+        if input_file is None:
+            generator = {'rows': args.rows, 'seed': args.seed, 'regions': args.regions, 'products': args.products,
+                         'customers': args.customers, 'days': args.days, 'dirty_rate': args.dirty_rate}
+            input_file = os.path.join(out_dir, 'sales_data.txt')
+            print(f"Generating {args.rows:,} rows...", file=sys.stderr)
+            write_sales_file(input_file, **generator)
+
+        # The report writer always creates ./output; keep it inside the temp dir
+        input_file = os.path.abspath(input_file)
+        cwd = os.getcwd()
+        os.chdir(out_dir)
+        try:
+            stages = run_pipeline(input_file, out_dir, args.catalog_products, args.tracemalloc)
+        finally:
+            os.chdir(cwd)
+
+        summary = {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'input_file': args.input,
+            'input_bytes': os.path.getsize(input_file),
+            'generator': generator,
+            'total_wall_s': round(sum(s['wall_s'] for s in stages), 6),
+            'stages': stages,
+        }
+
+    output = json.dumps(summary, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: cold-start time and import cost for every entry point.
+
+    python benchmarks/startup_benchmark.py --repeat 20 -o startup.json
+    python benchmarks/startup_benchmark.py --budget-ms 50
+
+Each entry point is started in a fresh interpreter: plain runs give the wall
+time, `python -X importtime` runs give the per-module import breakdown.
+overhead_ms is the wall time above a bare interpreter, so site packages
+don't count against the code. Results are JSON so runs can be compared
+across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.run_benchmarks import _git_commit
+
+# name -> interpreter arguments (run from the repo root)
+ENTRY_POINTS = {
+    'interpreter': ['-c', 'pass'],
+    'main': ['-c', 'import main'],
+    'cli_help': ['main.py', '--help'],
+    'analysis': ['-c', 'from utils.file_handler import *; from utils.data_processor import *'],
+    'cached_catalog': ['-c', 'from utils.catalog_cache import get_product_mapping'],
+    'server': ['-c', 'import utils.server'],
+}
+HEAVY_MODULES = ('requests', 'numpy', 'pyarrow', 'multiprocessing', 'sqlite3', 'http.server')  # reported if imported
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+def _run(args, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + args
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{completed.stderr}")
+    return wall, completed.stderr
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us, depth)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+def measure(name, args, repeat=10, top=10):
+    """Wall and import timings for one entry point (best of repeat runs per module)"""
+    walls = []
+    best = {}
+    for _ in range(repeat):
+        walls.append(_run(args)[0])
+        for module, timing in parse_importtime(_run(args, importtime=True)[1]).items():
+            if module not in best or timing[1] < best[module][1]:
+                best[module] = timing
+
+    top_level = [timing[1] for timing in best.values() if timing[2] == 0]
+    heaviest = sorted(best.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return {
+        'entry_point': name,
+        'args': args,
+        'wall_min_ms': round(min(walls) * 1000, 2),
+        'wall_median_ms': round(statistics.median(walls) * 1000, 2),
+        'import_ms': round(sum(top_level) / 1000, 2),
+        'modules_imported': len(best),
+        'heavy_imports': [module for module in HEAVY_MODULES if module in best],
+        'heaviest_modules': [
+            {'module': module, 'cumulative_ms': round(cumulative / 1000, 2), 'self_ms': round(self_us / 1000, 2)}
+            for module, (self_us, cumulative, _) in heaviest
+        ],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help="runs per entry point (best/median reported)")
+    parser.add_argument('--entry', action='append', choices=sorted(ENTRY_POINTS),
+                        help="entry point to measure (repeatable; default: all)")
+    parser.add_argument('--top', type=int, default=10, help="heaviest modules listed per entry point")
+    parser.add_argument('--budget-ms', type=float,
+                        help="exit with status 1 if any entry point's overhead_ms exceeds this")
+    parser.add_argument('-o', '--output', help="write JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    names = args.entry or list(ENTRY_POINTS)
+    if 'interpreter' not in names:
+        names.insert(0, 'interpreter')  # Baseline for overhead_ms
+    results = [measure(name, ENTRY_POINTS[name], args.repeat, args.top) for name in names]
+
+    baseline = results[0]['wall_min_ms']
+    print(f"{'entry point':<16} {'wall':>9} {'overhead':>9} {'imports':>9}  heavy", file=sys.stderr)
+    for result in results:
+        result['overhead_ms'] = round(result['wall_min_ms'] - baseline, 2)
+        print(f"{result['entry_point']:<16} {result['wall_min_ms']:>7.1f}ms {result['overhead_ms']:>7.1f}ms "
+              f"{result['import_ms']:>7.1f}ms  {', '.join(result['heavy_imports']) or '-'}", file=sys.stderr)
+
+    summary = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'entry_points': results,
+    }
+    output = json.dumps(summary, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    over = [r['entry_point'] for r in results if args.budget_ms is not None and r['overhead_ms'] > args.budget_ms]
+    if over:
+        print(f"Over the {args.budget_ms:g} ms startup budget: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,70 +1,104 @@
 #!/usr/bin/env python3
 """
 SALES ANALYTICS SYSTEM - Complete Assignment Solution
+
+Run with no arguments for the interactive walkthrough (answers can be piped
+in on stdin), or pass arguments (see --help) for an unattended batch run.
 """
+import argparse
 import os
-from utils.file_handler import *
-from utils.data_processor import *
-from utils.api_handler import *
-from utils.report_generator import *
+import sys
+from itertools import chain
+from utils.file_handler import read_sales_data, parse_transactions
+from utils.filter_index import build_transaction_index
+from utils.filter_specs import make_spec, parse_filter_spec, load_filter_specs, check_unique_names
+from utils.data_processor import (
+    aggregate_transactions, calculate_total_revenue, region_wise_sales, top_selling_products, customer_analysis,
+    daily_sales_trend, find_peak_sales_day, low_performing_products
+)
+from utils.api_handler import enrich_to_file, enrichment_stats_for
+from utils.catalog_cache import get_product_mapping, CACHE_FILE, DEFAULT_TTL
+from utils.parallel import parallel_aggregate_specs
+from utils.pipeline import Pipeline
+from utils.report_generator import REPORT_SECTIONS, OPTIONAL_SECTIONS, generate_sales_report
+from utils import metrics
 
-def main():
-    print("SALES ANALYTICS SYSTEM")
-    print("=" * 30)
+EXIT_OK = 0
+EXIT_FAILURE = 1     # input unreadable, I/O or data error
+EXIT_INTERRUPTED = 130
+
+def _choose_filters(index):
+    """Ask for optional filters; returns the valid transactions"""
+    valid, invalid_count, summary = index.filter()
     
-    try:
-        # 1. Read and parse data
-        print("\n1/10 Reading sales data...")
-        raw_lines = read_sales_data('data/sales_data.txt')
+    # 4. User filter interaction
+    print("\nApply filters? (y/n): ", end="")
+    choice = input().strip().lower()
+    if choice == 'y':
+        print("Enter region (or Enter for none): ", end="")
+        region_filter = input().strip() or None
         
-        print("2/10 Parsing and cleaning...")
-        transactions = parse_transactions(raw_lines)
+        print("Min amount (or Enter for none): ", end="")
+        min_amt = input().strip()
+        min_amt = float(min_amt) if min_amt else None
         
-        print("3/10 Filter options:")
-        valid, invalid_count, summary = validate_and_filter_transactions(transactions)
+        print("Max amount (or Enter for none): ", end="")
+        max_amt = input().strip()
+        max_amt = float(max_amt) if max_amt else None
         
-        # 4. User filter interaction
-        print("\nApply filters? (y/n): ", end="")
-        choice = input().strip().lower()
-        if choice == 'y':
-            print("Enter region (or Enter for none): ", end="")
-            region_filter = input().strip() or None
+        valid, invalid_count, summary = index.filter(region_filter, min_amt, max_amt)
+    
+    print(f"Valid: {len(valid)}, Invalid: {invalid_count}")
+    return valid
+
+def _analyze(valid):
+    print("5/10 Analyzing sales data...")
+    results = aggregate_transactions(valid)  # Single pass feeds every analysis
+    calculate_total_revenue(results)
+    region_wise_sales(results)
+    top_selling_products(results, n=5)
+    customer_analysis(results, top=5)
+    daily_sales_trend(results)
+    find_peak_sales_day(results)
+    low_performing_products(results, threshold=10)
+    return results
+
+def _enrich(valid, product_mapping):
+    print("6/10 Fetching product data from API... (loaded in background)")
+    print("7/10 Enriching sales data...")
+    return enrich_to_file(valid, product_mapping, 'data/enriched_sales_data.txt')
+
+def _report(valid, results, enrichment_stats):
+    print("8/10 Generating report...")
+    generate_sales_report(valid, None, results=results, enrichment_stats=enrichment_stats)
+
+def run_interactive():
+    print("SALES ANALYTICS SYSTEM")
+    print("=" * 30)
+    
+    try:
+        with Pipeline() as pipeline:
+            # 6. API Integration (Part 3) – local catalog cache, API on miss. The fetch runs in
+            # the background, overlapping reading, parsing, the prompt and the analysis; Ctrl+C
+            # cancels it. The stages that print run on the main thread, in step order
+            pipeline.add('product_mapping', lambda: get_product_mapping(cancel=pipeline.cancelled))
+            pipeline.expect('valid')
+            pipeline.add('results', _analyze, after=('valid',), main_thread=True)
+            pipeline.add('enrichment_stats', _enrich, after=('valid', 'product_mapping'), main_thread=True)
+            pipeline.add('report', _report, after=('valid', 'results', 'enrichment_stats'), main_thread=True)
+            pipeline.start()
             
-            print("Min amount (or Enter for none): ", end="")
-            min_amt = input().strip()
-            min_amt = float(min_amt) if min_amt else None
+            # 1. Read and parse data
+            print("\n1/10 Reading sales data (product catalog loading in background)...")
+            raw_lines = read_sales_data('data/sales_data.txt')
             
-            print("Max amount (or Enter for none): ", end="")
-            max_amt = input().strip()
-            max_amt = float(max_amt) if max_amt else None
+            print("2/10 Parsing and cleaning...")
+            transactions = parse_transactions(raw_lines)
             
-            valid, invalid_count, summary = validate_and_filter_transactions(
-                transactions, region_filter, min_amt, max_amt
-            )
-        
-        print(f"Valid: {len(valid)}, Invalid: {invalid_count}")
-        
-        # 5. Analyze data (Part 2)
-        print("5/10 Analyzing sales data...")
-        calculate_total_revenue(valid)
-        region_wise_sales(valid)
-        top_selling_products(valid, n=5)
-        customer_analysis(valid)
-        daily_sales_trend(valid)
-        find_peak_sales_day(valid)
-        low_performing_products(valid, threshold=10)
-        
-        # 6. API Integration (Part 3)
-        print("6/10 Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_mapping = create_product_mapping(api_products)
-        
-        print("7/10 Enriching sales data...")
-        enriched = enrich_sales_data(valid, product_mapping)
-        
-        # 8. Generate Report (Part 4)
-        print("8/10 Generating report...")
-        generate_sales_report(valid, enriched)
+            print("3/10 Filter options:")
+            index = build_transaction_index(transactions)  # Validate once, filter via indexes
+            pipeline.provide('valid', _choose_filters(index))  # Prompts stay on the main thread
+            pipeline.wait()
         
         # 9. Success message
         print("\n" + "=" * 40)
@@ -72,12 +106,211 @@ def main():
         print(f"📊 Report: output/sales_report.txt")
         print(f"💾 Enriched: data/enriched_sales_data.txt")
         print("=" * 40)
+        return EXIT_OK
         
     except KeyboardInterrupt:
         print("\n\n👋 Process interrupted by user")
+        return EXIT_INTERRUPTED
     except Exception as e:
         print(f"\n❌ Error: {e}")
         print("Ensure all utils/ files exist and requirements.txt installed")
+        return EXIT_FAILURE
+
+def _sections(text):
+    sections = tuple(s.strip() for s in text.split(',') if s.strip())
+    unknown = set(sections) - set(REPORT_SECTIONS + OPTIONAL_SECTIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown section(s) {', '.join(sorted(unknown))} (choose from {', '.join(REPORT_SECTIONS + OPTIONAL_SECTIONS)})"
+        )
+    return sections
+
+def _spec(text):
+    try:
+        return parse_filter_spec(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Sales analytics batch run: one pass over the input evaluates every filter spec "
+                    "and writes a report per spec.",
+        epilog="Exit codes: 0 ok, 1 input/processing error, 2 bad arguments, 130 interrupted."
+    )
+    parser.add_argument('inputs', nargs='*', default=['data/sales_data.txt'], metavar='INPUT',
+                        help="sales files, directories or globs; .gz/.bz2 are read directly (default: data/sales_data.txt)")
+
+    output = parser.add_argument_group('output')
+    output.add_argument('-r', '--report', default='output/sales_report.txt',
+                        help="report path; with several specs the spec name is added (sales_report_NAME.txt)")
+    output.add_argument('--sections', type=_sections, default=REPORT_SECTIONS,
+                        help=f"comma-separated report sections (default: {','.join(REPORT_SECTIONS)}; also: {','.join(OPTIONAL_SECTIONS)})")
+    output.add_argument('--enriched', metavar='PATH',
+                        help="also write every valid row, enriched, to PATH (.txt, .npz or .parquet)")
+
+    filters = parser.add_argument_group('filters')
+    filters.add_argument('--region', help="single filter: region")
+    filters.add_argument('--min-amount', type=float, help="single filter: minimum transaction amount")
+    filters.add_argument('--max-amount', type=float, help="single filter: maximum transaction amount")
+    filters.add_argument('--spec', type=_spec, action='append', default=[], metavar='NAME[:region=R,min=X,max=Y]',
+                         help="named filter spec; repeat to evaluate several in the same pass")
+    filters.add_argument('--specs-file', metavar='JSON',
+                         help="JSON list of specs: [{\"name\": ..., \"region\": ..., \"min_amount\": ..., \"max_amount\": ...}]")
+
+    processing = parser.add_argument_group('processing')
+    processing.add_argument('-w', '--workers', type=int, default=1, help="worker processes for the parse pass (default: 1)")
+    processing.add_argument('--distinct-error', type=float,
+                            help="sketch mode: approximate distinct counts with this relative error")
+    processing.add_argument('--database', metavar='PATH',
+                            help="load the inputs into a SQLite database and answer every spec in SQL; "
+                                 "later runs reuse it while the inputs are unchanged")
+    processing.add_argument('--reload', action='store_true', help="with --database: reload the inputs even if unchanged")
+    processing.add_argument('--incremental', action='store_true',
+                            help="append-only input: reuse the saved aggregate and parse only the bytes added "
+                                 "since the last run (one input, one spec, no enrichment)")
+    processing.add_argument('--state-file', metavar='PATH',
+                            help="with --incremental: aggregate state file (default: data/aggregate_state.pkl)")
+
+    catalog = parser.add_argument_group('catalog')
+    catalog.add_argument('--no-enrich', action='store_true', help="skip the product catalog and enrichment")
+    catalog.add_argument('--catalog-cache', default=CACHE_FILE, help=f"catalog cache file (default: {CACHE_FILE})")
+    catalog.add_argument('--catalog-ttl', type=float, default=DEFAULT_TTL,
+                         help="seconds a cached catalog is used without refreshing (default: 1 day)")
+    catalog.add_argument('--stale-catalog', action='store_true',
+                         help="serve a stale cached catalog and refresh it in the background")
+
+    server = parser.add_argument_group('server')
+    server.add_argument('--serve', action='store_true',
+                        help="keep the inputs loaded and answer queries over HTTP instead of writing reports")
+    # Defaults live in utils.server, which is only imported for --serve
+    server.add_argument('--host', help="--serve: address to listen on (default: 127.0.0.1)")
+    server.add_argument('--port', type=int, help="--serve: port (default: 8765)")
+    server.add_argument('--socket', metavar='PATH', help="--serve: listen on a Unix socket instead of host:port")
+    server.add_argument('--cache-size', type=int, help="--serve: query results kept in the LRU cache (default: 256)")
+    return parser
+
+def collect_specs(args, parser):
+    """Filter specs from --spec, --specs-file and the single-filter flags (default: one unfiltered spec)"""
+    specs = list(args.spec)
+    try:
+        if args.specs_file:
+            specs += load_filter_specs(args.specs_file)
+        if args.region or args.min_amount is not None or args.max_amount is not None:
+            specs.append(make_spec('filtered', args.region, args.min_amount, args.max_amount))
+        return check_unique_names(specs or [make_spec('all')])
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+def report_path(template, spec, n_specs):
+    if n_specs == 1:
+        return template
+    stem, ext = os.path.splitext(template)
+    return f"{stem}_{spec['name']}{ext or '.txt'}"
+
+def run_batch(args, parser):
+    specs = collect_specs(args, parser)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.database and args.distinct_error is not None:
+        parser.error("--distinct-error does not apply to --database (SQL counts are exact)")
+    if args.incremental and (args.database or len(args.inputs) != 1 or len(specs) != 1):
+        parser.error("--incremental takes one input file and one filter spec, without --database")
+
+    enrich = not args.no_enrich and not args.incremental  # Incremental state keeps no Product_ID counts
+
+    def write_reports(outcomes, product_mapping=None):
+        if outcomes is None:
+            return False
+        for spec, (results, summary, product_counts) in zip(specs, outcomes):
+            stats = enrichment_stats_for(product_counts, product_mapping) if enrich else None
+            sections = args.sections if enrich else tuple(s for s in args.sections if s != 'enrichment')
+            print(f"[{spec['name']}] Revenue: {results.total_revenue:,.2f} from {summary['final_count']} "
+                  f"of {summary['total_input']} transactions")
+            generate_sales_report(None, None, report_path(args.report, spec, len(specs)),
+                                  results=results, enrichment_stats=stats, sections=sections)
+        return True
+
+    valid_rows = [] if enrich and args.enriched and not args.database else None  # Kept by the parse for --enriched
+
+    def write_enriched(product_mapping, outcomes):
+        """Enrich the rows the aggregation pass already parsed (or loaded into the database)"""
+        if outcomes is None:
+            return None
+        if args.database:
+            from utils.sqlite_store import SalesDatabase
+            with SalesDatabase(args.database) as db:
+                return enrich_to_file(db, product_mapping, args.enriched)
+        return enrich_to_file(chain.from_iterable(valid_rows), product_mapping, args.enriched)
+
+    # The catalog fetch runs alongside the aggregation pass; reports start once both are in
+    with Pipeline() as pipeline:
+        if args.database:
+            from utils.sqlite_store import query_specs  # Loads sqlite3: only for --database
+            pipeline.add('outcomes', lambda: query_specs(
+                args.database, args.inputs, specs, count_products=enrich, reload=args.reload
+            ))
+        elif args.incremental:
+            from utils.incremental import incremental_aggregate, STATE_FILE  # Hashing and pickling: only here
+            spec = specs[0]
+
+            def aggregate_incrementally():
+                results, summary = incremental_aggregate(
+                    args.inputs[0], args.state_file or STATE_FILE, spec['region'], spec['min_amount'], spec['max_amount'],
+                    args.workers, args.distinct_error
+                )
+                return None if results is None else [(results, summary, None)]
+            pipeline.add('outcomes', aggregate_incrementally)
+        else:
+            # One parse of all inputs feeds every spec; partitions are spread over the workers
+            pipeline.add('outcomes', lambda: parallel_aggregate_specs(
+                args.inputs, specs, args.workers, count_products=enrich, distinct_error=args.distinct_error,
+                valid_rows=valid_rows
+            ))
+        if enrich:
+            pipeline.add('product_mapping', lambda: get_product_mapping(
+                cache_file=args.catalog_cache, ttl=args.catalog_ttl, stale_while_revalidate=args.stale_catalog,
+                cancel=pipeline.cancelled
+            ))
+            if args.enriched:
+                pipeline.add('enriched', write_enriched, after=('product_mapping', 'outcomes'))
+        pipeline.add('reports', write_reports, after=('outcomes', 'product_mapping') if enrich else ('outcomes',))
+        done = pipeline.run()
+    return EXIT_OK if done['reports'] else EXIT_FAILURE
+
+def run_server(args):
+    from utils.server import serve
+    catalog = None
+    if not args.no_enrich:
+        catalog = lambda: get_product_mapping(
+            cache_file=args.catalog_cache, ttl=args.catalog_ttl, stale_while_revalidate=args.stale_catalog
+        )
+    try:
+        options = {'host': args.host, 'port': args.port, 'socket_path': args.socket, 'cache_size': args.cache_size}
+        serve(args.inputs, catalog, **{name: value for name, value in options.items() if value is not None})
+    except KeyboardInterrupt:
+        print("Server stopped")  # Ctrl+C is the normal way to stop it
+    return EXIT_OK
+
+def main(argv=None):
+    """Interactive with no arguments; otherwise a batch run. Returns the exit code."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return run_interactive()
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.serve:
+            return run_server(args)
+        return run_batch(args, parser)
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except (OSError, UnicodeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
 
 if __name__ == "__main__":
-    main()
+    with metrics.run():  # No-op unless SALES_METRICS / SALES_PROFILE are set
+        exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+from concurrent.futures import CancelledError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from utils.api_handler import *
+
+# Local stub: 1,050 products, 100 per page, first request for each page fails with 503
+PRODUCTS = [
+    {'id': i, 'title': f'Product {i}', 'category': 'misc', 'brand': 'Acme', 'price': 1.0, 'rating': 4.0}
+    for i in range(1, 1051)
+]
+failed_once = set()
+in_flight = [0, 0]  # current, peak
+lock = threading.Lock()
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        skip, limit = int(query['skip'][0]), min(int(query['limit'][0]), 100)
+        with lock:
+            first_try = skip not in failed_once
+            failed_once.add(skip)
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        if first_try:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({'products': PRODUCTS[skip:skip + limit], 'total': len(PRODUCTS),
+                           'skip': skip, 'limit': limit}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{server.server_port}/products"
+
+# Page size above the server cap: stride follows what the server returns
+products = fetch_all_products(url, page_size=500, max_workers=4)
+assert sorted(p['id'] for p in products) == list(range(1, 1051))
+print("Peak concurrent requests:", in_flight[1])
+assert 1 < in_flight[1] <= 4
+
+# Pages stream straight into the mapping
+mapping = create_product_mapping(iter_products(url, max_workers=4))
+assert len(mapping) == 1050
+
+# Cancelling stops the fetch at once instead of waiting out retries and queued pages
+failed_once.clear()
+cancel = threading.Event()
+pages = iter_product_pages(url, max_workers=2, cancel=cancel)
+next(pages)
+cancel.set()
+start = time.perf_counter()
+try:
+    list(pages)
+    assert False, "cancelled fetch must raise"
+except CancelledError:
+    pass
+assert time.perf_counter() - start < 0.5
+assert len(failed_once) < 11, "queued pages were still fetched"
+
+server.shutdown()
+server.server_close()
+print("✅ Paginated fetch: all pages, bounded concurrency, retries OK")
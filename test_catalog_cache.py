@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from utils.catalog_cache import *
+
+# Local stub for the DummyJSON products endpoint
+PRODUCTS = [
+    {'id': i, 'title': f'Product {i}', 'category': 'misc', 'brand': 'Acme', 'price': 9.99, 'rating': 4.5}
+    for i in range(1, 121)
+]
+hits = []
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        hits.append(self.path)
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        query = parse_qs(urlparse(self.path).query)
+        skip, limit = int(query['skip'][0]), int(query['limit'][0])
+        body = json.dumps({'products': PRODUCTS[skip:skip + limit], 'total': len(PRODUCTS),
+                           'skip': skip, 'limit': limit}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{server.server_port}/products"
+cache_file = os.path.join(tempfile.mkdtemp(), 'catalog.json.gz')
+
+# Cold start fetches both pages and caches
+mapping = get_product_mapping(url, cache_file)
+assert len(mapping) == 120 and mapping['101']['title'] == 'Product 101'
+assert len(hits) == 2
+
+# Warm start makes no network calls
+assert get_product_mapping(url, cache_file) == mapping
+assert len(hits) == 2
+
+# Expired TTL revalidates with a conditional request (304)
+assert get_product_mapping(url, cache_file, ttl=0) == mapping
+assert len(hits) == 3
+
+# Stale-while-revalidate answers from cache and refreshes in the background
+assert get_product_mapping(url, cache_file, ttl=0, stale_while_revalidate=True) == mapping
+for thread in threading.enumerate():
+    if thread.name == 'catalog-refresh':
+        thread.join()
+assert len(hits) == 4
+
+# A cancelled fetch makes no requests and leaves no cache behind
+cancelled = threading.Event()
+cancelled.set()
+other_cache = os.path.join(os.path.dirname(cache_file), 'cancelled.json.gz')
+assert get_product_mapping(url, other_cache, cancel=cancelled) == {}
+assert len(hits) == 4 and not os.path.exists(other_cache)
+
+# API down: fall back to the last good snapshot
+server.shutdown()
+server.server_close()
+assert get_product_mapping(url, cache_file, ttl=0) == mapping
+
+print("✅ Catalog cache: cold fetch, warm hit, 304 revalidation, SWR and fallback OK")
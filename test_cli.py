@@ -0,0 +1,58 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+from main import main, EXIT_OK, EXIT_FAILURE
+from utils.file_handler import *
+from utils.data_processor import *
+from utils.filter_specs import parse_filter_spec
+from utils.parallel import parallel_aggregate_specs
+
+# One pass over the file gives every spec what a separate filter + aggregate gives
+specs = [parse_filter_spec(text) for text in ('all', 'north:region=North', 'band:min=1000,max=50000', 'none:region=Nowhere')]
+with contextlib.redirect_stdout(io.StringIO()):
+    transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+    for workers in (1, 2):
+        outcomes = parallel_aggregate_specs('data/sales_data.txt', specs, workers, count_products=True, chunk_size=512)
+        for spec, (results, summary, product_counts) in zip(specs, outcomes):
+            valid, _, expected_summary = validate_and_filter_transactions(
+                transactions, spec['region'], spec['min_amount'], spec['max_amount'])
+            expected = aggregate_transactions(valid)
+            assert summary == expected_summary
+            assert results.transaction_count == expected.transaction_count == sum(product_counts.values())
+            assert results.regions == expected.regions and results.daily == expected.daily
+            assert abs(results.total_revenue - expected.total_revenue) < 1e-6
+
+# Batch runs write one report per spec and return exit codes instead of printing errors
+with tempfile.TemporaryDirectory() as tmp:
+    specs_file = os.path.join(tmp, 'specs.json')
+    with open(specs_file, 'w') as f:
+        json.dump([{'name': 'east', 'region': 'East'}, {'name': 'big', 'min_amount': 100000}], f)
+    report = os.path.join(tmp, 'reports', 'sales.txt')
+    with contextlib.redirect_stdout(io.StringIO()):
+        code = main(['data/sales_data.txt', '--no-enrich', '--spec', 'north:region=North',
+                     '--specs-file', specs_file, '-r', report, '--sections', 'summary,regions,weekly'])
+    assert code == EXIT_OK
+    assert sorted(os.listdir(os.path.dirname(report))) == ['sales_big.txt', 'sales_east.txt', 'sales_north.txt']
+    with open(os.path.join(tmp, 'reports', 'sales_north.txt')) as f:
+        text = f.read()
+    assert 'REGION-WISE PERFORMANCE' in text and 'WEEKLY SALES' in text and 'TOP 5 PRODUCTS' not in text
+    assert 'Records Processed: 21' in text
+
+    def usage_error(args):
+        try:
+            main(args + ['--no-enrich', '-r', report])
+        except SystemExit as e:
+            return e.code == 2
+        return False
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        assert main([os.path.join(tmp, 'missing.txt'), '--no-enrich', '-r', report]) == EXIT_FAILURE
+        assert usage_error(['--spec', 'x:colour=red'])
+        # Malformed specs files are usage errors too, not crashes later in the run
+        for entry in ({'region': 'East'}, {'name': 'big', 'min_amount': '1000'}, {'name': 7}, {'name': 'x', 'max_amount': True}):
+            with open(specs_file, 'w') as f:
+                json.dump([entry], f)
+            assert usage_error(['--specs-file', specs_file]), entry
+print("✅ Batch CLI evaluates every spec in one pass")
@@ -0,0 +1,38 @@
+import contextlib
+import io
+from utils.file_handler import *
+from utils.data_processor import *
+
+def run_analyses(data):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        results = [
+            calculate_total_revenue(data),
+            region_wise_sales(data),
+            top_selling_products(data, n=5),
+            customer_analysis(data),
+            daily_sales_trend(data),
+            find_peak_sales_day(data),
+            low_performing_products(data, threshold=10),
+        ]
+    return results, out.getvalue()
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    print("NumPy not installed – skipping columnar backend check")
+else:
+    from utils.columnar import ColumnarTransactions
+
+    raw_lines = read_sales_data('data/sales_data.txt')
+    transactions = parse_transactions(raw_lines)
+    valid, invalid, _ = validate_and_filter_transactions(transactions)
+
+    store = ColumnarTransactions.from_transactions(valid)
+    print("Columnar rows:", len(store), "regions:", store.values['Region'])
+    assert list(store) == valid
+
+    expected = run_analyses(aggregate_transactions(valid))
+    assert run_analyses(aggregate_transactions(valid, backend='numpy')) == expected
+    assert run_analyses(store) == expected
+    print("✅ NumPy backend matches Python backend")
@@ -0,0 +1,37 @@
+import importlib.util
+import os
+import tempfile
+from utils.file_handler import *
+from utils.api_handler import *
+from utils.enriched_writer import load_enriched_data
+
+transactions = list(stream_transactions('data/sales_data.txt'))
+mapping = {str(i): {'title': f'Item {i}', 'category': 'misc', 'brand': 'Acme', 'price': 1.0, 'rating': 4.2}
+           for i in range(101, 106)}
+out_dir = tempfile.mkdtemp()
+
+# Streaming writer produces the same text file as save_enriched_data
+enriched = list(iter_enriched(transactions, mapping))
+save_enriched_data(enriched, os.path.join(out_dir, 'list.txt'))
+stats = enrich_to_file(iter(transactions), mapping, os.path.join(out_dir, 'stream.txt'), batch_size=7)
+assert open(os.path.join(out_dir, 'list.txt')).read() == open(os.path.join(out_dir, 'stream.txt')).read()
+assert stats['total'] == len(transactions) and stats['matched'] == sum(t['API_Match'] for t in enriched)
+
+if importlib.util.find_spec('numpy'):
+    path = os.path.join(out_dir, 'enriched.npz')
+    enrich_to_file(iter(transactions), mapping, path, batch_size=7)
+    columns = load_enriched_data(path)
+    assert columns['Transaction_ID'].tolist() == [t['Transaction_ID'] for t in enriched]
+    assert columns['Quantity'].tolist() == [t['Quantity'] for t in enriched]
+    assert columns['API_Match'].tolist() == [t['API_Match'] for t in enriched]
+    print("npz round trip OK")
+
+if importlib.util.find_spec('pyarrow'):
+    path = os.path.join(out_dir, 'enriched.parquet')
+    enrich_to_file(iter(transactions), mapping, path, batch_size=7)
+    table = load_enriched_data(path)
+    assert table.column('Unit_Price').to_pylist() == [t['Unit_Price'] for t in enriched]
+    assert table.column('API_Rating').to_pylist() == [t['API_Rating'] for t in enriched]
+    print("parquet round trip OK")
+
+print("✅ Streaming enriched writer OK")
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from collections import Counter
+from utils.file_handler import *
+from utils.aggregator import aggregate_transactions
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    print("NumPy not installed – skipping fast parser check")
+else:
+    from utils.fast_parser import parse_sales_columns
+    from utils.parallel import parallel_aggregate
+    from utils.sqlite_store import SalesDatabase
+
+    def check(filename, **kwargs):
+        """Fast parser must match iter_transactions row for row, reject for reject"""
+        rejects = Counter()
+        expected = list(iter_transactions(iter_sales_lines(filename), rejects))
+        store, fast_rejects = parse_sales_columns(filename, **kwargs)
+        assert list(store) == expected
+        assert fast_rejects == rejects, (fast_rejects, rejects)
+        return store, fast_rejects
+
+    store, _ = check('data/sales_data.txt')
+    check('data/sales_data.txt', block_size=256)  # Many small blocks
+
+    # Dirty rows: thousands separators, padding, CRLF, blank lines, bad numbers,
+    # wrong field counts, commas in names, long names and non-ASCII text
+    rows = [
+        "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region",
+        "T001|2024-12-01|P101|Laptop|2|45,000|C001|North",
+        " T002 | 2024-12-01 |P102| Mouse,Wireless | 1,000 | 1,234.50 |C002|  South ",
+        "",
+        "   ",
+        "T003|2024-12-02|P103|Keyboard|x|500|C003|East",
+        "T004|2024-12-02|P104|Monitor|3|n/a|C004|West",
+        "T005|2024-12-02|P105|Webcam|3|500|C005",
+        "T006|2024-12-03|P106|Headphones|3|500|C006|North|extra",
+        "T007|2024-12-03|P107|Extra Long Product Name For The Fingerprint Path|-2|1e3|C007|North",
+        "T008|2024-12-03|P108|Café Crème|+4| 12.5 ||",
+        "T009|2024-12-03|P101|Laptop|12345678901234567|0.1|C001|North",
+        "T010|2024-12-04|P101|Laptop|1|12345678901234567.25|C001|North",
+        "A011|2024-12-04|P101| Laptop |0|.5|C001|North",
+        "T012|2024-12-04|P101|Laptop|,|5|C001|North",
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'dirty.txt')
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            f.write('\r\n'.join(rows) + '\n')
+        _, rejects = check(filename)
+        print("Dirty rejects:", dict(rejects))
+        assert rejects == {'bad_quantity': 2, 'bad_unit_price': 1, 'field_count': 2}
+        for block_size in (1, 64):
+            check(filename, block_size=block_size)
+
+        with open(filename, 'w', encoding='latin-1') as f:
+            f.write('\n'.join(rows) + '\n')
+        check(filename)
+
+        # Old Mac line endings take the line-by-line path
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            f.write('\r'.join(rows) + '\r')
+        check(filename)
+
+        # A quantity past int64 can't go in the column: the row is rejected instead of crashing
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(rows[:2] + ["T013|2024-12-04|P101|Laptop|123456789012345678901|5|C001|North"]) + '\n')
+        huge, rejects = parse_sales_columns(filename)
+        assert len(huge) == 1 and rejects == {'bad_quantity': 1}
+        results, summary = parallel_aggregate(filename, workers=1)
+        assert results.transaction_count == summary['total_input'] == 1
+        with SalesDatabase(':memory:') as db:
+            db.load_files(filename)
+            assert len(db) == 1
+
+    # Columns feed the aggregate directly
+    transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+    assert vars(store.aggregate()) == vars(aggregate_transactions(transactions))
+    print("✅ Fast parser matches parse_transactions")
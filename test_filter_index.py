@@ -0,0 +1,41 @@
+import contextlib
+import io
+import random
+import time
+from utils.file_handler import *
+from utils.filter_index import TransactionIndex, build_transaction_index
+
+transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+index = build_transaction_index(transactions * 200)
+
+# Indexed filters return exactly what a full validation scan returns
+rng = random.Random(7)
+queries = [(None, None, None), ('North', None, None), ('Nowhere', None, None), (None, 0, 0)]
+queries += [
+    (rng.choice([None, 'North', 'South', 'East', 'West']),
+     rng.choice([None, 500, 5000, 50000]),
+     rng.choice([None, 10000, 100000, 900000]))
+    for _ in range(30)
+]
+with contextlib.redirect_stdout(io.StringIO()):
+    for query in queries:
+        assert index.filter(*query) == validate_and_filter_transactions(transactions * 200, *query), query
+
+# NaN amounts can't be sorted; they pass every amount filter, as in the linear passes_filters scan
+odd = [Transaction.from_mapping({**t, 'Unit_Price': price}) for t, price in
+       zip(filter(is_valid_transaction, transactions), [float('nan'), float('inf'), float('nan'), 0.5, float('nan')])]
+mixed = odd[:3] + transactions * 3 + odd[3:]
+nan_index = TransactionIndex(mixed)
+assert len(nan_index.nan_rows) == 3
+with contextlib.redirect_stdout(io.StringIO()):
+    for query in queries:
+        kept = nan_index.filter(*query)[0]
+        assert kept == [t for t in mixed if is_valid_transaction(t) and passes_filters(t, *query)], query
+        assert kept == validate_and_filter_transactions(mixed, *query)[0], query
+
+start = time.perf_counter()
+for _ in range(1000):
+    index.positions('North', 100000, 200000)
+print(f"Indexed region+amount query: {(time.perf_counter() - start) * 1000 / 1000:.3f} ms")
+
+print("✅ Indexed filters match validate_and_filter_transactions")
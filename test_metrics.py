@@ -0,0 +1,31 @@
+import json
+import os
+import tempfile
+from utils import metrics
+from utils.file_handler import *
+from utils.data_processor import *
+
+raw_lines = read_sales_data('data/sales_data.txt') + ['T900|2024-12-01|P101|Mouse|x|10|C001|North', 'bad line']
+
+# Disabled: nothing is recorded
+metrics.reset()
+parse_transactions(raw_lines)
+assert metrics.summary()['stages'] == []
+
+metrics.enable()
+transactions = parse_transactions(raw_lines)
+valid, invalid, _ = validate_and_filter_transactions(transactions)
+region_wise_sales(valid)
+metrics.disable()
+
+run = metrics.summary()
+stages = {s['stage']: s for s in run['stages']}
+assert stages['parse_transactions']['rejects'] == {'bad_quantity': 1, 'field_count': 1}
+assert stages['parse_transactions']['rows_in'] == 82 and stages['parse_transactions']['rows_out'] == 80
+assert sum(stages['validate_and_filter_transactions']['rejects'].values()) == invalid
+assert stages['calculate_total_revenue']['parent'] == 'region_wise_sales'
+
+path = metrics.export_json(os.path.join(tempfile.mkdtemp(), 'metrics.json'))
+with open(path) as f:
+    print("Rejects:", json.load(f)['rejects'])
+print("✅ Metrics recorded per stage")
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import os
+import tempfile
+from utils.file_handler import *
+from utils.columnar import load_numpy
+from utils.fast_parser import scan_range
+from utils.mmap_reader import map_file, iter_mapped_blocks, iter_line_blocks, line_aligned_ranges
+import utils.parallel as parallel
+
+np = load_numpy()
+
+with open('data/sales_data.txt', 'rb') as f:
+    raw = f.read()
+
+# Blocks are line-aligned views straight into the map, with read-ahead past their end
+with map_file('data/sales_data.txt') as mm:
+    for block_size in (1, 100, 4096, len(raw) * 2):
+        pieces = []
+        for view, size in iter_mapped_blocks(mm, block_size=block_size, lookahead=8):
+            assert view.obj is mm and len(view) - size == min(8, len(raw) - sum(pieces) - size)
+            assert view[size - 1] == ord('\n') or sum(pieces) + size == len(raw)
+            pieces.append(size)
+            view.release()
+        assert sum(pieces) == len(raw)
+assert b''.join(iter_line_blocks('data/sales_data.txt', block_size=64)) == raw
+
+for n in (1, 3, 16, 1000):
+    ranges = line_aligned_ranges('data/sales_data.txt', n)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(raw)
+    assert all(raw[start - 1:start] == b'\n' for start, _ in ranges[1:])
+
+with tempfile.TemporaryDirectory() as tmp:
+    empty = os.path.join(tmp, 'empty.txt')
+    open(empty, 'wb').close()
+    with map_file(empty) as mm:
+        assert list(iter_mapped_blocks(mm)) == []
+    assert line_aligned_ranges(empty, 4) == []
+
+    if np is None:
+        print("NumPy not installed – skipping columnar range check")
+    else:
+        # Columnar range workers validate and filter exactly like the line-by-line path
+        dirty = os.path.join(tmp, 'dirty.txt')
+        with open(dirty, 'wb') as f:
+            f.write(raw + b'\n'.join([
+                b'T900|2024-12-30|P101|Laptop|2|inf|C001|North',
+                b'T901|2024-12-30|P101|Laptop|2|500||North',
+                b'T902|2024-12-30|P101|Laptop|2|500|C001|',
+                b'X903|2024-12-30|P101|Laptop|2|500|C001|North',
+                b'T904|2024-12-30|P101|Laptop|0|500|C001|North',
+                b'T905|2024-12-30|P101|Laptop|2|-5|C001|North',
+                b'T906|2024-12-31|P999|Gadget|1|1,500.5|C099|Central',
+            ]))  # No trailing newline
+        filters = [{}, {'region': 'North'}, {'region': 'Nowhere'}, {'min_amount': 1000, 'max_amount': 50000}]
+        outcomes = {}
+        for columnar in (True, False):
+            parallel.scans_columns = lambda filename: columnar
+            with contextlib.redirect_stdout(io.StringIO()):
+                outcomes[columnar] = [parallel.parallel_aggregate(dirty, 1, chunk_size=1024, **kw) for kw in filters]
+        for (fast, fast_summary), (slow, slow_summary) in zip(outcomes[True], outcomes[False]):
+            assert fast_summary == slow_summary
+            assert vars(fast) == vars(slow) and list(fast.customers) == list(slow.customers)
+
+        # Row masks follow is_valid_transaction / passes_filters, NaN prices included
+        with open(dirty, 'ab') as f:
+            f.write(b'\nT907|2024-12-31|P101|Laptop|2|nan|C001|North\n')
+        store = scan_range(dirty)
+        rows = list(store)
+        assert store.valid_mask().tolist() == [is_valid_transaction(t) for t in rows]
+        for kw in filters:
+            assert store.filter_mask(**kw).tolist() == [passes_filters(t, **kw) for t in rows]
+print("✅ Memory-mapped scanner matches the line reader")
@@ -0,0 +1,63 @@
+import contextlib
+import io
+import math
+import os
+import tempfile
+from utils.file_handler import *
+from utils.data_processor import *
+from utils.parallel import parallel_aggregate, split_file_ranges
+
+def analyses(data):
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        results = [
+            calculate_total_revenue(data), region_wise_sales(data), top_selling_products(data),
+            customer_analysis(data), daily_sales_trend(data), low_performing_products(data),
+        ]
+    return results, out.getvalue()
+
+# Repeat the sample rows so the file splits into many chunks
+with open('data/sales_data.txt') as f:
+    header, *rows = f.readlines()
+path = os.path.join(tempfile.mkdtemp(), 'sales_big.txt')
+with open(path, 'w') as f:
+    f.write(header)
+    f.writelines(rows * 50)
+
+ranges = split_file_ranges(path, 16)
+print("Chunks:", len(ranges))
+assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(path)
+
+transactions = parse_transactions(read_sales_data(path))
+for filters in [{}, {'region': 'North'}, {'min_amount': 5000, 'max_amount': 200000}]:
+    valid, invalid, summary = validate_and_filter_transactions(transactions, **filters)
+    results, parallel_summary = parallel_aggregate(path, workers=4, chunk_size=4096, **filters)
+    assert parallel_summary == summary
+    assert analyses(results) == analyses(valid)
+
+# Sub-cent prices: revenue is summed exactly, so chunked merges match a single pass
+fractional = os.path.join(os.path.dirname(path), 'sales_fractional.txt')
+with open(fractional, 'w') as f:
+    f.write(header)
+    for i, row in enumerate(rows * 50):
+        fields = row.split('|')
+        if len(fields) == 8 and fields[5].replace(',', '').isdigit():
+            fields[5] += ('.333', '.005', '.345', '.1', '.07')[i % 5]
+        f.write('|'.join(fields))
+
+transactions = parse_transactions(read_sales_data(fractional))
+valid, invalid, summary = validate_and_filter_transactions(transactions)
+expected = aggregate_transactions(valid)
+assert expected.total_revenue == math.fsum(t.amount for t in valid)
+merged = SalesAggregate()
+for start in range(0, len(valid), 97):
+    merged.merge(SalesAggregate().update(valid[start:start + 97]))
+for workers in (1, 4):
+    results, parallel_summary = parallel_aggregate(fractional, workers=workers, chunk_size=4096)
+    assert parallel_summary == summary
+    for partial in (merged, results):
+        assert partial.total_revenue == expected.total_revenue and partial.units == expected.units
+        for section in ('regions', 'products', 'customers', 'daily'):
+            assert getattr(partial, section) == getattr(expected, section), section
+    assert analyses(results) == analyses(valid)
+
+print("✅ Parallel aggregation matches single-process path")
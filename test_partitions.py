@@ -0,0 +1,77 @@
+import bz2
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+from utils.file_handler import *
+from utils.data_processor import *
+from utils.parallel import parallel_aggregate
+
+header = 'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n'
+with open('data/sales_data.txt', encoding='utf-8') as f:
+    rows = f.readlines()[1:]
+
+with tempfile.TemporaryDirectory() as tmp:
+    # Split the sample into daily-style partitions: plain, gzip, bzip2 and latin-1
+    parts = [rows[i:i + 20] for i in range(0, len(rows), 20)]
+    writers = [
+        ('part-0.txt', lambda p, text: open(p, 'w', encoding='utf-8').write(text)),
+        ('part-1.txt.gz', lambda p, text: gzip.open(p, 'wt', encoding='utf-8').write(text)),
+        ('part-2.txt.bz2', lambda p, text: bz2.open(p, 'wt', encoding='utf-8').write(text)),
+        ('part-3.txt', lambda p, text: open(p, 'w', encoding='latin-1').write(text.replace('Mouse', 'Souris Élan'))),
+    ]
+    for (name, write), part in zip(writers, parts):
+        write(os.path.join(tmp, name), header + ''.join(part))
+    open(os.path.join(tmp, 'notes.md'), 'w').write('not sales data\n')
+
+    files = expand_inputs(tmp)
+    assert [os.path.basename(name) for name in files] == ['part-0.txt', 'part-1.txt.gz', 'part-2.txt.bz2', 'part-3.txt']
+    assert expand_inputs([os.path.join(tmp, 'part-*.txt*'), files[0]]) == files
+    assert [detect_encoding(name) for name in files] == ['utf-8', 'utf-8', 'utf-8', 'latin-1']
+
+    # Directory input reads like the single file (partition 3 re-encoded to latin-1)
+    expected = [line.strip() for part in parts for line in part if line.strip()]
+    expected = expected[:60] + [line.replace('Mouse', 'Souris Élan') for line in expected[60:]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for workers in (1, 3):
+            assert list(iter_sales_files(tmp, workers)) == expected
+        assert read_sales_data(tmp) == expected
+        streamed = list(stream_transactions(os.path.join(tmp, 'part-*')))
+        transactions = parse_transactions(expected)
+        assert streamed == transactions
+        single = aggregate_transactions(validate_and_filter_transactions(transactions)[0])
+        for workers in (1, 2):
+            results, summary = parallel_aggregate(tmp, workers)
+            assert results.transaction_count == single.transaction_count
+            assert results.products == single.products and results.daily == single.daily
+        assert read_sales_data(os.path.join(tmp, 'nothing-*.gz')) == []
+        assert parallel_aggregate(os.path.join(tmp, 'nothing-*.gz')) == (None, None)
+
+    # Only a prefix is sniffed; readers move on to the next candidate when a late latin-1 byte breaks utf-8
+    late = os.path.join(tmp, 'late.txt')
+    with open(late, 'wb') as f:
+        f.write(header.encode() + 'Ünïcode\n'.encode('utf-8') * 5000 + 'Caf\xe9\n'.encode('latin-1'))
+    assert detect_encoding(late, sniff_size=1000) == 'utf-8'
+    assert detect_encoding(late, sniff_size=1000, whole_file=True) == 'latin-1'
+    with open(late, 'wb') as f:
+        f.write(header.encode() + 'Ünïcode\n'.encode('utf-8') * 5000)
+    assert detect_encoding(late, sniff_size=1001) == 'utf-8'  # Prefix ends mid-character
+
+    # Past the default sniff size: whole-file reads match a latin-1 decode, streams carry on after a switch
+    row = rows[0].replace(rows[0].split('|')[3], 'Ünïcode')
+    data = header.encode() + row.encode('utf-8') * 2000 + rows[1].replace(rows[1].split('|')[3], 'Café').encode('latin-1')
+    assert len(data) > SNIFF_SIZE
+    with open(late, 'wb') as f:
+        f.write(data)
+    decoded = [line.strip() for line in data.decode('latin-1').splitlines()[1:] if line.strip()]
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert read_sales_data(late) == decoded
+        streamed = list(iter_sales_lines(late))
+        assert len(streamed) == len(decoded) and streamed[0] == row.strip() and streamed[-1] == decoded[-1]
+        expected = aggregate_transactions(validate_and_filter_transactions(parse_transactions(decoded))[0])
+        for workers in (1, 2):
+            results, summary = parallel_aggregate(late, workers, chunk_size=SNIFF_SIZE // 2)
+            assert results.transaction_count == expected.transaction_count
+            assert results.products == expected.products
+print("✅ Directories, globs and compressed partitions read as one stream")
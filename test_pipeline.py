@@ -0,0 +1,111 @@
+import contextlib
+import io
+import threading
+import time
+from utils.file_handler import *
+from utils.api_handler import *
+from utils.pipeline import Pipeline
+
+# Independent stages overlap; dependents get their inputs as keyword arguments
+order = []
+def slow(name, seconds, value):
+    def run(**inputs):
+        time.sleep(seconds)
+        order.append(name)
+        return value(**inputs)
+    return run
+
+start = time.perf_counter()
+with Pipeline() as pipeline:
+    pipeline.add('catalog', slow('catalog', 0.3, lambda: {'101': 'x'}))
+    pipeline.add('rows', slow('rows', 0.3, lambda: [1, 2, 3]))
+    pipeline.add('total', slow('total', 0, lambda rows: sum(rows)), after=('rows',))
+    pipeline.add('report', slow('report', 0, lambda total, catalog: f"{total}/{len(catalog)}"), after=('total', 'catalog'))
+    results = pipeline.run()
+elapsed = time.perf_counter() - start
+assert results['report'] == '6/1' and order[-1] == 'report'
+assert elapsed < 0.55, f"stages did not overlap ({elapsed:.2f}s)"
+
+# External inputs unblock stages already waiting in the background
+gate = threading.Event()
+with Pipeline() as pipeline:
+    pipeline.add('catalog', lambda: gate.wait(1) and 'ready')
+    pipeline.expect('valid')
+    pipeline.add('joined', lambda valid, catalog: (valid, catalog), after=('valid', 'catalog'))
+    pipeline.start()
+    gate.set()
+    pipeline.provide('valid', 70)
+    assert pipeline.wait()['joined'] == (70, 'ready')
+
+# The first failure is re-raised and its dependents never run
+ran = []
+with Pipeline() as pipeline:
+    pipeline.add('load', lambda: 1 / 0)
+    pipeline.add('after_load', lambda load: ran.append(load), after=('load',))
+    try:
+        pipeline.run()
+        assert False, "stage error must propagate"
+    except ZeroDivisionError:
+        assert ran == []
+
+# Main-thread stages run in the caller's thread, one at a time in the order added,
+# while background stages keep going
+printed = []
+def step(name, seconds=0):
+    def run(**inputs):
+        printed.append((name, 'start', threading.current_thread() is threading.main_thread()))
+        time.sleep(seconds)
+        printed.append((name, 'end', threading.current_thread() is threading.main_thread()))
+        return name
+    return run
+
+with Pipeline() as pipeline:
+    pipeline.add('catalog', lambda: time.sleep(0.2) or 'catalog')
+    pipeline.expect('valid')
+    pipeline.add('analyze', step('analyze', 0.1), after=('valid',), main_thread=True)
+    pipeline.add('enrich', step('enrich', 0.1), after=('valid', 'catalog'), main_thread=True)
+    pipeline.add('report', step('report'), after=('analyze', 'enrich'), main_thread=True)
+    pipeline.start()
+    pipeline.provide('valid', [])
+    assert pipeline.wait()['report'] == 'report'
+assert [(name, event) for name, event, _ in printed] == [
+    (name, event) for name in ('analyze', 'enrich', 'report') for event in ('start', 'end')
+]
+assert all(on_main for _, _, on_main in printed)
+
+# Cancelling (e.g. Ctrl+C) sets cancelled, so stages watching it stop early
+finished = []
+start = time.perf_counter()
+try:
+    with Pipeline() as pipeline:
+        pipeline.add('fetch', lambda: finished.append(pipeline.cancelled.wait(5)))
+        pipeline.start()
+        raise KeyboardInterrupt
+except KeyboardInterrupt:
+    pass
+while not finished and time.perf_counter() - start < 1:
+    time.sleep(0.01)
+assert finished == [True], "cancel did not reach the running stage"
+
+for broken in ([('a', ('b',)), ('b', ('a',))], [('a', ('missing',))]):
+    pipeline = Pipeline()
+    for name, after in broken:
+        pipeline.add(name, lambda **_: None, after=after)
+    try:
+        pipeline.run()
+        assert False, "bad graphs are rejected up front"
+    except ValueError as e:
+        print("Rejected:", e)
+
+# Match stats from per-Product_ID counts equal a streaming enrichment pass
+with contextlib.redirect_stdout(io.StringIO()):
+    transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+mapping = {'101': {'title': 'A', 'category': 'c', 'brand': 'b', 'price': 1, 'rating': 4}}
+stats = new_enrichment_stats()
+for _ in iter_enriched(transactions, mapping, 'view', stats):
+    pass
+counts = {}
+for t in transactions:
+    counts[t.Product_ID] = counts.get(t.Product_ID, 0) + 1
+assert enrichment_stats_for(counts, mapping) == stats
+print("✅ Pipeline stages run as soon as their inputs are ready")
@@ -0,0 +1,67 @@
+import contextlib
+import io
+import pickle
+import tracemalloc
+from utils.file_handler import *
+from utils.data_processor import *
+from utils.api_handler import EnrichedRow, NO_MATCH, enrich_sales_data, iter_enriched
+
+raw_lines = read_sales_data('data/sales_data.txt')
+transactions = parse_transactions(raw_lines)
+t = transactions[0]
+print("Record:", t)
+
+# Dict-style access keeps working alongside attributes
+assert isinstance(t, Transaction)
+assert t['Quantity'] == t.Quantity and t.get('Region') == t.Region
+assert t.amount == t.Quantity * t.Unit_Price
+changed = Transaction.from_mapping(t)
+changed.Quantity += 1
+assert changed.amount == changed.Quantity * changed.Unit_Price  # Never stale
+assert list(t) == list(TRANSACTION_FIELDS) and 'amount' not in t
+assert t.get('API_Match', 'missing') == 'missing'
+assert t == t.copy() == dict(t) and {**t} == t.copy()
+assert pickle.loads(pickle.dumps(t)) == t
+assert dict(EnrichedRow(t, NO_MATCH)) == {**t.copy(), **NO_MATCH}
+
+# Legacy dict input gives the same results as records
+dicts = [row.copy() for row in transactions]
+with contextlib.redirect_stdout(io.StringIO()):
+    kept = validate_and_filter_transactions(dicts, 'North', 1000)
+    assert kept == validate_and_filter_transactions(transactions, 'North', 1000)
+    assert kept[0] and all(type(row) is dict for row in kept[0])  # Dicts in, dicts out
+    assert customer_analysis(dicts) == customer_analysis(transactions)
+
+# in_place enrichment updates dicts; records (immutable) get the same fields via a side view
+mapping = {'101': {'title': 'Laptop', 'category': 'laptops', 'brand': 'B', 'price': 1, 'rating': 4.5}}
+expected = list(iter_enriched(transactions, mapping, mode='copy'))
+in_place = list(iter_enriched(transactions, mapping, mode='in_place'))
+assert [dict(row) for row in in_place] == expected
+assert all(isinstance(row, EnrichedRow) and row.row is t for row, t in zip(in_place, transactions))
+assert list(iter_enriched(dicts, mapping, mode='in_place')) == expected and dicts == expected
+with contextlib.redirect_stdout(io.StringIO()):
+    enriched = enrich_sales_data(transactions, mapping, verbose=False)
+assert enriched == expected and all(type(row) is dict for row in enriched)  # Views only on request
+
+# Records take a fraction of the memory of the original per-row dicts (own strings per row)
+def bytes_per_row(build):
+    tracemalloc.start()
+    rows = build()
+    size = tracemalloc.get_traced_memory()[0] / len(rows)
+    tracemalloc.stop()
+    return size
+
+def parse_dict(line):
+    fields = line.split('|')
+    return {
+        'Transaction_ID': fields[0].strip(), 'Date': fields[1].strip(), 'Product_ID': fields[2].strip(),
+        'Product_Name': fields[3].replace(',', ' ').strip(), 'Quantity': int(fields[4].replace(',', '')),
+        'Unit_Price': float(fields[5].replace(',', '')), 'Customer_ID': fields[6].strip(), 'Region': fields[7].strip()
+    }
+
+lines = [line for line in raw_lines if parse_line(line) is not None] * 500
+dict_size = bytes_per_row(lambda: [parse_dict(line) for line in lines])
+record_size = bytes_per_row(lambda: list(iter_transactions(lines)))
+print(f"Bytes per row: dict {dict_size:.0f}, record {record_size:.0f} ({dict_size / record_size:.1f}x smaller)")
+assert record_size * 3 < dict_size  # Slots instead of a hash table, interned repeating strings, no stored amount
+print("✅ Transaction records are dict-compatible and compact")
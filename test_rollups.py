@@ -0,0 +1,62 @@
+import contextlib
+import io
+import time
+from datetime import date
+from utils.file_handler import *
+from utils.data_processor import *
+
+transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+valid, _, _ = validate_and_filter_transactions(transactions)
+rollup = DateRollup.from_transactions(valid)
+
+def brute(start, end, region=None, product=None):
+    rows = [t for t in valid if start <= t.Date <= end
+            and region in (None, t.Region) and product in (None, t.Product_Name)]
+    return round(sum(t.amount for t in rows), 6), len(rows)
+
+# Range queries match a rescan, for all sales and per region / product
+for start, end in [('2024-12-01', '2024-12-31'), ('2024-12-05', '2024-12-12'), ('2024-12-07', '2024-12-07'),
+                   ('2024-11-01', '2024-12-02'), ('2024-12-20', '2025-01-31'), ('2025-01-01', '2025-02-01')]:
+    for region, product in [(None, None), ('North', None), (None, 'Mouse'), ('Nowhere', None)]:
+        totals = rollup.query(start, end, region, product)
+        assert (round(totals['revenue'], 6), totals['transaction_count']) == brute(start, end, region, product)
+assert rollup.query(date(2024, 12, 7), date(2024, 12, 7)) == rollup.query('2024-12-07', '2024-12-07')
+
+# Buckets partition the range; weekly totals add up to the whole
+weeks = rollup.buckets('week')
+print("Weeks:", list(weeks))
+assert list(weeks)[0] == '2024-W48' and sum(w['transaction_count'] for w in weeks.values()) == len(valid)
+assert list(rollup.buckets('month')) == ['2024-12']
+by_region = rollup.buckets('week', by='region')
+for label, stats in weeks.items():  # A region's buckets span its own first..last sale
+    assert sum(r[label]['transaction_count'] for r in by_region.values() if label in r) == stats['transaction_count']
+assert all(list(r) == list(weeks)[list(weeks).index(next(iter(r))):][:len(r)] for r in by_region.values())
+
+# Day buckets agree with daily_sales_trend; an aggregate gives the ungrouped rollup without a rescan
+with contextlib.redirect_stdout(io.StringIO()):
+    results = aggregate_transactions(valid)
+    daily = daily_sales_trend(results)
+    from_aggregate = sales_by_period(results, 'day')
+for day, stats in daily.items():
+    assert from_aggregate[day]['transaction_count'] == stats['transaction_count']
+try:
+    sales_by_period(results, 'week', by='region')
+    assert False, "an aggregate has no per-region days"
+except ValueError:
+    pass
+# One outlier date must not cost every group the whole span: groups keep only their own days
+rows = [Transaction(f"T{i}", f"2024-12-{1 + i % 28:02d}", "P1", f"Product {i % 1000}", 1, 10.5, "C1", "North")
+        for i in range(5000)]
+rows.append(Transaction("T9", "1900-01-01", "P1", "Product 0", 2, 1.25, "C1", "North"))
+start = time.perf_counter()
+wide = DateRollup.from_transactions(rows, by=('product',))
+by_product = wide.buckets('month', by='product')
+elapsed = time.perf_counter() - start
+assert wide.days > 45000 and elapsed < 5, f"rollup over an outlier date took {elapsed:.1f}s"
+assert sum(len(offsets) for (grouping, _), (offsets, _, _) in wide.series.items() if grouping) == 5001
+assert list(by_product['Product 1']) == ['2024-12'] and len(by_product['Product 0']) > 1400
+assert by_product['Product 0']['1900-01'] == {'revenue': 2.5, 'transaction_count': 1}
+assert wide.query('1900-01-01', '2024-12-31', product='Product 0') == {'revenue': 5 * 10.5 + 2.5, 'transaction_count': 6}
+assert wide.query('1950-01-01', '2024-12-01', product='Product 0')['transaction_count'] == 1
+assert wide.query('1901-01-01', '1902-01-01', product='Product 3')['transaction_count'] == 0
+print("✅ Date rollups answer ranges and buckets without rescanning")
@@ -0,0 +1,138 @@
+import contextlib
+import http.client
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from urllib.request import urlopen
+from utils.file_handler import *
+from utils.data_processor import *
+from utils.server import QUERIES, ResultCache, WarmDataset, AnalyticsService, create_server
+
+def run(func, data, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(data, **kwargs)
+
+def as_json(value):
+    return json.loads(json.dumps(value, default=sorted))
+
+# LRU cache evicts the least recently used entry
+cache = ResultCache(2)
+cache.put('a', 1)
+cache.put('b', 2)
+assert cache.get('a') == 1
+cache.put('c', 3)
+assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1}
+
+with tempfile.TemporaryDirectory() as tmp:
+    data_file = os.path.join(tmp, 'sales_data.txt')
+    shutil.copy('data/sales_data.txt', data_file)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transactions = parse_transactions(read_sales_data(data_file))
+        dataset = WarmDataset(data_file, catalog=lambda: {'1': {'title': 'x'}}).load()
+    service = AnalyticsService(dataset)
+    server = create_server(service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def get(path):
+        with urlopen(base + path) as response:
+            body = response.read().decode()
+            is_json = response.headers['Content-Type'] == 'application/json'
+            return response.headers, (json.loads(body) if is_json else body)
+
+    # Endpoints answer what data_processor gives for the same filters
+    for query, filters in [('', {}), ('region=North', {'region': 'North'}),
+                           ('min_amount=5000&max_amount=200000', {'min_amount': 5000, 'max_amount': 200000})]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            valid, _, summary = validate_and_filter_transactions(transactions, **filters)
+        for path, func, kwargs in [
+            ('revenue', calculate_total_revenue, {}), ('regions', region_wise_sales, {}),
+            ('products?n=3', top_selling_products, {'n': 3}), ('customers?top=2', customer_analysis, {'top': 2}),
+            ('daily', daily_sales_trend, {}), ('peak', find_peak_sales_day, {}),
+            ('low-performers?threshold=10', low_performing_products, {'threshold': 10}),
+            ('periods?by=region&granularity=month', sales_by_period, {'by': 'region', 'granularity': 'month'}),
+            ('range?start=2024-12-05&end=2024-12-20&product=Laptop', sales_in_range,
+             {'start': '2024-12-05', 'end': '2024-12-20', 'product': 'Laptop'}),
+        ]:
+            sep = '&' if '?' in path else '?'
+            headers, body = get(f"/{path}{sep}{query}" if query else f"/{path}")
+            assert body['result'] == as_json(run(func, valid, **kwargs)), (path, query)
+            assert headers['X-Cache'] == 'miss' and float(headers['X-Elapsed-Ms']) >= 0
+        assert get(f"/summary?{query}")[1]['result'] == summary
+
+    # The cache keeps computed results, not the rows behind each slice
+    assert not any(isinstance(value, dict) and 'valid' in value for value in service.cache._entries.values())
+
+    # A quiet computation only silences its own thread: output from other threads still gets through
+    started, release = threading.Event(), threading.Event()
+    QUERIES['probe'] = (lambda p: {}, lambda s: (print("from the request"), started.set(), release.wait(5), 'ok')[-1])
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        worker = threading.Thread(target=service.query, args=('probe', {}))
+        worker.start()
+        started.wait(5)
+        print("from elsewhere")
+        release.set()
+        worker.join()
+    del QUERIES['probe']
+    assert out.getvalue() == "from elsewhere\n"
+
+    # Warm repeats come from the cache, in milliseconds
+    headers, body = get('/regions?region=North')
+    assert body['cached'] and headers['X-Cache'] == 'hit'
+    start = time.perf_counter()
+    for _ in range(20):
+        get('/customers?top=2')
+    warm_ms = (time.perf_counter() - start) * 1000 / 20
+    assert warm_ms < 50, f"warm query took {warm_ms:.1f} ms"
+
+    # Reports come back as text with just the requested sections
+    headers, text = get('/report?region=North&sections=summary,regions,enrichment')
+    assert text.startswith('SALES ANALYTICS REPORT') and 'REGION-WISE PERFORMANCE' in text
+    assert 'API ENRICHMENT SUMMARY' in text and 'TOP 5 PRODUCTS' not in text
+    assert headers['Content-Type'].startswith('text/plain')
+
+    # Bad parameters and unknown queries are client errors
+    for path, status in [('/products?n=x', 400), ('/periods?by=city', 400), ('/report?sections=bogus', 400),
+                         ('/nothing', 404)]:
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        connection.request('GET', path)
+        response = connection.getresponse()
+        assert response.status == status, (path, response.status)
+        assert 'error' in json.loads(response.read())
+        connection.close()
+
+    # Rewriting the source reloads the dataset and drops cached results
+    before = get('/revenue')[1]['result']
+    with open(data_file, 'a') as f:
+        f.write("T999|2024-12-31|P101|Laptop|1|1000|C001|North\n")
+    with contextlib.redirect_stdout(io.StringIO()):
+        headers, body = get('/revenue')
+    assert not body['cached'] and body['result'] == before + 1000
+    status = get('/status')[1]
+    assert status['reloads'] == 1 and status['dataset']['version'] == 2
+    assert status['cache']['size'] == 2 and status['dataset']['transactions'] == len(transactions) + 1
+    server.shutdown()
+    server.server_close()
+
+    # Same service over a Unix socket
+    if hasattr(socket, 'AF_UNIX'):
+        socket_path = os.path.join(tmp, 'sales.sock')
+        server = create_server(service, socket_path=socket_path, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+        client.sendall(b"GET /revenue HTTP/1.0\r\n\r\n")
+        reply = b''.join(iter(lambda: client.recv(65536), b''))
+        client.close()
+        assert reply.startswith(b'HTTP/1.0 200') and b'X-Cache: hit' in reply
+        assert json.loads(reply.split(b'\r\n\r\n', 1)[1])['result'] == before + 1000
+        server.shutdown()
+        server.server_close()
+
+print(f"✅ Analytics server test passed (warm query {warm_ms:.2f} ms)")
@@ -0,0 +1,92 @@
+import contextlib
+import io
+import pickle
+import random
+import tracemalloc
+from utils.file_handler import *
+from utils.data_processor import *
+from utils.sketches import HyperLogLog, SpaceSaving, exact_limit, precision_for_error
+
+# HyperLogLog stays within a few standard errors, sparse and dense alike
+for n in (10, 1000, 200000):
+    hll = HyperLogLog(error=0.01)
+    for i in range(n):
+        hll.add(f"C{i}")
+    print(f"HLL {n}: {len(hll)}")
+    assert abs(len(hll) - n) <= max(1, 0.04 * n)
+
+# Merging partitions equals sketching the whole stream
+left, right, whole = (HyperLogLog(error=0.02) for _ in range(3))
+for i in range(50000):
+    (left if i % 3 else right).add(f"C{i % 30000}")
+    whole.add(f"C{i % 30000}")
+left |= pickle.loads(pickle.dumps(right))
+assert left.registers == whole.registers
+
+# Space-saving keeps every heavy item, with true weight in [count - error, count]
+rng = random.Random(7)
+stream = [f"P{min(int(rng.paretovariate(1.2)), 5000)}" for _ in range(20000)]
+true_counts = {}
+for item in stream:
+    true_counts[item] = true_counts.get(item, 0) + 1
+halves = SpaceSaving(50), SpaceSaving(50)
+for i, item in enumerate(stream):
+    halves[i % 2].add(item)
+summary = halves[0].merge(halves[1])
+for item, count, error in summary.top():
+    assert count - error <= true_counts[item] <= count
+for item, weight in true_counts.items():
+    if weight > len(stream) / 50:
+        assert item in summary.counts
+
+# Sketch mode is opt-in; sums and counts stay exact, distinct counts are close
+transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+with contextlib.redirect_stdout(io.StringIO()):
+    exact = aggregate_transactions(transactions)
+    sketched = aggregate_transactions(transactions, distinct_error=0.01)
+    daily = daily_sales_trend(sketched)
+    heavy = heavy_hitter_products(sketched, n=3)
+    customers = customer_analysis(sketched)
+assert exact.distinct_error is None and exact.heavy_products is None
+assert sketched.total_revenue == exact.total_revenue
+for date, stats in daily.items():
+    assert abs(stats['unique_customers'] - len(exact.daily[date]['unique_customers'])) <= 1
+assert [p for p, _, _ in heavy] == [p for p, _, _ in top_selling_products(exact, n=3)]
+assert customers == customer_analysis(exact)  # Small groups stay exact sets
+
+# Groups switch to a dense sketch only once their set would be larger; merged alike
+precision = precision_for_error(0.01)
+limit = exact_limit(precision)
+rows = [Transaction(f"T{i}", f"2024-12-{1 + i % 2:02d}", 'P101', 'Laptop', 1, 10.0, f"C{i}", 'North')
+        for i in range(3 * limit)]
+with contextlib.redirect_stdout(io.StringIO()):
+    big = aggregate_transactions(rows, distinct_error=0.01)
+    parts = SalesAggregate(distinct_error=0.01).update(rows[:limit]).merge(
+        SalesAggregate(distinct_error=0.01).update(rows[limit:]))
+for aggregate in (big, parts):
+    assert isinstance(aggregate.daily['2024-12-01']['unique_customers'], HyperLogLog)
+    assert all(isinstance(stats['products'], set) for stats in aggregate.customers.values())
+    assert abs(len(aggregate.products['Laptop']['unique_customers']) - 3 * limit) <= 0.04 * 3 * limit
+assert big.daily['2024-12-01']['unique_customers'].registers == parts.daily['2024-12-01']['unique_customers'].registers
+small = SalesAggregate(distinct_error=0.01).update(rows[:limit // 2])
+assert small.daily['2024-12-01']['unique_customers'] == {f"C{i}" for i in range(0, limit // 2, 2)}
+names = [f"C{i}" for i in range(limit)]  # Rows share their strings; only the set is extra
+tracemalloc.start()
+values = set(names)
+set_size = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(f"Exact set of {limit}: {set_size} bytes, dense sketch: {1 << precision} bytes")
+assert set_size <= 1 << precision
+
+# Partial sketch aggregates merge like exact ones
+half = len(transactions) // 2
+merged = SalesAggregate(distinct_error=0.01).update(transactions[:half])
+merged.merge(SalesAggregate(distinct_error=0.01).update(transactions[half:]))
+for date, stats in sketched.daily.items():
+    assert len(merged.daily[date]['unique_customers']) == len(stats['unique_customers'])
+try:
+    merged.merge(exact)
+    assert False, "mixed modes must not merge"
+except ValueError:
+    pass
+print("✅ Sketches are accurate and mergeable")
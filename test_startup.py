@@ -0,0 +1,37 @@
+import importlib
+import os
+import subprocess
+import sys
+
+def imported_after(code):
+    """Top-level package names in sys.modules after running code in a fresh interpreter"""
+    script = code + "\nimport sys\nprint(' '.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return set(completed.stdout.split())
+
+# Entry points leave the slow optional dependencies unimported until first use
+HEAVY = {'requests', 'urllib3', 'numpy', 'pyarrow', 'multiprocessing', 'sqlite3'}
+for code in ['import main',
+             'from utils.file_handler import *\nfrom utils.data_processor import *',
+             'from utils.data_processor import *\ncalculate_total_revenue([])',
+             'from utils.catalog_cache import get_product_mapping\nfrom utils.api_handler import enrich_to_file']:
+    loaded = imported_after(code) & HEAVY
+    assert not loaded, f"{code!r} imported {sorted(loaded)}"
+
+# ... and are imported once a run needs them
+modules = imported_after(
+    "from utils.api_handler import create_session\ncreate_session()\n"
+    "from utils.columnar import has_numpy, load_numpy\nassert has_numpy() == (load_numpy() is not None)"
+)
+assert 'requests' in modules
+assert 'sqlite3' in imported_after("from utils.data_processor import SalesDatabase")
+
+# Every utils module declares its exports, and they all exist
+for filename in sorted(os.listdir('utils')):
+    if filename.endswith('.py'):
+        module = importlib.import_module(f"utils.{filename[:-3]}")
+        assert hasattr(module, '__all__'), f"{filename} has no __all__"
+        missing = [name for name in module.__all__ if not hasattr(module, name)]
+        assert not missing, f"{filename} exports missing names {missing}"
+
+print("✅ Startup import test passed")
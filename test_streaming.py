@@ -0,0 +1,15 @@
+from utils.file_handler import *
+
+# Streaming reader must match the list-based path
+raw_lines = read_sales_data('data/sales_data.txt')
+transactions = parse_transactions(raw_lines)
+
+streamed = list(stream_transactions('data/sales_data.txt'))
+print("Streamed:", len(streamed))
+assert streamed == transactions
+
+batches = list(stream_transactions('data/sales_data.txt', batch_size=25))
+print("Batch sizes:", [len(b) for b in batches])
+assert [t for b in batches for t in b] == transactions
+
+print("✅ Streaming matches list-based parsing")
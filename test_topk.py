@@ -0,0 +1,26 @@
+import contextlib
+import io
+import random
+from utils.file_handler import *
+from utils.data_processor import *
+
+# Bounded heaps must give exactly what a full sort gives, ties included
+rng = random.Random(3)
+items = [(f"item{i}", rng.randint(0, 20)) for i in range(2000)]
+for k in (0, 1, 5, 50, 5000):
+    expected = sorted(items, key=lambda x: x[1], reverse=True)[:k]
+    assert top_n(items, k, key=lambda x: x[1]) == expected
+    assert TopK(k, key=lambda x: x[1]).update(iter(items)).result() == expected
+
+transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+largest = top_transactions(iter(transactions), n=3)
+print("Largest transactions:", [(t.Transaction_ID, t.amount) for t in largest])
+assert largest == sorted(transactions, key=lambda t: t.amount, reverse=True)[:3]
+
+# customer_analysis(top=n) is the head of the full ranking
+with contextlib.redirect_stdout(io.StringIO()):
+    results = aggregate_transactions(transactions)
+    full = customer_analysis(results)
+    top3 = customer_analysis(results, top=3)
+assert list(top3.items()) == list(full.items())[:3]
+print("✅ Top-N heaps match full sorts")
@@ -0,0 +1,258 @@
+# utils/aggregator.py
+
+from collections import defaultdict
+from fractions import Fraction
+from math import isfinite
+
+from utils import metrics
+from utils.file_handler import Transaction
+
+__all__ = [
+    'SalesAggregate', 'aggregate_transactions', 'as_aggregate', 'to_units', 'from_units', 'SECTIONS', 'REVENUE_FIELDS',
+    'HEAVY_HITTERS', 'BACKENDS'
+]
+
+SECTIONS = ('regions', 'products', 'customers', 'daily')
+REVENUE_FIELDS = {'regions': 'total_sales', 'products': 'total_revenue', 'customers': 'total_spent', 'daily': 'revenue'}
+HEAVY_HITTERS = 100  # products tracked by the sketch-mode heavy-hitter summary
+
+EXACT_SCALE = 2 ** 64  # revenue is summed exactly, in units of 2**-64
+_SCALE = float(EXACT_SCALE)
+
+def to_units(amount):
+    """
+    Amount as an exact int number of 2**-64 units (a Fraction for the rare
+    finer amounts); NaN/inf pass through and poison the sums like floats do.
+    """
+    if not isfinite(amount):
+        return amount
+    units = Fraction(amount) * EXACT_SCALE
+    return units.numerator if units.denominator == 1 else units
+
+def from_units(units):
+    """Exact revenue sum back to the nearest float"""
+    return float(units / EXACT_SCALE)
+
+class SalesAggregate:
+    """
+    Running totals behind every data_processor analysis.
+    Filled in a single pass, so it works on lists and on streams alike.
+    sections limits which groupings are kept (totals are always kept).
+
+    distinct_error switches on sketch mode: unique customers per date and
+    products per customer become HyperLogLog sketches with that relative
+    standard error (len() gives the estimate) once a group is large enough
+    for the sketch to be smaller than its set (see add_distinct), regions and
+    products also get approximate 'unique_customers', and heavy_products keeps
+    a space-saving summary of the top products by quantity. The default (None) is exact.
+
+    Revenue is summed exactly (total_units, units[section][key], see
+    to_units) and the float totals are those sums rounded once, so totals
+    don't depend on how rows were chunked and merged: parallel runs match a
+    single pass exactly.
+    """
+    
+    def __init__(self, sections=SECTIONS, distinct_error=None, heavy_hitters=HEAVY_HITTERS):
+        self.sections = tuple(sections)
+        self.distinct_error = distinct_error
+        self.heavy_products = None
+        if distinct_error:
+            from utils.sketches import SpaceSaving  # Sketches are imported for sketch mode only
+            self.heavy_products = SpaceSaving(heavy_hitters)
+        self.total_revenue = 0
+        self.total_units = 0
+        self.transaction_count = 0
+        self.units = {section: {} for section in SECTIONS}  # section -> key -> exact revenue (to_units)
+        self.regions = {}    # region -> {'total_sales', 'transaction_count'}
+        self.products = {}   # product name -> {'total_qty', 'total_revenue'}
+        self.customers = {}  # customer id -> {'total_spent', 'purchase_count', 'products'}
+        self.daily = {}      # date -> {'revenue', 'transaction_count', 'unique_customers'}
+    
+    def _precision(self):
+        """HyperLogLog precision for distinct_error (sketch mode)"""
+        from utils.sketches import precision_for_error
+        return precision_for_error(self.distinct_error)
+    
+    def _merge_distinct(self, stats, key, other):
+        """Union other's distinct values for stats[key] into ours (a set, or see merge_distinct)"""
+        if self.distinct_error is None:
+            stats.setdefault(key, set()).update(other)
+        else:
+            from utils.sketches import merge_distinct
+            stats[key] = merge_distinct(stats.get(key), other, self._precision())
+    
+    def add_units(self, section, units):
+        """Add exact revenue per key (keys already in the section) and refresh their float totals"""
+        groups = getattr(self, section)
+        sums = self.units[section]
+        field = REVENUE_FIELDS[section]
+        for key, value in units.items():
+            value = sums[key] = sums.get(key, 0) + value
+            groups[key][field] = from_units(value)
+    
+    def add_total_units(self, units):
+        self.total_units += units
+        self.total_revenue = from_units(self.total_units)
+    
+    def add(self, t):
+        """Add a single transaction"""
+        self.update((t,))
+        return self
+    
+    def update(self, transactions):
+        """Add every transaction from any iterable (list, generator, stream)"""
+        regions = self.regions
+        products = self.products
+        customers = self.customers
+        daily = self.daily
+        do_regions, do_products, do_customers, do_daily = (section in self.sections for section in SECTIONS)
+        sketching = self.distinct_error is not None
+        if sketching:
+            from utils.sketches import add_distinct
+            precision = self._precision()
+        heavy = self.heavy_products
+        region_units, product_units, customer_units, daily_units = (defaultdict(int) for _ in SECTIONS)
+        scale = _SCALE
+        total = 0
+        count = 0
+        
+        for t in transactions:
+            if t.__class__ is not Transaction:
+                t = Transaction.from_mapping(t)
+            qty = t.Quantity
+            amount = qty * t.Unit_Price
+            scaled = amount * scale  # Exact: a power-of-two scale only moves the exponent
+            units = int(scaled) if scaled.is_integer() else to_units(amount)
+            total += units
+            count += 1
+            
+            if do_regions:
+                stats = regions.get(t.Region)
+                if stats is None:
+                    stats = regions[t.Region] = {'total_sales': 0, 'transaction_count': 0}
+                    if sketching:
+                        stats['unique_customers'] = set()
+                region_units[t.Region] += units
+                stats['transaction_count'] += 1
+                if sketching:
+                    add_distinct(stats, 'unique_customers', t.Customer_ID, precision)
+            
+            if do_products:
+                stats = products.get(t.Product_Name)
+                if stats is None:
+                    stats = products[t.Product_Name] = {'total_qty': 0, 'total_revenue': 0}
+                    if sketching:
+                        stats['unique_customers'] = set()
+                stats['total_qty'] += qty
+                product_units[t.Product_Name] += units
+                if sketching:
+                    add_distinct(stats, 'unique_customers', t.Customer_ID, precision)
+            
+            if do_customers:
+                stats = customers.get(t.Customer_ID)
+                if stats is None:
+                    stats = customers[t.Customer_ID] = {'total_spent': 0, 'purchase_count': 0, 'products': set()}
+                customer_units[t.Customer_ID] += units
+                stats['purchase_count'] += 1
+                if sketching:
+                    add_distinct(stats, 'products', t.Product_Name, precision)
+                else:
+                    stats['products'].add(t.Product_Name)
+            
+            if do_daily:
+                stats = daily.get(t.Date)
+                if stats is None:
+                    stats = daily[t.Date] = {'revenue': 0, 'transaction_count': 0, 'unique_customers': set()}
+                daily_units[t.Date] += units
+                stats['transaction_count'] += 1
+                if sketching:
+                    add_distinct(stats, 'unique_customers', t.Customer_ID, precision)
+                else:
+                    stats['unique_customers'].add(t.Customer_ID)
+            
+            if heavy is not None:
+                heavy.add(t.Product_Name, qty)
+        
+        if count:
+            self.add_total_units(total)
+            self.transaction_count += count
+        for section, units in zip(SECTIONS, (region_units, product_units, customer_units, daily_units)):
+            self.add_units(section, units)
+        return self
+    
+    def merge(self, other):
+        """
+        Fold another aggregate (e.g. from a later chunk) into this one.
+        Merging partials in input order keeps first-seen key order, so sorted
+        output matches a single sequential pass.
+        Both aggregates must use the same mode (exact or the same distinct_error).
+        """
+        if other.distinct_error != self.distinct_error:
+            raise ValueError(f"Cannot merge aggregates with distinct_error {other.distinct_error} and {self.distinct_error}")
+        if other.transaction_count:
+            self.add_total_units(other.total_units)
+            self.transaction_count += other.transaction_count
+        
+        for region, theirs in other.regions.items():
+            stats = self.regions.setdefault(region, {'total_sales': 0, 'transaction_count': 0})
+            stats['transaction_count'] += theirs['transaction_count']
+            if 'unique_customers' in theirs:
+                self._merge_distinct(stats, 'unique_customers', theirs['unique_customers'])
+        
+        for product, theirs in other.products.items():
+            stats = self.products.setdefault(product, {'total_qty': 0, 'total_revenue': 0})
+            stats['total_qty'] += theirs['total_qty']
+            if 'unique_customers' in theirs:
+                self._merge_distinct(stats, 'unique_customers', theirs['unique_customers'])
+        
+        for customer, theirs in other.customers.items():
+            stats = self.customers.setdefault(customer, {'total_spent': 0, 'purchase_count': 0})
+            stats['purchase_count'] += theirs['purchase_count']
+            self._merge_distinct(stats, 'products', theirs['products'])
+        
+        for date, theirs in other.daily.items():
+            stats = self.daily.setdefault(date, {'revenue': 0, 'transaction_count': 0})
+            stats['transaction_count'] += theirs['transaction_count']
+            self._merge_distinct(stats, 'unique_customers', theirs['unique_customers'])
+        
+        for section, units in other.units.items():
+            self.add_units(section, units)
+        
+        if self.heavy_products is not None:
+            self.heavy_products.merge(other.heavy_products)
+        
+        return self
+
+BACKENDS = ('python', 'numpy')
+
+@metrics.instrumented()
+def aggregate_transactions(transactions, backend='python', distinct_error=None):
+    """
+    Build a SalesAggregate from transactions in one pass.
+    backend='numpy' loads a ColumnarTransactions store and aggregates it vectorized.
+    distinct_error turns on sketch mode (see SalesAggregate; python backend only).
+    """
+    if distinct_error is not None and backend != 'python':
+        raise ValueError("Sketch mode (distinct_error) needs the python backend")
+    if backend == 'numpy':
+        from utils.columnar import ColumnarTransactions
+        if not isinstance(transactions, ColumnarTransactions):
+            transactions = ColumnarTransactions.from_transactions(transactions)
+        return transactions.aggregate()
+    if backend != 'python':
+        raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKENDS)})")
+    return SalesAggregate(distinct_error=distinct_error).update(transactions)
+
+def as_aggregate(data, sections=SECTIONS):
+    """
+    Return data unchanged if already aggregated, otherwise aggregate it.
+    Plain transaction lists only get the sections the caller needs.
+    """
+    if isinstance(data, SalesAggregate):
+        missing = set(sections) - set(data.sections)
+        if missing:
+            raise ValueError(f"Aggregate was built without: {', '.join(sorted(missing))}")
+        return data
+    if hasattr(data, 'aggregate'):  # ColumnarTransactions
+        return data.aggregate()
+    return SalesAggregate(sections).update(data)
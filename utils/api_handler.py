@@ -1,17 +1,117 @@
 # utils/api_handler.py
-import requests # type: ignore
 import os
+import random
 import re
+import time
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
 
-def fetch_all_products():
-    """Fetch all products from DummyJSON API"""
+from utils.enriched_writer import EnrichedDataWriter, WRITE_BATCH_SIZE
+from utils import metrics
+
+__all__ = [
+    'create_session', 'fetch_product_page', 'iter_product_pages', 'iter_products', 'fetch_all_products',
+    'create_product_mapping', 'extract_numeric_id', 'EnrichedRow', 'new_enrichment_stats',
+    'enrichment_stats_for', 'merge_enrichment_stats', 'iter_enriched', 'log_enrichment_stats',
+    'enrich_sales_data', 'enrich_to_file', 'save_enriched_data', 'PRODUCTS_URL', 'PAGE_SIZE', 'MAX_WORKERS',
+    'MAX_RETRIES', 'BACKOFF_BASE', 'RETRY_STATUSES', 'CANCEL_POLL', 'NO_MATCH', 'ENRICH_MODES'
+]
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+PAGE_SIZE = 100
+MAX_WORKERS = 8      # concurrent page requests
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5   # seconds, doubled per retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CANCEL_POLL = 0.1    # seconds between checks of a fetch's cancel event
+
+def create_session(pool_size=MAX_WORKERS):
+    """HTTP session with a connection pool sized for concurrent page fetches"""
+    import requests  # type: ignore  # Imported on first use: slow to import, and most runs never fetch
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_product_page(session, url=PRODUCTS_URL, skip=0, limit=PAGE_SIZE, headers=None,
+                       retries=MAX_RETRIES, backoff=BACKOFF_BASE, timeout=10, cancel=None):
+    """
+    GET one page of products, retrying connection errors and 429/5xx responses
+    with jittered exponential backoff. Returns the Response (a 304 is returned as-is).
+    Setting the cancel event stops the retries with CancelledError.
+    """
+    import requests  # type: ignore
+    for attempt in range(retries + 1):
+        if cancel is not None and cancel.is_set():
+            raise CancelledError("Product fetch cancelled")
+        try:
+            response = session.get(url, params={'limit': limit, 'skip': skip}, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            error = requests.exceptions.HTTPError(f"{response.status_code} for {response.url}", response=response)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        if attempt < retries:
+            delay = random.uniform(0, backoff * 2 ** attempt)  # Full jitter
+            if cancel is None:
+                time.sleep(delay)
+            else:
+                cancel.wait(delay)
+    raise error
+
+def iter_product_pages(url=PRODUCTS_URL, page_size=PAGE_SIZE, max_workers=MAX_WORKERS,
+                       retries=MAX_RETRIES, session=None, first_page=None, cancel=None):
+    """
+    Yield lists of products page by page as they arrive.
+    The first page's total tells how many pages remain; those are fetched
+    concurrently over one pooled session. Setting the cancel event stops the
+    fetch with CancelledError: queued pages are dropped and only requests
+    already in flight are waited for.
+    """
+    session = session or create_session(max_workers)
+    if first_page is None:
+        first_page = fetch_product_page(session, url, 0, page_size, retries=retries, cancel=cancel).json()
+
+    products = first_page['products']
+    yield products
+
+    total = first_page.get('total', len(products))
+    stride = len(products)  # The API may cap the page size below what we asked for
+    if not stride or stride >= total:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(fetch_product_page, session, url, skip, stride, retries=retries, cancel=cancel)
+            for skip in range(stride, total, stride)
+        ]
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=CANCEL_POLL if cancel is not None else None,
+                                     return_when=FIRST_COMPLETED)
+                if cancel is not None and cancel.is_set():
+                    raise CancelledError("Product fetch cancelled")
+                for future in done:
+                    yield future.result().json()['products']
+        finally:
+            for future in futures:
+                future.cancel()
+
+def iter_products(url=PRODUCTS_URL, **options):
+    """Yield every product across all pages (streaming)"""
+    for page in iter_product_pages(url, **options):
+        yield from page
+
+@metrics.instrumented()
+def fetch_all_products(url=PRODUCTS_URL, page_size=PAGE_SIZE, max_workers=MAX_WORKERS):
+    """Fetch all products from DummyJSON API (every page, fetched concurrently)"""
+    import requests  # type: ignore
     try:
-        url = "https://dummyjson.com/products?limit=100"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        products = data['products']
+        products = list(iter_products(url, page_size=page_size, max_workers=max_workers))
         print(f"Fetched {len(products)} products from API")
         return products
         
@@ -22,6 +122,7 @@ def fetch_all_products():
         print(f"Unexpected error: {e}")
         return []
 
+@metrics.instrumented()
 def create_product_mapping(api_products):
     """Create dict mapping numeric product ID to product info"""
     mapping = {}
@@ -42,64 +143,182 @@ def extract_numeric_id(product_id):
     match = re.search(r'(\d+)', product_id)
     return match.group(1) if match else None
 
-def enrich_sales_data(transactions, product_mapping):
-    """Add API data to transactions, save enriched to data/enriched_sales_data.txt"""
-    enriched = []
+NO_MATCH = {'API_Category': None, 'API_Brand': None, 'API_Rating': None, 'API_Match': False}
+ENRICH_MODES = ('copy', 'in_place', 'view')
+
+class EnrichedRow(Mapping):
+    """Read-only view of a transaction plus its API fields – nothing is copied"""
+    __slots__ = ('row', 'api')
     
-    for t in transactions:
-        enriched_t = t.copy()
-        numeric_id = extract_numeric_id(t['Product_ID'])
-        
-        if numeric_id and numeric_id in product_mapping:
-            api_data = product_mapping[numeric_id]
-            enriched_t.update({
-                'API_Category': api_data['category'],
-                'API_Brand': api_data['brand'],
-                'API_Rating': api_data['rating'],
-                'API_Match': True
-            })
-            print(f"✅ Enriched {t['Product_ID']} → {api_data['title']}")
+    def __init__(self, row, api):
+        self.row = row
+        self.api = api
+    
+    def __getitem__(self, key):
+        if key in self.api:
+            return self.api[key]
+        return self.row[key]
+    
+    def __iter__(self):
+        yield from self.row
+        yield from (key for key in self.api if key not in self.row)
+    
+    def __len__(self):
+        return len(self.row) + sum(1 for key in self.api if key not in self.row)
+    
+    def copy(self):
+        return {**self.row, **self.api}
+    
+    def __repr__(self):
+        return f"EnrichedRow({self.copy()!r})"
+
+def new_enrichment_stats():
+    """Counters filled by iter_enriched: rows seen, rows matched, unmatched Product_IDs"""
+    return {'total': 0, 'matched': 0, 'unmatched_ids': Counter()}
+
+def enrichment_stats_for(product_counts, product_mapping):
+    """
+    The stats iter_enriched would produce, from rows counted per Product_ID
+    (e.g. while aggregating) – so match rates need no second pass over the rows.
+    """
+    stats = new_enrichment_stats()
+    for product_id, count in product_counts.items():
+        numeric_id = extract_numeric_id(product_id)
+        stats['total'] += count
+        if numeric_id and product_mapping.get(numeric_id) is not None:
+            stats['matched'] += count
         else:
-            enriched_t.update({
-                'API_Category': None,
-                'API_Brand': None,
-                'API_Rating': None,
-                'API_Match': False
-            })
-            print(f"❌ No match for {t['Product_ID']}")
-        
-        enriched.append(enriched_t)
+            stats['unmatched_ids'][product_id] += count
+    return stats
+
+def merge_enrichment_stats(stats, other):
+    """Add the counters of other (e.g. from another chunk) into stats"""
+    stats['total'] += other['total']
+    stats['matched'] += other['matched']
+    stats['unmatched_ids'].update(other['unmatched_ids'])
+    return stats
+
+def iter_enriched(transactions, product_mapping, mode='copy', stats=None, verbose=False):
+    """
+    Yield enriched transactions one at a time (streaming).
+    The Product_ID → numeric id → catalog lookup runs once per distinct Product_ID.
+    mode: 'copy' returns new dicts, 'in_place' updates dict rows in place (immutable
+    Transaction records get their fields through an EnrichedRow instead), 'view' wraps
+    each row in a read-only EnrichedRow that shares the per-product API fields.
+    Match counts are accumulated in the same pass into stats (see new_enrichment_stats).
+    """
+    if mode not in ENRICH_MODES:
+        raise ValueError(f"Unknown enrichment mode: {mode} (choose from {', '.join(ENRICH_MODES)})")
+    if stats is None:
+        stats = new_enrichment_stats()
+    
+    lookup = {}  # Product_ID -> (api fields, title or None)
+    unmatched_ids = stats['unmatched_ids']
+    total = matched = 0
     
-    # Save to file
+    try:
+        for t in transactions:
+            product_id = t['Product_ID']
+            cached = lookup.get(product_id)
+            if cached is None:
+                numeric_id = extract_numeric_id(product_id)
+                api_data = product_mapping.get(numeric_id) if numeric_id else None
+                if api_data is not None:
+                    cached = ({
+                        'API_Category': api_data['category'],
+                        'API_Brand': api_data['brand'],
+                        'API_Rating': api_data['rating'],
+                        'API_Match': True
+                    }, api_data['title'])
+                else:
+                    cached = (NO_MATCH, None)
+                lookup[product_id] = cached
+            
+            api_fields, title = cached
+            total += 1
+            if title is not None:
+                matched += 1
+            else:
+                unmatched_ids[product_id] += 1
+            if verbose:
+                print(f"✅ Enriched {product_id} → {title}" if title is not None else f"❌ No match for {product_id}")
+            
+            if mode == 'copy':
+                yield {**t, **api_fields}
+            elif mode == 'in_place' and isinstance(t, dict):
+                t.update(api_fields)
+                yield t
+            else:
+                yield EnrichedRow(t, api_fields)
+    finally:
+        stats['total'] += total
+        stats['matched'] += matched
+
+def log_enrichment_stats(stats):
+    """One-line summary of an enrichment run (replaces per-row output)"""
+    total, matched = stats['total'], stats['matched']
+    success_rate = matched / total * 100 if total else 0
+    print(f"Enriched {total} transactions ({success_rate:.1f}% success)")
+    unmatched_ids = stats['unmatched_ids']
+    if unmatched_ids:
+        sample = ', '.join(product_id for product_id, _ in unmatched_ids.most_common(5))
+        more = f" (+{len(unmatched_ids) - 5} more)" if len(unmatched_ids) > 5 else ""
+        print(f"No catalog match for {total - matched} rows across {len(unmatched_ids)} Product_IDs: {sample}{more}")
+
+@metrics.instrumented()
+def enrich_sales_data(transactions, product_mapping, verbose=True, mode='copy', stats=None):
+    """
+    Add API data to transactions, save enriched to data/enriched_sales_data.txt.
+    Rows come back as new dicts; mode='view' returns EnrichedRow views instead,
+    which share one dict of API fields per product rather than copying it onto every row.
+    verbose=False skips the per-row lines and logs aggregated counters once.
+    """
+    if stats is None:
+        stats = new_enrichment_stats()
+    enriched = []
+    
+    # Save to file as rows are enriched
     os.makedirs('data', exist_ok=True)
-    save_enriched_data(enriched, 'data/enriched_sales_data.txt')
+    with EnrichedDataWriter('data/enriched_sales_data.txt') as writer:
+        for enriched_t in iter_enriched(transactions, product_mapping, mode, stats, verbose):
+            enriched.append(enriched_t)
+            writer.write(enriched_t)
+    print("Saved enriched data to data/enriched_sales_data.txt")
     
-    success_rate = sum(1 for t in enriched if t['API_Match']) / len(enriched) * 100
-    print(f"Enriched {len(enriched)} transactions ({success_rate:.1f}% success)")
+    if verbose:
+        success_rate = stats['matched'] / len(enriched) * 100 if enriched else 0
+        print(f"Enriched {len(enriched)} transactions ({success_rate:.1f}% success)")
+    else:
+        log_enrichment_stats(stats)
     
     return enriched
 
-def save_enriched_data(enriched_transactions, filename):
-    """Save enriched data as pipe-delimited file"""
-    header = "Transaction_ID|Date|Product_ID|Product_Name|Quantity|Unit_Price|Customer_ID|Region|API_Category|API_Brand|API_Rating|API_Match"
+@metrics.instrumented()
+def enrich_to_file(transactions, product_mapping, filename='data/enriched_sales_data.txt',
+                   format=None, batch_size=WRITE_BATCH_SIZE, stats=None):
+    """
+    Streaming enrichment: rows go from the input iterable straight to the
+    batched writer, so no enriched list is ever held. Returns the match stats.
+    format is 'text', 'npz' or 'parquet' (default: from the file extension).
+    """
+    if stats is None:
+        stats = new_enrichment_stats()
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    with EnrichedDataWriter(filename, format, batch_size) as writer:
+        writer.write_many(iter_enriched(transactions, product_mapping, 'view', stats))
     
-    with open(filename, 'w') as f:
-        f.write(header + '\n')
-        for t in enriched_transactions:
-            line = '|'.join([
-                str(t.get('Transaction_ID', '')),
-                str(t.get('Date', '')),
-                str(t.get('Product_ID', '')),
-                str(t.get('Product_Name', '')),
-                str(t.get('Quantity', '')),
-                str(t.get('Unit_Price', '')),
-                str(t.get('Customer_ID', '')),
-                str(t.get('Region', '')),
-                str(t.get('API_Category', '')),
-                str(t.get('API_Brand', '')),
-                str(t.get('API_Rating', '')),
-                str(t.get('API_Match', ''))
-            ])
-            f.write(line + '\n')
+    print(f"Saved enriched data to {filename}")
+    log_enrichment_stats(stats)
+    metrics.record_rows(rows_out=stats['total'])
+    return stats
+
+@metrics.instrumented()
+def save_enriched_data(enriched_transactions, filename, format=None):
+    """Save enriched data as pipe-delimited file (or npz/parquet, see EnrichedDataWriter)"""
+    with EnrichedDataWriter(filename, format) as writer:
+        writer.write_many(enriched_transactions)
     
     print(f"Saved enriched data to {filename}")
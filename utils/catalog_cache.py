@@ -0,0 +1,119 @@
+# utils/catalog_cache.py
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from utils import metrics
+from utils.api_handler import (
+    PRODUCTS_URL, MAX_WORKERS, create_product_mapping, create_session, fetch_product_page, iter_product_pages
+)
+
+__all__ = [
+    'load_catalog_snapshot', 'save_catalog_snapshot', 'refresh_catalog', 'get_product_mapping', 'CACHE_FILE',
+    'DEFAULT_TTL'
+]
+
+CACHE_FILE = 'data/product_catalog.json.gz'
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+
+def load_catalog_snapshot(cache_file=CACHE_FILE):
+    """Load the cached catalog snapshot, or None if missing/corrupt"""
+    try:
+        with gzip.open(cache_file, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if 'mapping' not in snapshot or 'fetched_at' not in snapshot:
+            return None
+        return snapshot
+    except (OSError, ValueError, EOFError):
+        return None
+
+def save_catalog_snapshot(snapshot, cache_file=CACHE_FILE):
+    """Write the snapshot atomically as gzip-compressed JSON"""
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(tmp_file, cache_file)
+
+def refresh_catalog(url=PRODUCTS_URL, cache_file=CACHE_FILE, snapshot=None, max_workers=MAX_WORKERS, cancel=None):
+    """
+    Fetch the catalog and update the cache.
+    The first page is sent with If-None-Match / If-Modified-Since when the
+    snapshot has validators, so an unchanged catalog costs a single 304.
+    Remaining pages stream straight into the mapping. Returns the new snapshot, or None on failure.
+    Setting the cancel event abandons the fetch (returns None, cache untouched).
+    """
+    import requests  # type: ignore  # Only needed when the cache can't answer
+    headers = {}
+    if snapshot and snapshot.get('url') == url:
+        if snapshot.get('etag'):
+            headers['If-None-Match'] = snapshot['etag']
+        if snapshot.get('last_modified'):
+            headers['If-Modified-Since'] = snapshot['last_modified']
+
+    try:
+        session = create_session(max_workers)
+        response = fetch_product_page(session, url, headers=headers, cancel=cancel)
+        if response.status_code == 304:
+            snapshot = dict(snapshot, fetched_at=time.time())
+            print("Product catalog unchanged (304), cache renewed")
+        else:
+            pages = iter_product_pages(url, max_workers=max_workers, session=session, first_page=response.json(),
+                                       cancel=cancel)
+            mapping = create_product_mapping(product for page in pages for product in page)
+            snapshot = {
+                'url': url,
+                'fetched_at': time.time(),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'mapping': mapping
+            }
+        save_catalog_snapshot(snapshot, cache_file)
+        return snapshot
+
+    except CancelledError:
+        print("Product catalog fetch cancelled")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"API Error: {e}")
+        return None
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Unexpected catalog response: {e}")
+        return None
+
+@metrics.instrumented()
+def get_product_mapping(url=PRODUCTS_URL, cache_file=CACHE_FILE, ttl=DEFAULT_TTL, stale_while_revalidate=False,
+                        cancel=None):
+    """
+    Product mapping served from the local catalog cache.
+    - fresh snapshot (younger than ttl): returned with no network call
+    - stale snapshot + stale_while_revalidate: returned at once, refreshed in background
+    - otherwise: refreshed from the API, falling back to the last good snapshot on failure
+    cancel (a threading.Event, e.g. Pipeline.cancelled) aborts an API refresh.
+    """
+    snapshot = load_catalog_snapshot(cache_file)
+
+    if snapshot and snapshot.get('url') == url:
+        age = time.time() - snapshot['fetched_at']
+        if age < ttl:
+            print(f"Loaded {len(snapshot['mapping'])} products from catalog cache")
+            return snapshot['mapping']
+        if stale_while_revalidate:
+            threading.Thread(
+                target=refresh_catalog, args=(url, cache_file, snapshot), name='catalog-refresh'
+            ).start()
+            print(f"Loaded {len(snapshot['mapping'])} products from stale catalog cache (refreshing)")
+            return snapshot['mapping']
+
+    fresh = refresh_catalog(url, cache_file, snapshot, cancel=cancel)
+    if fresh:
+        return fresh['mapping']
+    if snapshot:
+        print(f"Using last good catalog snapshot ({len(snapshot['mapping'])} products)")
+        return snapshot['mapping']
+    return {}
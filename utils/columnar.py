@@ -0,0 +1,276 @@
+# utils/columnar.py
+import importlib.util
+from array import array
+
+from utils.aggregator import EXACT_SCALE, SalesAggregate, to_units
+from utils.file_handler import Transaction, as_transaction
+
+__all__ = ['ColumnarTransactions', 'has_numpy', 'load_numpy']
+
+_SPLIT = 27  # mantissas are summed as two float halves of at most 27 bits...
+_EXACT_ROWS = 2 ** 26  # ...which stay exact in float64 for this many rows per bincount
+
+np = None  # NumPy is optional and slow to import: load_numpy() imports it on first use
+
+def has_numpy():
+    """True if NumPy is installed (checked without importing it)"""
+    return np is not None or importlib.util.find_spec('numpy') is not None
+
+def load_numpy():
+    """The numpy module, imported on first call; None if it isn't installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+def _require_numpy():
+    if load_numpy() is None:
+        raise ImportError("The columnar backend needs NumPy: pip install numpy")
+    return np
+
+class ColumnarTransactions:
+    """
+    Column-oriented transaction store.
+    Numerics are NumPy arrays; Region, Product_Name, Customer_ID, Date and
+    Product_ID are dictionary-encoded as integer codes into value lists.
+    """
+
+    ENCODED_FIELDS = ('Date', 'Product_ID', 'Product_Name', 'Customer_ID', 'Region')
+
+    def __init__(self):
+        _require_numpy()
+        self.transaction_ids = []
+        self.quantity = np.zeros(0, dtype=np.int64)
+        self.unit_price = np.zeros(0, dtype=np.float64)
+        self.codes = {}   # field -> int32 code array
+        self.values = {}  # field -> list of distinct values, in first-seen order
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """Build the store from any iterable of transactions (one pass)"""
+        store = cls()
+        quantity = array('q')
+        unit_price = array('d')
+        lookups = {field: {} for field in cls.ENCODED_FIELDS}
+        codes = {field: array('i') for field in cls.ENCODED_FIELDS}
+
+        for t in map(as_transaction, transactions):
+            store.transaction_ids.append(t.Transaction_ID)
+            quantity.append(t.Quantity)
+            unit_price.append(t.Unit_Price)
+            for field in cls.ENCODED_FIELDS:
+                lookup = lookups[field]
+                value = getattr(t, field)
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                codes[field].append(code)
+
+        store.quantity = np.frombuffer(quantity, dtype=np.int64).copy()
+        store.unit_price = np.frombuffer(unit_price, dtype=np.float64).copy()
+        for field in cls.ENCODED_FIELDS:
+            store.codes[field] = np.frombuffer(codes[field], dtype=np.int32).copy()
+            store.values[field] = list(lookups[field])
+        return store
+
+    @classmethod
+    def concat(cls, stores):
+        """Join stores in order, re-coding each onto shared first-seen value lists"""
+        store = cls()
+        lookups = {field: {} for field in cls.ENCODED_FIELDS}
+        quantity = [store.quantity]
+        unit_price = [store.unit_price]
+        codes = {field: [np.zeros(0, dtype=np.int32)] for field in cls.ENCODED_FIELDS}
+
+        for part in stores:
+            store.transaction_ids.extend(part.transaction_ids)
+            quantity.append(part.quantity)
+            unit_price.append(part.unit_price)
+            for field in cls.ENCODED_FIELDS:
+                lookup = lookups[field]
+                remap = np.array([lookup.setdefault(v, len(lookup)) for v in part.values[field]], dtype=np.int32)
+                codes[field].append(remap[part.codes[field]] if len(remap) else part.codes[field])
+
+        store.quantity = np.concatenate(quantity)
+        store.unit_price = np.concatenate(unit_price)
+        for field in cls.ENCODED_FIELDS:
+            store.codes[field] = np.concatenate(codes[field])
+            store.values[field] = list(lookups[field])
+        return store
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    def columns(self):
+        """The eight transaction fields as Python lists, in TRANSACTION_FIELDS order"""
+        values = self.values
+        return [
+            self.transaction_ids,
+            [values['Date'][code] for code in self.codes['Date'].tolist()],
+            [values['Product_ID'][code] for code in self.codes['Product_ID'].tolist()],
+            [values['Product_Name'][code] for code in self.codes['Product_Name'].tolist()],
+            self.quantity.tolist(),
+            self.unit_price.tolist(),
+            [values['Customer_ID'][code] for code in self.codes['Customer_ID'].tolist()],
+            [values['Region'][code] for code in self.codes['Region'].tolist()],
+        ]
+
+    def __iter__(self):
+        """Yield rows back as Transaction records"""
+        for row in zip(*self.columns()):
+            yield Transaction(*row)
+
+    @property
+    def amount(self):
+        return self.quantity * self.unit_price
+
+    def _present(self, field):
+        """Per-row mask: field is non-empty (checked once per distinct value)"""
+        present = np.array([bool(value) for value in self.values[field]], dtype=bool)
+        return present[self.codes[field]] if len(present) else np.zeros(len(self), dtype=bool)
+
+    def valid_mask(self):
+        """Vectorized is_valid_transaction: True for rows that pass validation"""
+        ids_ok = np.fromiter((tid.startswith('T') for tid in self.transaction_ids), dtype=bool, count=len(self))
+        # Negated comparisons so NaN passes, as in is_valid_transaction
+        return (~(self.quantity <= 0) & ~(self.unit_price <= 0) & ids_ok
+                & self._present('Customer_ID') & self._present('Region'))
+
+    def filter_mask(self, region=None, min_amount=None, max_amount=None):
+        """Vectorized passes_filters: True for rows inside the region / amount filters"""
+        mask = np.ones(len(self), dtype=bool)
+        if region:
+            values = self.values['Region']
+            mask &= self.codes['Region'] == (values.index(region) if region in values else -1)
+        if min_amount or max_amount:
+            amount = self.amount
+            if min_amount:
+                mask &= ~(amount < min_amount)
+            if max_amount:
+                mask &= ~(amount > max_amount)
+        return mask
+
+    def select(self, mask):
+        """Store of the rows where mask is True, value lists renumbered in first-seen order"""
+        rows = np.flatnonzero(mask)
+        store = ColumnarTransactions()
+        ids = self.transaction_ids
+        store.transaction_ids = ids[:] if len(rows) == len(ids) else [ids[i] for i in rows.tolist()]
+        store.quantity = self.quantity[rows]
+        store.unit_price = self.unit_price[rows]
+        for field in self.ENCODED_FIELDS:
+            codes = self.codes[field][rows]
+            used, first = np.unique(codes, return_index=True)
+            order = used[np.argsort(first)]
+            remap = np.zeros(len(self.values[field]), dtype=np.int32)
+            remap[order] = np.arange(len(order), dtype=np.int32)
+            store.codes[field] = remap[codes]
+            store.values[field] = [self.values[field][code] for code in order.tolist()]
+        return store
+
+    def product_counts(self):
+        """Rows per Product_ID, as a dict in first-seen order"""
+        counts = self._group_count('Product_ID').tolist()
+        return dict(zip(self.values['Product_ID'], counts))
+
+    def _group_sum(self, field, weights):
+        return np.bincount(self.codes[field], weights=weights, minlength=len(self.values[field]))
+
+    def _amount_parts(self):
+        """
+        Amounts split for _group_units(): each finite amount is an int mantissa
+        (53 bits) times 2**shift in to_units() units. Returns (shift index per
+        row, shifts, high and low mantissa halves as floats, rows that are
+        non-finite or finer than a unit and must be added in Python).
+        """
+        amount = self.amount
+        finite = np.isfinite(amount)
+        fraction, exponent = np.frexp(np.where(finite, amount, 0.0))
+        mantissa = (fraction * 2.0 ** 53).astype(np.int64)
+        shift = exponent.astype(np.int64) + (EXACT_SCALE.bit_length() - 1 - 53)
+        python_rows = ~finite | (shift < 0)
+        mantissa[python_rows] = 0
+        shifts, shift_index = np.unique(np.maximum(shift, 0), return_inverse=True)
+        high = (mantissa >> _SPLIT).astype(np.float64)
+        low = (mantissa & ((1 << _SPLIT) - 1)).astype(np.float64)
+        return shift_index.reshape(-1), shifts.tolist(), high, low, python_rows
+
+    def _group_units(self, field, parts):
+        """Per-group exact revenue as Python numbers, exactly as SalesAggregate sums it"""
+        shift_index, shifts, high, low, python_rows = parts
+        codes = self.codes[field]
+        cells = codes.astype(np.int64) * len(shifts) + shift_index
+        size = len(self.values[field]) * len(shifts)
+        sums = [0] * len(self.values[field])
+        for start in range(0, len(cells), _EXACT_ROWS):
+            rows = slice(start, start + _EXACT_ROWS)
+            high_sums = np.bincount(cells[rows], weights=high[rows], minlength=size)
+            low_sums = np.bincount(cells[rows], weights=low[rows], minlength=size)
+            used = np.flatnonzero((high_sums != 0) | (low_sums != 0))
+            for cell, high_sum, low_sum in zip(used.tolist(), high_sums[used].tolist(), low_sums[used].tolist()):
+                code, index = divmod(cell, len(shifts))
+                sums[code] += ((int(high_sum) << _SPLIT) + int(low_sum)) << shifts[index]
+        for row in np.flatnonzero(python_rows).tolist():
+            sums[int(codes[row])] += to_units(float(self.amount[row]))
+        return sums
+
+    def _group_count(self, field):
+        return np.bincount(self.codes[field], minlength=len(self.values[field]))
+
+    def _distinct_pairs(self, field, other):
+        """Distinct (field code, other code) pairs present in the data"""
+        width = max(len(self.values[other]), 1)
+        keys = np.unique(self.codes[field].astype(np.int64) * width + self.codes[other])
+        return zip((keys // width).tolist(), (keys % width).tolist())
+
+    def aggregate(self):
+        """Vectorized equivalent of aggregate_transactions()"""
+        results = SalesAggregate()
+        n = len(self)
+        if n == 0:
+            return results
+        values = self.values
+        parts = self._amount_parts()
+
+        sales = self._group_units('Region', parts)
+        counts = self._group_count('Region').tolist()
+        for code, region in enumerate(values['Region']):
+            results.regions[region] = {'total_sales': 0, 'transaction_count': counts[code]}
+        results.add_units('regions', dict(zip(values['Region'], sales)))
+        results.add_total_units(sum(sales))
+        results.transaction_count = n
+
+        qty = self._group_sum('Product_Name', self.quantity).astype(np.int64).tolist()
+        for code, product in enumerate(values['Product_Name']):
+            results.products[product] = {'total_qty': qty[code], 'total_revenue': 0}
+        results.add_units('products', dict(zip(values['Product_Name'], self._group_units('Product_Name', parts))))
+
+        spent = self._group_units('Customer_ID', parts)
+        counts = self._group_count('Customer_ID').tolist()
+        customer_products = [set() for _ in values['Customer_ID']]
+        for customer, product in self._distinct_pairs('Customer_ID', 'Product_Name'):
+            customer_products[customer].add(values['Product_Name'][product])
+        for code, customer in enumerate(values['Customer_ID']):
+            results.customers[customer] = {
+                'total_spent': 0, 'purchase_count': counts[code],
+                'products': customer_products[code]
+            }
+        results.add_units('customers', dict(zip(values['Customer_ID'], spent)))
+
+        revenue = self._group_units('Date', parts)
+        counts = self._group_count('Date').tolist()
+        day_customers = [set() for _ in values['Date']]
+        for date, customer in self._distinct_pairs('Date', 'Customer_ID'):
+            day_customers[date].add(values['Customer_ID'][customer])
+        for code, date in enumerate(values['Date']):
+            results.daily[date] = {
+                'revenue': 0, 'transaction_count': counts[code],
+                'unique_customers': day_customers[code]
+            }
+        results.add_units('daily', dict(zip(values['Date'], revenue)))
+
+        return results
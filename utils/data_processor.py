@@ -1,27 +1,62 @@
 # utils/data_processor.py
+import sys
+
+from utils.aggregator import SalesAggregate, aggregate_transactions, as_aggregate
+from utils.rollups import DateRollup, as_rollup
+from utils.topk import TopK, top_n, top_transactions
+from utils import metrics
+
+__all__ = [
+    'calculate_total_revenue', 'region_wise_sales', 'top_selling_products', 'heavy_hitter_products',
+    'customer_analysis', 'daily_sales_trend', 'sales_by_period', 'sales_in_range', 'find_peak_sales_day',
+    'low_performing_products',
+    # The inputs the analyses accept, re-exported for callers that build them
+    # (SalesDatabase too, but only on explicit import: it loads sqlite3)
+    'SalesAggregate', 'aggregate_transactions', 'as_aggregate', 'DateRollup', 'as_rollup',
+    'TopK', 'top_n', 'top_transactions'
+]
+
+# Every function accepts either a list of transactions or a SalesAggregate.
+# Passing the aggregate from aggregate_transactions() avoids rescanning the data.
+# A SalesDatabase (or a where() view of one) is answered with SQL queries instead.
+
+def __getattr__(name):
+    if name == 'SalesDatabase':  # Imported on first use, like the database itself
+        from utils.sqlite_store import SalesDatabase
+        return SalesDatabase
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _is_database(data):
+    """True for a SalesDatabase, without importing sqlite_store: if it isn't loaded, data can't be one"""
+    sqlite_store = sys.modules.get('utils.sqlite_store')
+    return sqlite_store is not None and isinstance(data, sqlite_store.SalesDatabase)
+
+def _aggregate(data, sections):
+    """as_aggregate, except that a SalesDatabase queries just these sections"""
+    if _is_database(data):
+        return data.aggregate(sections)
+    return as_aggregate(data, sections)
+
+@metrics.instrumented()
 def calculate_total_revenue(transactions):
     """Total revenue = sum(Quantity * Unit_Price)"""
-    total = sum(t['Quantity'] * t['Unit_Price'] for t in transactions)
+    total = _aggregate(transactions, ()).total_revenue
     print(f"Total Revenue: {total:,.2f}")
     return total
 
+@metrics.instrumented()
 def region_wise_sales(transactions):
     """Region stats: total sales, count, percentage – sorted by sales desc"""
-    region_stats = {}
-    total_revenue = calculate_total_revenue(transactions)
-    
-    for t in transactions:
-        region = t['Region']
-        amount = t['Quantity'] * t['Unit_Price']
-        if region not in region_stats:
-            region_stats[region] = {'total_sales': 0, 'transaction_count': 0}
-        region_stats[region]['total_sales'] += amount
-        region_stats[region]['transaction_count'] += 1
+    results = _aggregate(transactions, ('regions',))
+    total_revenue = calculate_total_revenue(results)
+    region_stats = {region: dict(stats) for region, stats in results.regions.items()}
     
     # Add percentages and sort
     for region in region_stats:
         pct = (region_stats[region]['total_sales'] / total_revenue) * 100
         region_stats[region]['percentage'] = f"{pct:.2f}%"
+        if 'unique_customers' in region_stats[region]:  # Sketch mode: estimated count
+            region_stats[region]['unique_customers'] = len(region_stats[region]['unique_customers'])
     
     sorted_regions = sorted(region_stats.items(), key=lambda x: x[1]['total_sales'], reverse=True)
     print("Region-wise Sales:")
@@ -29,79 +64,95 @@ def region_wise_sales(transactions):
         print(f"{region}: {stats['total_sales']:,.0f} ({stats['percentage']}), {stats['transaction_count']} txns")
     return dict(sorted_regions)
 
+@metrics.instrumented()
 def top_selling_products(transactions, n=5):
     """Top n products by total quantity sold"""
-    product_stats = {}
-    
-    for t in transactions:
-        product = t['Product_Name']
-        qty = t['Quantity']
-        revenue = qty * t['Unit_Price']
-        if product not in product_stats:
-            product_stats[product] = {'total_qty': 0, 'total_revenue': 0}
-        product_stats[product]['total_qty'] += qty
-        product_stats[product]['total_revenue'] += revenue
-    
-    # Sort by quantity desc, take top n
-    top_products = sorted(product_stats.items(), key=lambda x: x[1]['total_qty'], reverse=True)[:n]
+    if _is_database(transactions):
+        top_products = transactions.top_products(n)
+    else:
+        product_stats = as_aggregate(transactions, ('products',)).products
+        # Top n by quantity desc (bounded heap, same order as a full sort)
+        top_products = [
+            (p, stats['total_qty'], stats['total_revenue'])
+            for p, stats in top_n(product_stats.items(), n, key=lambda x: x[1]['total_qty'])
+        ]
     
     print(f"Top {n} Products:")
-    for product, stats in top_products:
-        print(f"{product}: {stats['total_qty']} qty, {stats['total_revenue']:,.0f}")
+    for product, qty, revenue in top_products:
+        print(f"{product}: {qty} qty, {revenue:,.0f}")
     
-    return [(p, stats['total_qty'], stats['total_revenue']) for p, stats in top_products]
+    return top_products
 
-def customer_analysis(transactions):
-    """Customer stats: total spent, purchase count, avg order, unique products"""
-    customer_stats = {}
-    
-    for t in transactions:
-        customer = t['Customer_ID']
-        amount = t['Quantity'] * t['Unit_Price']
-        product = t['Product_Name']
-        
-        if customer not in customer_stats:
-            customer_stats[customer] = {
-                'total_spent': 0, 'purchase_count': 0, 'products': set()
-            }
-        customer_stats[customer]['total_spent'] += amount
-        customer_stats[customer]['purchase_count'] += 1
-        customer_stats[customer]['products'].add(product)
-    
-    # Calculate avg and sort by total_spent desc
-    for customer in customer_stats:
-        stats = customer_stats[customer]
+@metrics.instrumented()
+def heavy_hitter_products(transactions, n=5):
+    """
+    Top n products by quantity as (product, qty, error) – true qty lies in [qty - error, qty].
+    Sketch-mode aggregates answer from their space-saving summary; otherwise exact (error 0).
+    """
+    if isinstance(transactions, SalesAggregate) and transactions.heavy_products is not None:
+        heavy = transactions.heavy_products.top(n)
+    elif _is_database(transactions):
+        heavy = [(p, qty, 0) for p, qty, _ in transactions.top_products(n)]
+    else:
+        product_stats = as_aggregate(transactions, ('products',)).products
+        top_products = top_n(product_stats.items(), n, key=lambda x: x[1]['total_qty'])
+        heavy = [(p, stats['total_qty'], 0) for p, stats in top_products]
+
+    print(f"Heavy Hitter Products (top {n}):")
+    for product, qty, error in heavy:
+        print(f"{product}: {qty} qty" + (f" (overcount <= {error})" if error else ""))
+
+    return heavy
+
+@metrics.instrumented()
+def customer_analysis(transactions, top=None):
+    """
+    Customer stats: total spent, purchase count, avg order, unique products.
+    top=n returns only the n biggest spenders; derived fields are then built
+    for those customers only instead of for every customer.
+    """
+    by_spent = lambda x: x[1]['total_spent']
+    if _is_database(transactions):
+        ranked = transactions.top_customers(None if top is None else max(top, 5))
+    elif top is None:
+        customers = as_aggregate(transactions, ('customers',)).customers
+        ranked = sorted(customers.items(), key=by_spent, reverse=True)
+    else:
+        customers = as_aggregate(transactions, ('customers',)).customers
+        ranked = top_n(customers.items(), max(top, 5), key=by_spent)
+    
+    # Calculate avg and products bought for the customers returned or shown
+    sorted_customers = []
+    for customer, stats in ranked:
+        stats = dict(stats)
         stats['avg_order_value'] = stats['total_spent'] / stats['purchase_count']
-        stats['products_bought'] = ', '.join(sorted(stats['products']))
-    
-    sorted_customers = sorted(customer_stats.items(), key=lambda x: x[1]['total_spent'], reverse=True)
+        products = stats['products']
+        if isinstance(products, set):
+            stats['products_bought'] = ', '.join(sorted(products))
+        else:  # Sketch mode keeps only an estimated count for large groups
+            stats['products_bought'] = f"~{len(products)} products"
+        sorted_customers.append((customer, stats))
     
     print("Top Customers:")
     for customer, stats in sorted_customers[:5]:  # Show top 5
         print(f"{customer}: {stats['total_spent']:,.0f} ({stats['purchase_count']} orders, avg {stats['avg_order_value']:,.0f})")
     
-    return dict(sorted_customers)
+    return dict(sorted_customers if top is None else sorted_customers[:top])
 
+@metrics.instrumented()
 def daily_sales_trend(transactions):
     """Daily revenue, txn count, unique customers – sorted by date"""
-    daily_stats = {}
-    
-    for t in transactions:
-        date = t['Date']
-        amount = t['Quantity'] * t['Unit_Price']
-        customer = t['Customer_ID']
-        
-        if date not in daily_stats:
-            daily_stats[date] = {'revenue': 0, 'transaction_count': 0, 'unique_customers': set()}
-        daily_stats[date]['revenue'] += amount
-        daily_stats[date]['transaction_count'] += 1
-        daily_stats[date]['unique_customers'].add(customer)
+    if _is_database(transactions):
+        sorted_days = transactions.daily_trend()
+    else:
+        daily = as_aggregate(transactions, ('daily',)).daily
+        daily_stats = {date: dict(stats) for date, stats in daily.items()}
     
-    # Convert set to count and sort chronologically
-    for date in daily_stats:
-        daily_stats[date]['unique_customers'] = len(daily_stats[date]['unique_customers'])
+        # Convert set to count and sort chronologically
+        for date in daily_stats:
+            daily_stats[date]['unique_customers'] = len(daily_stats[date]['unique_customers'])
     
-    sorted_days = dict(sorted(daily_stats.items()))
+        sorted_days = dict(sorted(daily_stats.items()))
     
     print("Daily Sales Trend:")
     for date, stats in sorted_days.items():
@@ -109,32 +160,62 @@ def daily_sales_trend(transactions):
     
     return sorted_days
 
+@metrics.instrumented()
+def sales_by_period(transactions, granularity='week', by=None):
+    """
+    Revenue and txn count per day/week/month bucket, oldest first.
+    by='region' or 'product' splits each bucket per value. Accepts transactions,
+    a DateRollup, or (for by=None) a SalesAggregate.
+    """
+    by = () if by is None else (by,)
+    if _is_database(transactions):
+        transactions = transactions.rollup(by)
+    rollup = as_rollup(transactions, by)
+    by = by[0] if by else None
+    buckets = rollup.buckets(granularity, by)
+
+    print(f"Sales by {granularity}" + (f" and {by}:" if by else ":"))
+    for group, periods in (buckets.items() if by else [(None, buckets)]):
+        for label, stats in periods.items():
+            prefix = f"{group} " if by else ""
+            print(f"{prefix}{label}: {stats['revenue']:,.0f}, {stats['transaction_count']} txns")
+
+    return buckets
+
+@metrics.instrumented()
+def sales_in_range(transactions, start=None, end=None, region=None, product=None):
+    """Revenue and txn count from start to end (inclusive dates), optionally for one region or product"""
+    by = ('region',) if region is not None else ('product',) if product is not None else ()
+    if _is_database(transactions):
+        transactions = transactions.rollup(by)
+    totals = as_rollup(transactions, by).query(start, end, region, product)
+    print(f"Sales {start or 'start'} to {end or 'end'}: {totals['revenue']:,.0f}, {totals['transaction_count']} txns")
+    return totals
+
+@metrics.instrumented()
 def find_peak_sales_day(transactions):
     """Date with highest revenue"""
-    daily_stats = daily_sales_trend(transactions)
-    peak_date = max(daily_stats.items(), key=lambda x: x[1]['revenue'])
+    if _is_database(transactions):
+        peak_date = transactions.peak_day()
+    else:
+        daily_stats = daily_sales_trend(as_aggregate(transactions, ('daily',)))
+        peak_date = max(daily_stats.items(), key=lambda x: x[1]['revenue'])
     print(f"Peak Day: {peak_date[0]}, {peak_date[1]['revenue']:,.0f}, {peak_date[1]['transaction_count']} txns")
     return peak_date
 
+@metrics.instrumented()
 def low_performing_products(transactions, threshold=10):
     """Products with total quantity < threshold, sorted asc"""
-    product_stats = {}
-    
-    for t in transactions:
-        product = t['Product_Name']
-        qty = t['Quantity']
-        revenue = qty * t['Unit_Price']
-        if product not in product_stats:
-            product_stats[product] = {'total_qty': 0, 'total_revenue': 0}
-        product_stats[product]['total_qty'] += qty
-        product_stats[product]['total_revenue'] += revenue
-    
-    low_performers = [
-        (p, stats['total_qty'], stats['total_revenue']) 
-        for p, stats in product_stats.items() 
-        if stats['total_qty'] < threshold
-    ]
-    low_performers.sort(key=lambda x: x[1])  # Sort by qty asc
+    if _is_database(transactions):
+        low_performers = transactions.low_performers(threshold)
+    else:
+        product_stats = as_aggregate(transactions, ('products',)).products
+        low_performers = [
+            (p, stats['total_qty'], stats['total_revenue'])
+            for p, stats in product_stats.items()
+            if stats['total_qty'] < threshold
+        ]
+        low_performers.sort(key=lambda x: x[1])  # Sort by qty asc
     
     print(f"Low Performing Products (<{threshold} qty):")
     for product, qty, revenue in low_performers:
@@ -0,0 +1,170 @@
+# utils/enriched_writer.py
+import os
+
+from utils import metrics
+
+__all__ = [
+    'EnrichedDataWriter', 'load_enriched_data', 'ENRICHED_FIELDS', 'ENRICHED_HEADER', 'WRITE_BATCH_SIZE',
+    'FORMATS', 'INT_FIELDS', 'FLOAT_FIELDS', 'BOOL_FIELDS'
+]
+
+ENRICHED_FIELDS = [
+    'Transaction_ID', 'Date', 'Product_ID', 'Product_Name', 'Quantity', 'Unit_Price',
+    'Customer_ID', 'Region', 'API_Category', 'API_Brand', 'API_Rating', 'API_Match'
+]
+ENRICHED_HEADER = '|'.join(ENRICHED_FIELDS)
+WRITE_BATCH_SIZE = 50000  # rows buffered before each write
+FORMATS = ('text', 'npz', 'parquet')
+
+# Column types for the binary formats. Missing strings are stored as '',
+# a missing API_Rating as NaN (npz) or null (parquet).
+INT_FIELDS = {'Quantity'}
+FLOAT_FIELDS = {'Unit_Price', 'API_Rating'}
+BOOL_FIELDS = {'API_Match'}
+
+def _format_for(filename):
+    if filename.endswith('.npz'):
+        return 'npz'
+    if filename.endswith('.parquet'):
+        return 'parquet'
+    return 'text'
+
+class EnrichedDataWriter:
+    """
+    Incremental writer for enriched transactions.
+    Rows are buffered and written in batches of batch_size, so a stream of
+    any length can be saved without holding it in memory.
+
+    Formats:
+    - 'text':    pipe-delimited, same layout as save_enriched_data
+    - 'npz':     NumPy zip archive, one .npy per column per batch (needs NumPy)
+    - 'parquet': one row group per batch (needs pyarrow)
+    """
+
+    def __init__(self, filename, format=None, batch_size=WRITE_BATCH_SIZE):
+        self.filename = filename
+        self.format = format or _format_for(filename)
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown format: {self.format} (choose from {', '.join(FORMATS)})")
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._batch = []
+        self._batches_written = 0
+
+        if self.format == 'text':
+            self._file = open(filename, 'w')
+            self._file.write(ENRICHED_HEADER + '\n')
+        elif self.format == 'npz':
+            import zipfile
+            import numpy as np
+            self._np = np
+            self._file = zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa = pa
+            self._schema = pa.schema([
+                (field, pa.int64() if field in INT_FIELDS else
+                        pa.float64() if field in FLOAT_FIELDS else
+                        pa.bool_() if field in BOOL_FIELDS else pa.string())
+                for field in ENRICHED_FIELDS
+            ])
+            self._file = pq.ParquetWriter(filename, self._schema)
+
+    def write(self, row):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """Write out the buffered batch"""
+        if not self._batch:
+            return
+        if self.format == 'text':
+            self._write_text(self._batch)
+        elif self.format == 'npz':
+            self._write_npz(self._batch)
+        else:
+            self._write_parquet(self._batch)
+        self.rows_written += len(self._batch)
+        self._batches_written += 1
+        self._batch = []
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+            self._file = None
+        if metrics.is_enabled():
+            metrics.record_bytes(written=os.path.getsize(self.filename))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_text(self, rows):
+        lines = [
+            '|'.join([str(t.get(field, '')) for field in ENRICHED_FIELDS])
+            for t in rows
+        ]
+        self._file.write('\n'.join(lines) + '\n')
+
+    def _columns(self, rows):
+        for field in ENRICHED_FIELDS:
+            values = [t.get(field) for t in rows]
+            if field in FLOAT_FIELDS:
+                yield field, [float('nan') if v is None else v for v in values]
+            elif field in INT_FIELDS or field in BOOL_FIELDS:
+                yield field, values
+            else:
+                yield field, ['' if v is None else str(v) for v in values]
+
+    def _write_npz(self, rows):
+        np = self._np
+        for field, values in self._columns(rows):
+            if field in FLOAT_FIELDS:
+                array = np.array(values, dtype=np.float64)
+            elif field in INT_FIELDS:
+                array = np.array(values, dtype=np.int64)
+            elif field in BOOL_FIELDS:
+                array = np.array(values, dtype=np.bool_)
+            else:
+                array = np.array(values, dtype=np.str_)
+            # Same member layout np.savez uses, one member per column per batch
+            with self._file.open(f"{field}.{self._batches_written:06d}.npy", 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, array, allow_pickle=False)
+
+    def _write_parquet(self, rows):
+        columns = {
+            field: [v if v == v else None for v in values] if field in FLOAT_FIELDS else values
+            for field, values in self._columns(rows)
+        }
+        self._file.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+def load_enriched_data(filename, format=None):
+    """
+    Reload a binary enriched file as a dict of column arrays.
+    npz returns NumPy arrays; parquet returns a pyarrow Table.
+    """
+    format = format or _format_for(filename)
+    if format == 'npz':
+        import numpy as np
+        parts = {field: [] for field in ENRICHED_FIELDS}
+        with np.load(filename, allow_pickle=False) as archive:
+            for name in sorted(archive.files):
+                field = name.rsplit('.', 1)[0]
+                parts[field].append(archive[name])
+        return {field: np.concatenate(arrays) if arrays else np.array([]) for field, arrays in parts.items()}
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(filename)
+    raise ValueError("load_enriched_data reads the binary formats (npz, parquet)")
@@ -0,0 +1,356 @@
+# utils/fast_parser.py
+import io
+import os
+from collections import Counter
+
+from utils import metrics
+from utils.columnar import ColumnarTransactions, load_numpy, _require_numpy
+from utils.file_handler import iter_transactions, sniff_encodings
+from utils.mmap_reader import LOOKAHEAD, iter_mapped_blocks, map_file
+
+__all__ = [
+    'parse_block', 'scan_range', 'parse_sales_columns', 'PARSE_BLOCK_SIZE', 'MAX_FAST_DIGITS',
+    'MAX_FAST_WIDTH', 'FACTORIZE_SAMPLE', 'MAX_HASHED_DISTINCT', 'TEXT_FIELDS'
+]
+
+PARSE_BLOCK_SIZE = 16 * 1024 * 1024  # bytes tokenized per NumPy pass
+MAX_FAST_DIGITS = 15  # digits that always fit a double exactly; longer numbers use int()/float()
+MAX_FAST_WIDTH = 32   # wider numeric fields go straight to the fallback
+FACTORIZE_SAMPLE = 4096  # leading rows used to find most distinct values
+MAX_HASHED_DISTINCT = 1024  # distinct values looked up by hash table rather than binary search
+
+# Text fields as (field index, name, cleaner); cleaning runs once per distinct value
+TEXT_FIELDS = [
+    (1, 'Date', str.strip),
+    (2, 'Product_ID', str.strip),
+    (3, 'Product_Name', lambda v: v.replace(',', ' ').strip()),
+    (6, 'Customer_ID', str.strip),
+    (7, 'Region', str.strip),
+]
+
+np = load_numpy()  # This module is the NumPy scanner: importers load it only on the columnar path
+if np is not None:
+    _BYTE_MASKS = np.array([(1 << (8 * i)) - 1 for i in range(9)], dtype=np.uint64)
+    _FINGERPRINT_PRIME = np.uint64(0x100000001B3)
+    _HASH_MULTIPLIERS = [np.uint64(m) for m in (
+        0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+        0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x2545F4914F6CDD1D, 0x94D049BB133111EB,
+    )]
+
+def _line_bounds(buf, size, skip_header):
+    newlines = np.flatnonzero(buf[:size] == 10)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [size]))
+    if starts[-1] == size:  # Block ends with a newline
+        starts, ends = starts[:-1], ends[:-1]
+    if skip_header:
+        starts, ends = starts[1:], ends[1:]
+    return starts, ends
+
+def _parse_numbers(buf, starts, ends, is_float):
+    """
+    Vectorized int()/float() for fields made only of digits, commas and (for
+    floats) one dot. Returns (values, ok); rows with ok False need the fallback.
+    Floats are digits / 10**frac_digits: both sides are exact doubles, so the
+    division rounds exactly like float() does.
+    """
+    widths = ends - starts
+    n = len(starts)
+    digits = np.zeros(n, dtype=np.int64)
+    count = np.zeros(n, dtype=np.int64)
+    frac = np.zeros(n, dtype=np.int64)
+    dots = np.zeros(n, dtype=np.int64)
+    ok = widths <= MAX_FAST_WIDTH
+    last = len(buf) - 1
+
+    for k in range(min(int(widths.max()), MAX_FAST_WIDTH) if n else 0):
+        active = widths > k
+        c = buf[np.minimum(starts + k, last)]
+        d = c - np.uint8(48)  # Wraps for bytes below '0'
+        is_digit = active & (d < 10)
+        allowed = is_digit | (c == 44)
+        if is_float:
+            is_dot = active & (c == 46)
+            allowed |= is_dot
+            frac += is_digit & (dots > 0)
+            dots += is_dot
+        ok &= ~active | allowed
+        digits = np.where(is_digit, digits * 10 + d, digits)
+        count += is_digit
+
+    ok &= (count > 0) & (count <= MAX_FAST_DIGITS)
+    if not is_float:
+        return digits, ok
+    ok &= dots <= 1
+    return digits / 10.0 ** frac, ok
+
+def _fallback_numbers(data, starts, ends, values, ok, conv, encoding):
+    """
+    Apply parse_line's rule to the rows the vectorized parser left; returns a bad-row mask.
+    Numbers the column can't hold (a quantity past int64) are rejected too.
+    """
+    bad = np.zeros(len(values), dtype=bool)
+    for i in np.flatnonzero(~ok).tolist():
+        try:
+            values[i] = conv(str(data[starts[i]:ends[i]], encoding).replace(',', ''))
+        except (ValueError, OverflowError):
+            bad[i] = True
+    return bad
+
+def _decode_field(buf, starts, ends, encoding):
+    """Decode one field for every row with a single gather + split"""
+    if not len(starts):
+        return []
+    lengths = ends - starts + 1
+    offsets = np.cumsum(lengths) - lengths
+    gathered = buf[np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(offsets - starts, lengths)]
+    gathered[offsets + lengths - 1] = 10  # Separator in place of the delimiter
+    values = gathered.tobytes().decode(encoding).split('\n')
+    values.pop()
+
+    # Only strip when some field starts or ends with whitespace (or non-ASCII, which might be)
+    edges = gathered[np.concatenate((offsets, offsets + lengths - 2))]
+    if ((edges <= 32) | (edges >= 128)).any():
+        values = list(map(str.strip, values))
+    return values
+
+def _positions(distinct, key):
+    """
+    Index of each key in the sorted array distinct, or -1 where it is absent.
+    Small key sets get a collision-free multiply-shift hash table (O(1) per
+    row); larger ones fall back to a binary search.
+    """
+    d = len(distinct)
+    pos = None
+    if d <= MAX_HASHED_DISTINCT:
+        shift = np.uint64(64 - min(2 * d.bit_length() + 1, 22))
+        for multiplier in _HASH_MULTIPLIERS:
+            slots = (distinct * multiplier) >> shift
+            if len(np.unique(slots)) == d:
+                table = np.zeros(1 << (64 - int(shift)), dtype=np.intp)
+                table[slots] = np.arange(d)
+                pos = table[(key * multiplier) >> shift]
+                break
+    if pos is None:
+        pos = np.minimum(np.searchsorted(distinct, key), d - 1)
+    return np.where(distinct[pos] == key, pos, -1)
+
+def _factorize(key):
+    """
+    Dense codes for an integer key array, numbered in first-seen order.
+    Distinct keys are taken from a leading sample, then every row is looked
+    up; only keys missing from the sample get sorted in.
+    Returns (codes, first_rows).
+    """
+    key = key.astype(np.uint64, copy=False)
+    n = len(key)
+    distinct = np.unique(key[:FACTORIZE_SAMPLE])
+    pos = _positions(distinct, key)
+    missing = pos < 0
+    if missing.any():
+        distinct = np.union1d(distinct, key[missing])
+        pos = _positions(distinct, key)
+
+    first = np.full(len(distinct), n, dtype=np.int64)
+    np.minimum.at(first, pos, np.arange(n, dtype=np.int64))
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[pos], first[order]
+
+def _encode_field(data, buf, words, starts, ends, encoding, clean):
+    """
+    Dictionary-encode one text field without building a string per row.
+    Short fields (up to 7 bytes) are keyed exactly by their bytes and length;
+    longer ones by a 64-bit fingerprint, checked byte-for-byte against each
+    code's first row. Only one row per distinct key is decoded and cleaned.
+    Returns (int32 codes, values) with values in first-seen order, like
+    ColumnarTransactions.from_transactions.
+    """
+    widths = ends - starts
+    max_width = int(widths.max())
+    last = len(words) - 1
+
+    def word(offset, rows=slice(None)):
+        at = starts[rows] + offset
+        return words[np.minimum(at, last) if offset else at] & _BYTE_MASKS[np.clip(widths[rows] - offset, 0, 8)]
+
+    if max_width <= 7:
+        codes, first = _factorize(word(0) | (widths.astype(np.uint64) << np.uint64(56)))
+    else:
+        row_words = [word(offset) for offset in range(0, max_width, 8)]
+        key = widths.astype(np.uint64)
+        for w in row_words:
+            key = (key ^ w) * _FINGERPRINT_PRIME
+            key ^= key >> np.uint64(29)
+        codes, first = _factorize(key)
+
+        # Every row must match its code's first row byte for byte
+        collision = widths[first][codes] != widths
+        for offset, w in zip(range(0, max_width, 8), row_words):
+            collision |= word(offset, first)[codes] != w
+        if collision.any():
+            # Exact key: densify word by word (one sort per word)
+            key = widths.astype(np.int64)
+            for w in row_words:
+                word_codes = np.unique(w, return_inverse=True)[1]
+                key = np.unique(key * (int(word_codes.max()) + 1) + word_codes, return_inverse=True)[1]
+            codes, first = _factorize(key)
+
+    # Keys that clean to the same string (e.g. ' North' and 'North') share a code
+    lookup = {}
+    remap = np.array([
+        lookup.setdefault(clean(str(data[s:e], encoding)), len(lookup))
+        for s, e in zip(starts[first].tolist(), ends[first].tolist())
+    ], dtype=np.int32)
+    return remap[codes], list(lookup)
+
+def _parse_text_block(data, encoding, rejects, skip_header):
+    """Line-by-line parse, for blocks the byte scanner can't split (lone '\\r' newlines)"""
+    with io.TextIOWrapper(io.BytesIO(data), encoding=encoding) as text:
+        if skip_header:
+            next(text, None)
+        lines = (line.strip() for line in text)
+        return ColumnarTransactions.from_transactions(iter_transactions(filter(None, lines), rejects))
+
+def _pipes_aligned(pipes, starts, ends):
+    """True when every line has exactly 7 pipes – the common case, checked without a search"""
+    if len(pipes) != 7 * len(starts):
+        return False
+    matrix = pipes.reshape(-1, 7)
+    return bool((matrix[:, 0] >= starts).all() and (matrix[:, 6] < ends).all())
+
+def _empty_store():
+    store = ColumnarTransactions()
+    store.codes = {name: np.zeros(0, dtype=np.int32) for _, name, _ in TEXT_FIELDS}
+    store.values = {name: [] for _, name, _ in TEXT_FIELDS}
+    return store
+
+def _has_lone_cr(buf, size):
+    """True if some '\\r' in the first size bytes is not part of a '\\r\\n'"""
+    cr = np.flatnonzero(buf[:size] == 13)
+    if not len(cr):
+        return False
+    return cr[-1] == size - 1 or bool((buf[cr + 1] != 10).any())
+
+def parse_block(data, encoding, rejects, skip_header=False, size=None):
+    """
+    Parse a block of whole lines into a ColumnarTransactions.
+    data is bytes or a memoryview (e.g. of a memory map); only its first size
+    bytes (default: all) are parsed, and any bytes after them are used as
+    read-ahead padding instead of copying the block.
+    Same rules as parse_line; skipped lines are counted into rejects by reason.
+    """
+    size = len(data) if size is None else size
+    if len(data) - size >= LOOKAHEAD:
+        padded = data
+    else:
+        padded = bytes(data[:size]) + bytes(LOOKAHEAD)  # End of file: pad a copy
+    buf = np.frombuffer(padded, dtype=np.uint8)
+    if _has_lone_cr(buf, size):
+        return _parse_text_block(bytes(data[:size]), encoding, rejects, skip_header)
+    # Unaligned 8-byte view: words[i] is bytes i..i+7 as one integer
+    words = np.ndarray((len(padded) - 7,), dtype='<u8', buffer=padded, strides=(1,))
+
+    starts, ends = _line_bounds(buf, size, skip_header)
+    if not len(starts):
+        return _empty_store()
+    pipes = np.flatnonzero(buf[:size] == 124)
+    pipes = pipes[np.searchsorted(pipes, starts[0]):]  # Drop the header's
+
+    if _pipes_aligned(pipes, starts, ends):
+        first_pipe = np.arange(0, len(pipes), 7)
+    else:
+        first_pipe = np.searchsorted(pipes, starts)
+        counts = np.searchsorted(pipes, ends) - first_pipe
+        good = counts == 7
+        blank = sum(
+            1 for i in np.flatnonzero(counts == 0).tolist()
+            if not str(data[starts[i]:ends[i]], encoding).strip()
+        )
+        bad_count = int((~good).sum()) - blank
+        if bad_count:
+            rejects['field_count'] += bad_count
+        starts, ends, first_pipe = starts[good], ends[good], first_pipe[good]
+
+    # Field k spans bounds[k]+1 .. bounds[k+1] (bounds[0] is just before the line)
+    pipe_matrix = pipes[first_pipe[:, None] + np.arange(7)]
+    bounds = [starts - 1] + [pipe_matrix[:, k] for k in range(7)] + [ends]
+
+    def field(k):
+        return bounds[k] + 1, bounds[k + 1]
+
+    quantity, ok = _parse_numbers(buf, *field(4), is_float=False)
+    bad_quantity = _fallback_numbers(data, *field(4), quantity, ok, int, encoding)
+    unit_price, ok = _parse_numbers(buf, *field(5), is_float=True)
+    ok |= bad_quantity  # parse_line stops at the quantity
+    bad_price = _fallback_numbers(data, *field(5), unit_price, ok, float, encoding)
+
+    keep = ~(bad_quantity | bad_price)
+    if not keep.all():
+        rejects['bad_quantity'] += int(bad_quantity.sum())
+        if bad_price.any():
+            rejects['bad_unit_price'] += int(bad_price.sum())
+        bounds = [b[keep] for b in bounds]
+
+    if not keep.any():
+        return _empty_store()
+    store = ColumnarTransactions()
+    store.quantity = quantity[keep]
+    store.unit_price = unit_price[keep]
+    store.transaction_ids = _decode_field(buf, *field(0), encoding)
+    for k, name, clean in TEXT_FIELDS:
+        store.codes[name], store.values[name] = _encode_field(data, buf, words, *field(k), encoding, clean)
+    return store
+
+def scan_range(filename, start=0, end=None, encoding=None, rejects=None, block_size=PARSE_BLOCK_SIZE):
+    """
+    Parse a byte range of a plain (uncompressed) file straight out of a
+    memory map: blocks are zero-copy views, only field boundaries and
+    numerics are scanned per row, and text fields are decoded once per
+    distinct value. end must be a line boundary (default: end of file); the
+    header is skipped when start is 0. Encoding is sniffed if not given, moving
+    on to the next candidate if a byte past the sniffed prefix doesn't decode.
+    Returns a ColumnarTransactions; pass a Counter as rejects to count skipped lines.
+    """
+    _require_numpy()
+    rejects = Counter() if rejects is None else rejects
+    if encoding is not None:
+        return _scan(filename, start, end, encoding, rejects, block_size)
+    for encoding in sniff_encodings(filename):
+        attempt = Counter()
+        try:
+            store = _scan(filename, start, end, encoding, attempt, block_size)
+        except UnicodeDecodeError:
+            continue
+        rejects.update(attempt)
+        return store
+    raise UnicodeError(f"Could not decode {filename} with common encodings")
+
+def _scan(filename, start, end, encoding, rejects, block_size):
+    blocks = []
+    with map_file(filename) as mm:
+        for view, size in iter_mapped_blocks(mm, start, end, block_size, lookahead=LOOKAHEAD):
+            blocks.append(parse_block(view, encoding, rejects, skip_header=start == 0 and not blocks, size=size))
+            view.release()  # Parsed blocks hold no references into the map
+    return ColumnarTransactions.concat(blocks)
+
+@metrics.instrumented()
+def parse_sales_columns(filename, encoding=None, start=0, end=None, block_size=PARSE_BLOCK_SIZE):
+    """
+    Fast path for read_sales_data + parse_transactions: tokenizes the file
+    in bulk with NumPy straight into a ColumnarTransactions (see scan_range).
+    start/end select a byte range (line boundaries; the header is skipped when start is 0).
+    Returns (store, rejects) where rejects counts skipped lines by reason.
+    """
+    end = os.path.getsize(filename) if end is None else end
+    rejects = Counter()
+    store = scan_range(filename, start, end, encoding, rejects, block_size)
+
+    if metrics.is_enabled():
+        metrics.record_bytes(read=end - start)
+        metrics.record_rejects(rejects)
+        metrics.record_rows(rows_out=len(store))
+    skipped = ', '.join(f"{reason}: {count}" for reason, count in sorted(rejects.items()))
+    print(f"Parsed {len(store)} valid transactions" + (f" (skipped {skipped})" if skipped else ""))
+    return store, rejects
@@ -1,120 +1,495 @@
 # utils/file_handler.py
-def read_sales_data(filename):
+import bz2
+import codecs
+import gc
+import glob
+import gzip
+import os
+import sys
+from collections import Counter, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from utils import metrics
+
+__all__ = [
+    'Transaction', 'as_transaction', 'gc_paused', 'is_compressed', 'open_sales_file', 'expand_inputs',
+    'input_signature', 'detect_encoding', 'iter_sales_lines', 'read_partition', 'iter_sales_files',
+    'read_sales_data', 'parse_line', 'reject_reason', 'iter_transactions', 'stream_transactions',
+    'parse_transactions', 'is_valid_transaction', 'validation_failure', 'passes_filters',
+    'build_filter_summary', 'validate_and_filter_transactions', 'sniff_encodings', 'ENCODINGS', 'READ_CHUNK_SIZE', 'SNIFF_SIZE',
+    'COMPRESSED_OPENERS', 'INPUT_SUFFIXES', 'READ_WORKERS', 'TRANSACTION_FIELDS'
+]
+
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+READ_CHUNK_SIZE = 1 << 20  # bytes per read while checking an encoding
+SNIFF_SIZE = 64 * 1024     # prefix every candidate encoding is tried on
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open}
+INPUT_SUFFIXES = ('.txt', '.csv', '.gz', '.bz2')  # files picked up from input directories
+READ_WORKERS = 4           # partitions read concurrently by iter_sales_files
+TRANSACTION_FIELDS = (
+    'Transaction_ID', 'Date', 'Product_ID', 'Product_Name',
+    'Quantity', 'Unit_Price', 'Customer_ID', 'Region'
+)
+_FIELD_SET = frozenset(TRANSACTION_FIELDS)
+
+class Transaction(Mapping):
     """
-    Reads sales data from file handling encoding issues.
-    Returns list of raw lines (strings), skipping header and empty lines.
+    Compact transaction record: __slots__ instead of a per-row dict.
+    Fields are attributes (t.Quantity) and, for code written against the
+    old dicts, keys (t['Quantity']); amount (Quantity * Unit_Price) is
+    computed on access, so it never goes stale and costs no storage.
+    Compares equal to the equivalent transaction dict.
+    """
+    __slots__ = TRANSACTION_FIELDS
+
+    def __init__(self, Transaction_ID, Date, Product_ID, Product_Name, Quantity, Unit_Price, Customer_ID, Region):
+        self.Transaction_ID = Transaction_ID
+        self.Date = Date
+        self.Product_ID = Product_ID
+        self.Product_Name = Product_Name
+        self.Quantity = Quantity
+        self.Unit_Price = Unit_Price
+        self.Customer_ID = Customer_ID
+        self.Region = Region
+
+    @property
+    def amount(self):
+        return self.Quantity * self.Unit_Price
+
+    @classmethod
+    def from_mapping(cls, t):
+        """Build a record from a transaction dict (or any mapping with the eight fields)"""
+        return cls(*[t[field] for field in TRANSACTION_FIELDS])
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def __iter__(self):
+        return iter(TRANSACTION_FIELDS)
+
+    def __len__(self):
+        return len(TRANSACTION_FIELDS)
+
+    def copy(self):
+        """Plain dict of the fields"""
+        return {field: getattr(self, field) for field in TRANSACTION_FIELDS}
+
+    def __reduce__(self):
+        return (Transaction, tuple(getattr(self, field) for field in TRANSACTION_FIELDS))
+
+    def __repr__(self):
+        return f"Transaction({self.copy()!r})"
+
+def as_transaction(t):
+    """t as a Transaction record; dicts are converted (migration helper)"""
+    return t if t.__class__ is Transaction else Transaction.from_mapping(t)
+
+@contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while building many records.
+    Records hold no reference cycles, but as tracked objects each batch of
+    allocations would otherwise trigger collections that rescan all of them.
     """
+    was_enabled = gc.isenabled()
+    gc.disable()
     try:
-        # Try multiple encodings
-        encodings = ['utf-8', 'latin-1', 'cp1252']
-        raw_lines = []
-        
-        for encoding in encodings:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def is_compressed(filename):
+    return os.path.splitext(filename)[1].lower() in COMPRESSED_OPENERS
+
+def open_sales_file(filename, mode='rb', encoding=None):
+    """open() that transparently decompresses .gz and .bz2 files"""
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(filename)[1].lower())
+    if opener is None:
+        return open(filename, mode, encoding=encoding)
+    return opener(filename, mode if 'b' in mode else mode + 't', encoding=encoding)
+
+def expand_inputs(paths):
+    """
+    Input files from a path or list of paths, in order and without repeats:
+    directories give their sales files (INPUT_SUFFIXES, sorted), glob patterns
+    their sorted matches, and anything else is taken as a file name.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in map(os.fspath, paths):
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(INPUT_SUFFIXES) and os.path.isfile(os.path.join(path, name))
+            )
+        elif glob.has_magic(path):
+            files += sorted(name for name in glob.glob(path, recursive=True) if os.path.isfile(name))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+def input_signature(files):
+    """(absolute path, size, mtime_ns) per file – changes whenever an input is rewritten"""
+    signature = []
+    for filename in files:
+        st = os.stat(filename)
+        signature.append((os.path.abspath(filename), st.st_size, st.st_mtime_ns))
+    return signature
+
+def _decodes_any_bytes(encoding):
+    """True for single-byte codecs that map all 256 byte values (latin-1) – they can't fail"""
+    try:
+        return len(bytes(range(256)).decode(encoding)) == 256
+    except UnicodeDecodeError:
+        return False
+
+def sniff_encodings(filename, encodings=ENCODINGS, sniff_size=SNIFF_SIZE):
+    """The encodings (in order) that decode the first sniff_size bytes of the file"""
+    with open_sales_file(filename) as f:
+        prefix = f.read(sniff_size)
+    at_end = len(prefix) < sniff_size
+    candidates = []
+    for encoding in encodings:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=at_end)
+        except UnicodeDecodeError:
+            continue
+        candidates.append(encoding)
+    return candidates
+
+def detect_encoding(filename, encodings=ENCODINGS, sniff_size=SNIFF_SIZE, whole_file=False):
+    """
+    Returns the first encoding that decodes a prefix of sniff_size bytes, or None.
+    The rest is only decoded by the reader, which moves on to the next
+    candidate if a later byte doesn't decode (see iter_sales_lines).
+    whole_file=True returns the first encoding that decodes the whole file
+    instead, checking the rest in fixed-size chunks (for callers that can't
+    start over); one that decodes any bytes (latin-1) is accepted without reading on.
+    """
+    candidates = sniff_encodings(filename, encodings, sniff_size)
+    if not whole_file:
+        return candidates[0] if candidates else None
+    with open_sales_file(filename) as f:
+        for encoding in candidates:
+            if _decodes_any_bytes(encoding):
+                return encoding
+            decoder = codecs.getincrementaldecoder(encoding)()
+            f.seek(0)
             try:
-                with open(filename, 'r', encoding=encoding) as f:
-                    lines = f.readlines()
-                raw_lines = [line.strip() for line in lines[1:] if line.strip()]  # Skip header, empty
-                print(f"Successfully read {len(raw_lines)} transactions using {encoding}")
-                return raw_lines
+                while True:
+                    chunk = f.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        decoder.decode(b'', final=True)
+                        return encoding
+                    decoder.decode(chunk)
             except UnicodeDecodeError:
                 continue
-        
-        print("Could not decode file with common encodings")
-        return []
+    return None
+
+def _decoding_error(filename):
+    return UnicodeError(f"Could not decode {filename} with common encodings")
+
+def iter_sales_lines(filename, encoding=None):
+    """
+    Yields raw lines (strings) straight from the file handle,
+    skipping header and empty lines. .gz and .bz2 files are decompressed on the fly.
+    Encoding is sniffed if not given; if a later byte doesn't decode, reading
+    carries on after the lines already yielded with the next candidate encoding.
+    """
+    if encoding is not None:
+        yield from _read_lines(filename, encoding)
+        return
+    yielded = 0
+    for encoding in sniff_encodings(filename):
+        try:
+            for line in islice(_read_lines(filename, encoding), yielded, None):
+                yield line
+                yielded += 1
+            return
+        except UnicodeDecodeError:
+            continue
+    raise _decoding_error(filename)
+
+def _read_lines(filename, encoding):
+    with open_sales_file(filename, 'r', encoding=encoding) as f:
+        next(f, None)  # Skip header
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+def read_partition(filename):
+    """(raw lines, encoding) of one file, with the first candidate encoding that decodes all of it"""
+    for encoding in sniff_encodings(filename):
+        try:
+            return list(_read_lines(filename, encoding)), encoding
+        except UnicodeDecodeError:
+            continue  # A byte past the sniffed prefix: read it again with the next candidate
+    raise _decoding_error(filename)
+
+def iter_sales_files(paths, workers=READ_WORKERS, encodings_used=None):
+    """
+    One stream of raw lines from many files (see expand_inputs), in input order.
+    Up to workers partitions are read, decompressed and decoded concurrently in
+    threads, with at most workers + 1 partitions held in memory at a time.
+    Pass a Counter as encodings_used to count files per detected encoding.
+    """
+    files = expand_inputs(paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        for filename in files:
+            pending.append(pool.submit(read_partition, filename))
+            if len(pending) > workers:
+                yield from _partition_lines(pending.popleft(), encodings_used)
+        while pending:
+            yield from _partition_lines(pending.popleft(), encodings_used)
+
+def _partition_lines(future, encodings_used):
+    lines, encoding = future.result()
+    if encodings_used is not None:
+        encodings_used[encoding] += 1
+    return lines
+
+@metrics.instrumented()
+def read_sales_data(filename):
+    """
+    Reads sales data from file handling encoding issues.
+    Returns list of raw lines (strings), skipping header and empty lines.
+    filename may also be a directory, a glob or a list of them (see expand_inputs);
+    the files are read concurrently and their lines joined in order.
+    """
+    files = expand_inputs(filename)
+    if len(files) != 1:
+        return _read_sales_files(files)
+    filename = files[0]
+    try:
+        raw_lines, encoding = read_partition(filename)
+        if metrics.is_enabled():
+            metrics.record_bytes(read=os.path.getsize(filename))
+        print(f"Successfully read {len(raw_lines)} transactions using {encoding}")
+        return raw_lines
         
     except FileNotFoundError:
         print(f"File not found: {filename}. Ensure data/sales_data.txt exists.")
         return []
+    except UnicodeError:
+        print("Could not decode file with common encodings")
+        return []
     except Exception as e:
         print(f"Error reading file: {e}")
         return []
 
-def parse_transactions(raw_lines):
+def _read_sales_files(files):
+    if not files:
+        print("No input files found")
+        return []
+    encodings_used = Counter()
+    try:
+        raw_lines = list(iter_sales_files(files, encodings_used=encodings_used))
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}")
+        return []
+    except Exception as e:
+        print(f"Error reading files: {e}")
+        return []
+    if metrics.is_enabled():
+        metrics.record_bytes(read=sum(os.path.getsize(filename) for filename in files))
+    used = ', '.join(f"{encoding}: {count}" for encoding, count in encodings_used.items())
+    print(f"Successfully read {len(raw_lines)} transactions from {len(files)} files ({used})")
+    return raw_lines
+
+def parse_line(line):
     """
-    Parses raw lines into clean list of dictionaries.
-    Handles commas in ProductName and numeric fields.
+    Parses one raw line into a Transaction record.
+    Returns None for malformed rows (wrong field count, invalid numbers).
+    Repeating text fields are interned, so rows share one copy of each value.
     """
-    transactions = []
-    
-    for line in raw_lines:
-        fields = line.split('|')
-        if len(fields) != 8:
-            continue  # Skip malformed rows
-            
-        TransactionID, Date, ProductID, ProductName, Quantity_str, UnitPrice_str, CustomerID, Region = fields
+    fields = line.split('|')
+    if len(fields) != 8:
+        return None  # Skip malformed rows
         
-        # Clean ProductName: replace commas with space
-        ProductName = ProductName.replace(',', ' ').strip()
+    TransactionID, Date, ProductID, ProductName, Quantity_str, UnitPrice_str, CustomerID, Region = fields
+    
+    # Clean ProductName: replace commas with space
+    ProductName = ProductName.replace(',', ' ').strip()
+    
+    # Clean numerics: remove commas and convert
+    try:
+        Quantity = int(Quantity_str.replace(',', ''))
+        UnitPrice = float(UnitPrice_str.replace(',', ''))
+    except ValueError:
+        return None  # Skip invalid numbers
         
-        # Clean numerics: remove commas and convert
-        try:
-            Quantity = int(Quantity_str.replace(',', ''))
-            UnitPrice = float(UnitPrice_str.replace(',', ''))
-        except ValueError:
-            continue  # Skip invalid numbers
-            
-        # Create dict
-        transaction = {
-            'Transaction_ID': TransactionID.strip(),
-            'Date': Date.strip(),
-            'Product_ID': ProductID.strip(),
-            'Product_Name': ProductName,
-            'Quantity': Quantity,
-            'Unit_Price': UnitPrice,
-            'Customer_ID': CustomerID.strip(),
-            'Region': Region.strip()
-        }
-        transactions.append(transaction)
+    intern = sys.intern
+    return Transaction(
+        TransactionID.strip(),
+        intern(Date.strip()),
+        intern(ProductID.strip()),
+        intern(ProductName),
+        Quantity,
+        UnitPrice,
+        intern(CustomerID.strip()),
+        intern(Region.strip())
+    )
+
+def reject_reason(line):
+    """Why parse_line rejects a line: 'field_count', 'bad_quantity' or 'bad_unit_price' (None if it parses)"""
+    fields = line.split('|')
+    if len(fields) != 8:
+        return 'field_count'
+    try:
+        int(fields[4].replace(',', ''))
+    except ValueError:
+        return 'bad_quantity'
+    try:
+        float(fields[5].replace(',', ''))
+    except ValueError:
+        return 'bad_unit_price'
+    return None
+
+def iter_transactions(raw_lines, rejects=None):
+    """
+    Yields parsed Transaction records from any iterable of raw lines.
+    Pass a Counter as rejects to count skipped lines by reason.
+    """
+    for line in raw_lines:
+        transaction = parse_line(line)
+        if transaction is not None:
+            yield transaction
+        elif rejects is not None:
+            rejects[reject_reason(line)] += 1
+
+def stream_transactions(filename, batch_size=None, encoding=None, workers=READ_WORKERS):
+    """
+    Streams parsed transactions from file with bounded memory.
+    Yields single records, or lists of up to batch_size records if batch_size is set.
+    Several files (directory, glob or list) are read workers at a time and
+    streamed in order, each with its own detected encoding.
+    """
+    files = expand_inputs(filename)
+    if len(files) == 1:
+        transactions = iter_transactions(iter_sales_lines(files[0], encoding))
+    else:
+        transactions = iter_transactions(iter_sales_files(files, workers))
+    if not batch_size:
+        yield from transactions
+        return
     
+    batch = []
+    for transaction in transactions:
+        batch.append(transaction)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@metrics.instrumented()
+def parse_transactions(raw_lines):
+    """
+    Parses raw lines into a clean list of Transaction records.
+    Handles commas in ProductName and numeric fields.
+    """
+    rejects = Counter() if metrics.is_enabled() else None
+    with gc_paused():
+        transactions = list(iter_transactions(raw_lines, rejects))
+    if rejects:
+        metrics.record_rejects(rejects)
     print(f"Parsed {len(transactions)} valid transactions")
     return transactions
 
+def is_valid_transaction(t):
+    """Validation rules: positive qty/price, customer and region present, ID starts with T"""
+    if t.__class__ is not Transaction:
+        t = Transaction.from_mapping(t)
+    return not (t.Quantity <= 0 or 
+                t.Unit_Price <= 0 or 
+                not t.Customer_ID or 
+                not t.Region or 
+                not t.Transaction_ID.startswith('T'))
+
+def validation_failure(t, region=None, min_amount=None, max_amount=None):
+    """Reason a transaction is dropped by validation or filters, or None if it is kept"""
+    t = as_transaction(t)
+    if t.Quantity <= 0:
+        return 'non_positive_quantity'
+    if t.Unit_Price <= 0:
+        return 'non_positive_price'
+    if not t.Customer_ID:
+        return 'missing_customer'
+    if not t.Region:
+        return 'missing_region'
+    if not t.Transaction_ID.startswith('T'):
+        return 'bad_transaction_id'
+    if region and t.Region != region:
+        return 'filtered_region'
+    if not passes_filters(t, None, min_amount, max_amount):
+        return 'filtered_amount'
+    return None
+
+def passes_filters(t, region=None, min_amount=None, max_amount=None):
+    """Optional region and transaction-amount filters"""
+    if t.__class__ is not Transaction:
+        t = Transaction.from_mapping(t)
+    if region and t.Region != region:
+        return False
+    amount = t.amount
+    if min_amount and amount < min_amount:
+        return False
+    if max_amount and amount > max_amount:
+        return False
+    return True
+
+def build_filter_summary(total_input, invalid_count, final_count, region=None, min_amount=None, max_amount=None):
+    """Summary dict returned alongside filtered transactions"""
+    return {
+        'total_input': total_input,
+        'invalid': invalid_count,
+        'filtered_by_region': 1 if region else 0,
+        'filtered_by_amount': 1 if min_amount or max_amount else 0,
+        'final_count': final_count
+    }
+
+@metrics.instrumented()
 def validate_and_filter_transactions(transactions, region=None, min_amount=None, max_amount=None):
     """
     Validates transactions and applies optional filters.
-    Returns (valid_transactions, invalid_count, filter_summary)
+    Returns (valid_transactions, invalid_count, filter_summary); the kept rows
+    are the input objects themselves, so dicts come back as dicts.
     """
+    transactions = list(transactions)
+    records = list(map(as_transaction, transactions))
+    
     # Print available info
-    if transactions:
-        regions = list(set(t['Region'] for t in transactions if t['Region']))
-        amounts = [t['Quantity'] * t['Unit_Price'] for t in transactions]
+    if records:
+        regions = list(set(t.Region for t in records if t.Region))
+        amounts = [t.amount for t in records]
         print(f"Available Regions: {', '.join(regions)}")
         print(f"Transaction Amount Range: {min(amounts):,.0f} - {max(amounts):,.0f}")
     
-    valid = []
-    invalid_count = 0
+    filtering = region or min_amount or max_amount
+    valid = [
+        t for t, record in zip(transactions, records)
+        if is_valid_transaction(record) and (not filtering or passes_filters(record, region, min_amount, max_amount))
+    ]
+    invalid_count = len(transactions) - len(valid)
+    if invalid_count and metrics.is_enabled():
+        metrics.record_rejects(Counter(
+            validation_failure(t, region, min_amount, max_amount) for t in records
+            if not is_valid_transaction(t) or not passes_filters(t, region, min_amount, max_amount)
+        ))
     
-    for t in transactions:
-        # Validation rules
-        amount = t['Quantity'] * t['Unit_Price']
-        if (t['Quantity'] <= 0 or 
-            t['Unit_Price'] <= 0 or 
-            not t['Customer_ID'] or 
-            not t['Region'] or 
-            not t['Transaction_ID'].startswith('T')):
-            invalid_count += 1
-            continue
-        
-        # Filters
-        if region and t['Region'] != region:
-            invalid_count += 1
-            continue
-        if min_amount and amount < min_amount:
-            invalid_count += 1
-            continue
-        if max_amount and amount > max_amount:
-            invalid_count += 1
-            continue
-            
-        valid.append(t)
-    
-    summary = {
-        'total_input': len(transactions),
-        'invalid': invalid_count,
-        'filtered_by_region': 1 if region else 0,
-        'filtered_by_amount': 1 if min_amount or max_amount else 0,
-        'final_count': len(valid)
-    }
+    summary = build_filter_summary(len(transactions), invalid_count, len(valid), region, min_amount, max_amount)
     
     print(f"Valid: {len(valid)}, Invalid: {invalid_count}")
     return valid, invalid_count, summary
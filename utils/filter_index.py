@@ -0,0 +1,107 @@
+# utils/filter_index.py
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import chain
+
+from utils import metrics
+from utils.file_handler import as_transaction, is_valid_transaction, validation_failure, build_filter_summary
+
+__all__ = ['TransactionIndex', 'build_transaction_index']
+
+class TransactionIndex:
+    """
+    Validates transactions once and indexes them for repeated filtering.
+    - by_region: region -> ascending row positions
+    - amounts / amount_order: valid rows sorted by amount, so min/max
+      filters are two bisects instead of a scan
+    - nan_rows: rows with a NaN amount, kept out of the sort; like
+      passes_filters (every comparison is False) they pass any amount filter
+    filter() returns exactly what validate_and_filter_transactions returns.
+    """
+
+    def __init__(self, transactions):
+        transactions = list(map(as_transaction, transactions))
+        self.total_input = len(transactions)
+        self.regions = sorted(set(t.Region for t in transactions if t.Region))
+        amounts = [t.amount for t in transactions]
+        self.amount_range = (min(amounts), max(amounts)) if amounts else None
+
+        self.valid = [t for t in transactions if is_valid_transaction(t)]
+        if metrics.is_enabled() and len(self.valid) < self.total_input:
+            metrics.record_rejects(Counter(
+                validation_failure(t) for t in transactions if not is_valid_transaction(t)
+            ))
+        self.by_region = {}
+        for i, t in enumerate(self.valid):
+            self.by_region.setdefault(t.Region, []).append(i)
+
+        valid_amounts = [t.amount for t in self.valid]
+        self.nan_rows = [i for i, amount in enumerate(valid_amounts) if amount != amount]
+        ordered = [i for i, amount in enumerate(valid_amounts) if amount == amount]
+        self.amount_order = sorted(ordered, key=valid_amounts.__getitem__)
+        self.amounts = [valid_amounts[i] for i in self.amount_order]
+
+    def describe(self):
+        """Print available regions and the amount range (as validation does)"""
+        if self.amount_range is not None:
+            print(f"Available Regions: {', '.join(self.regions)}")
+            print(f"Transaction Amount Range: {self.amount_range[0]:,.0f} - {self.amount_range[1]:,.0f}")
+
+    def _amount_slice(self, min_amount, max_amount):
+        lo = bisect_left(self.amounts, min_amount) if min_amount else 0
+        hi = bisect_right(self.amounts, max_amount) if max_amount else len(self.amounts)
+        return lo, max(lo, hi)
+
+    def positions(self, region=None, min_amount=None, max_amount=None):
+        """Row positions (into self.valid, ascending) that pass the filters"""
+        if not (min_amount or max_amount):
+            if region:
+                return self.by_region.get(region, [])
+            return range(len(self.valid))
+
+        lo, hi = self._amount_slice(min_amount, max_amount)
+        if not region:
+            return sorted(self.amount_order[lo:hi] + self.nan_rows)
+
+        region_rows = self.by_region.get(region, [])
+        if len(region_rows) <= hi - lo:
+            # Region is the smaller side: check amounts on its rows directly
+            return [
+                i for i in region_rows
+                if not (min_amount and self._amount(i) < min_amount)
+                and not (max_amount and self._amount(i) > max_amount)
+            ]
+        return sorted(i for i in chain(self.amount_order[lo:hi], self.nan_rows) if self.valid[i].Region == region)
+
+    def _amount(self, i):
+        return self.valid[i].amount
+
+    @metrics.instrumented('index_filter')
+    def filter(self, region=None, min_amount=None, max_amount=None):
+        """
+        Indexed equivalent of validate_and_filter_transactions.
+        Returns (valid_transactions, invalid_count, filter_summary)
+        """
+        valid = self.valid
+        metrics.record_rows(rows_in=len(valid))
+        if region or min_amount or max_amount:
+            valid = [valid[i] for i in self.positions(region, min_amount, max_amount)]
+            if metrics.is_enabled():
+                kept = set(map(id, valid))
+                metrics.record_rejects(Counter(
+                    validation_failure(t, region, min_amount, max_amount) for t in self.valid if id(t) not in kept
+                ))
+        else:
+            valid = list(valid)
+        invalid_count = self.total_input - len(valid)
+        summary = build_filter_summary(self.total_input, invalid_count, len(valid), region, min_amount, max_amount)
+
+        print(f"Valid: {len(valid)}, Invalid: {invalid_count}")
+        return valid, invalid_count, summary
+
+@metrics.instrumented()
+def build_transaction_index(transactions):
+    """Validate once and build region/amount indexes"""
+    index = TransactionIndex(transactions)
+    index.describe()
+    return index
@@ -0,0 +1,78 @@
+# utils/filter_specs.py
+import json
+import math
+import re
+
+__all__ = [
+    'make_spec', 'parse_filter_spec', 'load_filter_specs', 'check_unique_names', 'SPEC_KEYS', 'SPEC_NAME'
+]
+
+SPEC_KEYS = {'region': 'region', 'min': 'min_amount', 'max': 'max_amount'}
+SPEC_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')  # names end up in report file names
+
+def make_spec(name, region=None, min_amount=None, max_amount=None):
+    """A filter spec: a named (region, min_amount, max_amount) filter, None meaning no limit"""
+    if not SPEC_NAME.match(name or ''):
+        raise ValueError(f"Invalid spec name: {name!r} (letters, digits, '_', '-', '.')")
+    if min_amount is not None and max_amount is not None and min_amount > max_amount:
+        raise ValueError(f"Spec {name}: min_amount {min_amount} is above max_amount {max_amount}")
+    return {'name': name, 'region': region or None, 'min_amount': min_amount, 'max_amount': max_amount}
+
+def parse_filter_spec(text):
+    """
+    Parse 'NAME' or 'NAME:key=value,...' with keys region, min, max,
+    e.g. 'north-big:region=North,min=50000'.
+    """
+    name, _, options = text.partition(':')
+    fields = {}
+    for option in filter(None, options.split(',')):
+        key, sep, value = option.partition('=')
+        key = key.strip()
+        if not sep or key not in SPEC_KEYS:
+            raise ValueError(f"Bad filter option {option!r} in {text!r} (use {', '.join(k + '=' for k in SPEC_KEYS)})")
+        value = value.strip()
+        if key == 'region':
+            fields['region'] = value
+        else:
+            try:
+                fields[SPEC_KEYS[key]] = float(value)
+            except ValueError:
+                raise ValueError(f"Bad amount {value!r} in {text!r}") from None
+    return make_spec(name.strip(), **fields)
+
+def load_filter_specs(filename):
+    """
+    Specs from a JSON file: a list of objects with name and optional
+    region, min_amount, max_amount.
+    """
+    with open(filename, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{filename}: expected a JSON list of filter specs")
+    specs = []
+    for entry in entries:
+        if not isinstance(entry, dict) or set(entry) - {'name', *SPEC_KEYS.values()}:
+            raise ValueError(f"{filename}: bad filter spec {entry!r}")
+        if not isinstance(entry.get('name'), str):
+            raise ValueError(f"{filename}: filter spec {entry!r} needs a string name")
+        if not isinstance(entry.get('region') or '', str):
+            raise ValueError(f"{filename}: region must be a string in {entry!r}")
+        fields = dict(entry)
+        for key in ('min_amount', 'max_amount'):
+            value = entry.get(key)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"{filename}: {key} must be a number in {entry!r}")
+            fields[key] = float(value)
+        specs.append(make_spec(**fields))
+    return specs
+
+def check_unique_names(specs):
+    """Spec names key the output files, so they must not repeat"""
+    seen = set()
+    for spec in specs:
+        if spec['name'] in seen:
+            raise ValueError(f"Duplicate filter spec name: {spec['name']}")
+        seen.add(spec['name'])
+    return specs
@@ -0,0 +1,183 @@
+# utils/incremental.py
+import hashlib
+import os
+import pickle
+import time
+
+from utils import metrics
+from utils.file_handler import detect_encoding, build_filter_summary
+from utils.parallel import aggregate_range, parallel_aggregate
+
+__all__ = [
+    'last_line_boundary', 'prefix_checksum', 'verify_prefix', 'load_state', 'save_state', 'incremental_aggregate',
+    'STATE_FILE', 'STATE_VERSION', 'CHECKSUM_BLOCK'
+]
+
+STATE_FILE = 'data/aggregate_state.pkl'
+STATE_VERSION = 6  # 2: sketch mode, 3: revenue in cents, 4: block checksums, 5: exact revenue, 6: file identity
+CHECKSUM_BLOCK = 4 * 1024 * 1024  # bytes of the processed prefix per SHA-256 digest
+RACY_MTIME_NS = 2 * 10 ** 9  # an mtime this close to the save may not change on a quick same-size rewrite
+SCAN_STEP = 64 * 1024  # bytes read at a time when looking back for the last newline
+
+def last_line_boundary(filename):
+    """Offset just past the last newline – a trailing partial line is left for the next run"""
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        pos = size
+        while pos > 0:
+            step = min(SCAN_STEP, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                return pos - step + newline + 1
+            pos -= step
+    return 0
+
+def prefix_checksum(filename, offset, known=()):
+    """
+    SHA-256 digests of [0, offset) in CHECKSUM_BLOCK blocks (the last may be partial).
+    known is a checksum of a shorter prefix already verified against this file:
+    its full blocks are reused, so extending it only hashes the new bytes.
+    """
+    digests = list(known[:-1])[:offset // CHECKSUM_BLOCK]  # All but the last known block are full
+    pos = len(digests) * CHECKSUM_BLOCK
+    with open(filename, 'rb') as f:
+        f.seek(pos)
+        while pos < offset:
+            block = f.read(min(CHECKSUM_BLOCK, offset - pos))
+            if not block:
+                break  # File is shorter than offset
+            digests.append(hashlib.sha256(block).digest())
+            pos += len(block)
+    return digests
+
+def verify_prefix(filename, offset, checksum, sample=0):
+    """
+    Spot-check a prefix_checksum of [0, offset) against the file: the first
+    and last blocks plus block number sample (mod the count), so a check
+    hashes at most three blocks however large the file is. Rotating sample
+    across runs eventually covers every block.
+    """
+    indexes = sorted({0, len(checksum) - 1, sample % len(checksum)}) if checksum else ()
+    with open(filename, 'rb') as f:
+        for index in indexes:
+            start = index * CHECKSUM_BLOCK
+            f.seek(start)
+            if hashlib.sha256(f.read(min(CHECKSUM_BLOCK, offset - start))).digest() != checksum[index]:
+                return False
+    return True
+
+def _file_stat(filename):
+    """(device and inode, size, mtime in ns) – what a rewrite or rotation changes"""
+    st = os.stat(filename)
+    return (st.st_dev, st.st_ino), st.st_size, st.st_mtime_ns
+
+def load_state(state_file=STATE_FILE):
+    """Load persisted aggregate state, or None if missing/unreadable"""
+    try:
+        with open(state_file, 'rb') as f:
+            state = pickle.load(f)
+        return state if state.get('version') == STATE_VERSION else None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def save_state(state, state_file=STATE_FILE):
+    """Persist state atomically"""
+    directory = os.path.dirname(state_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f"{state_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, state_file)
+
+def _rebuild_reason(state, filename, filters, end, stat, distinct_error=None):
+    if state is None:
+        return "no saved state"
+    if state['source'] != os.path.abspath(filename):
+        return "different source file"
+    if state['filters'] != filters:
+        return "different filters"
+    if state['aggregate'].distinct_error != distinct_error:
+        return "different sketch mode"
+    file_id, size, mtime_ns = stat
+    if file_id != state['file_id']:
+        return "file was replaced"
+    if end < state['offset']:
+        return "file shrank"
+    if (size, mtime_ns) == (state['size'], state['mtime_ns']):
+        return None  # Untouched since the last run
+    if not verify_prefix(filename, state['offset'], state['checksum'], state['runs']):
+        return "processed prefix changed"
+    return None
+
+@metrics.instrumented()
+def incremental_aggregate(filename, state_file=STATE_FILE, region=None, min_amount=None, max_amount=None, workers=1,
+                          distinct_error=None):
+    """
+    Aggregate an append-only sales file, reusing the state saved by the previous run.
+    Only bytes appended since then are parsed and merged; if the already-processed
+    prefix changed, the state is rebuilt from scratch. Returns (aggregate, filter_summary).
+    The prefix is checked without rereading it: a new inode (rotation), a smaller
+    file or a mismatch in a few sampled blocks (see verify_prefix) forces a
+    rebuild, and an unchanged size and mtime skips hashing altogether.
+    distinct_error keeps the state in sketch mode (bounded memory for distinct counts).
+    """
+    filters = (region, min_amount, max_amount)
+    stat = _file_stat(filename)
+    end = last_line_boundary(filename)
+    state = load_state(state_file)
+    reason = _rebuild_reason(state, filename, filters, end, stat, distinct_error)
+
+    if reason is None:
+        try:
+            new_results, parsed, invalid = aggregate_range(
+                filename, state['offset'], end, state['encoding'], region, min_amount, max_amount, distinct_error
+            )
+        except UnicodeDecodeError:
+            reason = f"appended data is not {state['encoding']}"
+        else:
+            print(f"Incremental update: {end - state['offset']:,} new bytes, {parsed} new transactions")
+            state['aggregate'].merge(new_results)
+            state['parsed_count'] += parsed
+            state['invalid_count'] += invalid
+
+    if reason is not None:
+        print(f"Full rebuild ({reason})")
+        encoding = detect_encoding(filename, whole_file=True)  # Can't start over halfway
+        if encoding is None:
+            print("Could not decode file with common encodings")
+            return None, None
+        if workers == 1:
+            results, parsed, invalid = aggregate_range(filename, 0, end, encoding, region, min_amount, max_amount,
+                                                       distinct_error)
+        else:
+            results, summary = parallel_aggregate(filename, workers, region, min_amount, max_amount,
+                                                  end=end, encoding=encoding, distinct_error=distinct_error)
+            parsed, invalid = summary['total_input'], summary['invalid']
+        state = {
+            'version': STATE_VERSION,
+            'source': os.path.abspath(filename),
+            'filters': filters,
+            'encoding': encoding,
+            'aggregate': results,
+            'parsed_count': parsed,
+            'invalid_count': invalid,
+            'runs': 0
+        }
+
+    known = state['checksum'] if reason is None else ()  # Prefix checked above: only hash what was appended
+    state['offset'] = end
+    state['checksum'] = prefix_checksum(filename, end, known)
+    state['file_id'], state['size'], state['mtime_ns'] = stat
+    if time.time_ns() - state['mtime_ns'] < RACY_MTIME_NS:
+        state['mtime_ns'] = None  # Too recent to prove a later rewrite changed it: verify next time
+    state['runs'] += 1
+    save_state(state, state_file)
+
+    results = state['aggregate']
+    summary = build_filter_summary(state['parsed_count'], state['invalid_count'], results.transaction_count,
+                                   region, min_amount, max_amount)
+    print(f"Valid: {results.transaction_count}, Invalid: {state['invalid_count']}")
+    return results, summary
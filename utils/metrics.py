@@ -0,0 +1,199 @@
+# utils/metrics.py
+"""
+Lightweight per-stage instrumentation.
+
+Off by default. Enable with SALES_METRICS=1 (or metrics.enable()). When on,
+every instrumented stage records wall/CPU time, rows in/out, rejects by
+reason, peak RSS and bytes read/written. SALES_METRICS_FILE sets where the
+JSON run summary goes; SALES_PROFILE=<path> also dumps a cProfile of the run.
+When off, an instrumented call costs one flag check.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+__all__ = [
+    'enable', 'disable', 'is_enabled', 'reset', 'stage', 'record_rejects', 'record_bytes', 'record_rows',
+    'instrumented', 'summary', 'export_json', 'run', 'ENV_VAR', 'FILE_ENV_VAR', 'PROFILE_ENV_VAR',
+    'DEFAULT_SUMMARY_FILE'
+]
+
+ENV_VAR = 'SALES_METRICS'
+FILE_ENV_VAR = 'SALES_METRICS_FILE'
+PROFILE_ENV_VAR = 'SALES_PROFILE'
+DEFAULT_SUMMARY_FILE = 'output/run_metrics.json'
+
+_enabled = os.environ.get(ENV_VAR, '').lower() not in ('', '0', 'false', 'no')
+_stages = []
+_lock = threading.Lock()
+_local = threading.local()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Forget recorded stages"""
+    with _lock:
+        _stages.clear()
+
+def _peak_rss_mb():
+    """Process RSS high-water mark in MB (VmHWM on Linux, ru_maxrss elsewhere)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Time a block as a named stage; yields the record (or None when disabled)"""
+    if not _enabled:
+        yield None
+        return
+    stack = _stack()
+    record = {
+        'stage': name,
+        'parent': stack[-1]['stage'] if stack else None,
+        'rows_in': rows_in,
+        'rows_out': None,
+        'rejects': Counter(),
+        'bytes_read': 0,
+        'bytes_written': 0,
+    }
+    stack.append(record)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_s'] = round(time.perf_counter() - wall, 6)
+        record['cpu_s'] = round(time.process_time() - cpu, 6)
+        record['peak_rss_mb'] = _peak_rss_mb()
+        record['rejects'] = dict(record['rejects'])
+        stack.pop()
+        with _lock:
+            _stages.append(record)
+
+def _current():
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+def record_rejects(reason_counts):
+    """Add {reason: count} to the current stage"""
+    record = _current()
+    if record is not None:
+        record['rejects'].update(reason_counts)
+
+def record_bytes(read=0, written=0):
+    record = _current()
+    if record is not None:
+        record['bytes_read'] += read
+        record['bytes_written'] += written
+
+def record_rows(rows_in=None, rows_out=None):
+    record = _current()
+    if record is not None:
+        if rows_in is not None:
+            record['rows_in'] = rows_in
+        if rows_out is not None:
+            record['rows_out'] = rows_out
+
+def _row_count(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]  # e.g. (valid, invalid_count, summary)
+    if isinstance(value, (list, dict)):
+        return len(value)
+    count = getattr(value, 'transaction_count', None)  # SalesAggregate
+    return count if isinstance(count, int) else None
+
+def instrumented(name=None):
+    """Decorator: run the function as a stage, counting rows in (first arg) and out (result)"""
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            rows_in = _row_count(args[0]) if args else None
+            with stage(stage_name, rows_in) as record:
+                result = func(*args, **kwargs)
+                if record['rows_out'] is None:
+                    record['rows_out'] = _row_count(result)
+                return result
+        return wrapper
+    return decorate
+
+def summary():
+    """JSON-serialisable run summary"""
+    with _lock:
+        stages = list(_stages)
+    top_level = [s for s in stages if s['parent'] is None]
+    rejects = Counter()
+    for s in stages:
+        rejects.update(s['rejects'])
+    return {
+        'total_wall_s': round(sum(s['wall_s'] for s in top_level), 6),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rejects': dict(rejects),
+        'stages': stages,
+    }
+
+def export_json(filename=None):
+    """Write the run summary as JSON; returns the path"""
+    filename = filename or os.environ.get(FILE_ENV_VAR) or DEFAULT_SUMMARY_FILE
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, 'w') as f:
+        json.dump(summary(), f, indent=2)
+    return filename
+
+@contextmanager
+def run(summary_file=None, profile_file=None):
+    """
+    Wrap a whole run: when metrics are enabled, export the JSON summary at the
+    end; when profile_file (or SALES_PROFILE) is set, dump a cProfile as well.
+    """
+    profile_file = profile_file or os.environ.get(PROFILE_ENV_VAR)
+    profiler = None
+    if profile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            directory = os.path.dirname(profile_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(profile_file)
+            print(f"Profile saved to {profile_file}")
+        if _enabled:
+            print(f"Run metrics saved to {export_json(summary_file)}")
@@ -0,0 +1,93 @@
+# utils/mmap_reader.py
+import mmap
+import os
+from contextlib import contextmanager
+
+__all__ = [
+    'map_file', 'next_line_start', 'line_aligned_ranges', 'iter_mapped_blocks', 'iter_line_blocks',
+    'SCAN_BLOCK_SIZE', 'LOOKAHEAD'
+]
+
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024  # bytes handed out per block
+LOOKAHEAD = 8  # bytes past a block's end the byte scanner may read (8-byte word loads)
+
+@contextmanager
+def map_file(filename):
+    """
+    Read-only memory map of a whole file (b'' for an empty one).
+    Pages are faulted in by the kernel as they are scanned – no read() copies
+    into Python buffers – and sequential read-ahead is requested where supported.
+    """
+    with open(filename, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield b''
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield mm
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # A view is still held (e.g. after an error); unmapped once it is freed
+
+def next_line_start(mm, pos, size):
+    """Offset of the first line starting at or after pos (size if none)"""
+    if pos <= 0:
+        return 0
+    newline = mm.find(b'\n', pos - 1, size)
+    return size if newline < 0 else newline + 1
+
+def line_aligned_ranges(filename, n_chunks, size=None):
+    """
+    Split the first size bytes of a file (default: all) into up to n_chunks
+    (start, end) byte ranges, each boundary moved forward to just after a
+    newline. Only the bytes around each boundary are touched.
+    """
+    size = os.path.getsize(filename) if size is None else size
+    n_chunks = max(1, min(n_chunks, size))
+    boundaries = [0]
+    with map_file(filename) as mm:
+        size = min(size, len(mm))
+        for i in range(1, n_chunks):
+            boundaries.append(next_line_start(mm, max(size * i // n_chunks, boundaries[-1]), size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+def iter_mapped_blocks(mm, start=0, end=None, block_size=SCAN_BLOCK_SIZE, lookahead=0):
+    """
+    Yield (view, size) for consecutive blocks of mm[start:end], each ending on
+    a newline (or at end). view is a zero-copy memoryview of size bytes plus up
+    to lookahead bytes after them (fewer at the end of the map) – the extra
+    bytes belong to the next block and are only there so word-at-a-time
+    scanners can over-read safely.
+    """
+    end = len(mm) if end is None else end
+    view = memoryview(mm)
+    try:
+        pos = start
+        while pos < end:
+            stop = min(pos + block_size, end)
+            if stop < end:
+                newline = mm.rfind(b'\n', pos, stop)
+                if newline < 0:  # A line longer than the block: extend to its end
+                    newline = mm.find(b'\n', stop, end)
+                stop = end if newline < 0 else newline + 1
+            yield view[pos:min(stop + lookahead, len(mm))], stop - pos
+            pos = stop
+    finally:
+        view.release()
+
+def iter_line_blocks(filename, start=0, end=None, block_size=SCAN_BLOCK_SIZE):
+    """
+    Yield raw byte blocks of a file range, each ending on a newline.
+    end must be a line boundary (default: end of file). Blocks are copied out
+    of the map as bytes; use map_file + iter_mapped_blocks for zero-copy views.
+    """
+    with map_file(filename) as mm:
+        for view, size in iter_mapped_blocks(mm, start, end, block_size):
+            yield bytes(view[:size])
+            view.release()
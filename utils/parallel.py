@@ -0,0 +1,298 @@
+# utils/parallel.py
+import errno
+import io
+import os
+from collections import Counter
+
+from utils import metrics
+from utils.aggregator import SalesAggregate
+from utils.columnar import has_numpy
+from utils.file_handler import (
+    detect_encoding, expand_inputs, is_compressed, iter_sales_lines, iter_transactions,
+    is_valid_transaction, passes_filters, build_filter_summary
+)
+from utils.mmap_reader import iter_line_blocks, line_aligned_ranges
+
+__all__ = [
+    'split_file_ranges', 'iter_range_lines', 'scans_columns', 'aggregate_range', 'plan_ranges',
+    'parallel_aggregate', 'aggregate_range_specs', 'parallel_aggregate_specs', 'CHUNK_SIZE', 'READ_BLOCK_SIZE'
+]
+
+CHUNK_SIZE = 64 * 1024 * 1024  # bytes per work unit
+READ_BLOCK_SIZE = 8 * 1024 * 1024  # bytes decoded at a time inside a chunk
+
+def split_file_ranges(filename, n_chunks, size=None):
+    """
+    Split the first size bytes of a file (default: all) into up to n_chunks
+    (start, end) byte ranges. Every boundary is moved forward to just after a
+    newline, so no line is cut (found in a memory map of the file).
+    """
+    return line_aligned_ranges(filename, n_chunks, size)
+
+def iter_range_lines(filename, start, end, encoding, block_size=READ_BLOCK_SIZE):
+    """
+    Yield stripped, non-empty lines from a byte range (header skipped for the first range).
+    end must be a line boundary. The range is read in newline-aligned blocks, so memory stays bounded.
+    end=None reads the whole file instead (compressed files too; encoding detected if None).
+    """
+    if end is None:
+        yield from iter_sales_lines(filename, encoding)
+        return
+    skip_header = start == 0
+    for data in iter_line_blocks(filename, start, end, block_size):
+        # TextIOWrapper gives the same newline handling as open(filename, 'r')
+        with io.TextIOWrapper(io.BytesIO(data), encoding=encoding) as text:
+            if skip_header:
+                next(text, None)
+                skip_header = False
+            for line in text:
+                line = line.strip()
+                if line:
+                    yield line
+
+def scans_columns(filename):
+    """True when a unit can take the memory-mapped columnar path (NumPy installed, plain file)"""
+    return has_numpy() and not is_compressed(filename)
+
+def _columnar_aggregate(store, distinct_error):
+    if distinct_error is None:
+        return store.aggregate()
+    return SalesAggregate(distinct_error=distinct_error).update(store)  # Sketches take rows
+
+def aggregate_range(filename, start, end, encoding, region=None, min_amount=None, max_amount=None,
+                    distinct_error=None):
+    """
+    Parse, validate, filter and aggregate one byte range.
+    Plain files are scanned columnar from a memory map when NumPy is
+    installed; otherwise lines are parsed one by one.
+    Returns (aggregate, parsed_count, invalid_count).
+    """
+    if scans_columns(filename):
+        from utils.fast_parser import scan_range
+        store = scan_range(filename, start, end, encoding)
+        kept = store.select(store.valid_mask() & store.filter_mask(region, min_amount, max_amount))
+        return _columnar_aggregate(kept, distinct_error), len(store), len(store) - len(kept)
+
+    filtering = region or min_amount or max_amount
+    results = SalesAggregate(distinct_error=distinct_error)
+    parsed_count = 0
+    valid = []
+
+    for t in iter_transactions(iter_range_lines(filename, start, end, encoding)):
+        parsed_count += 1
+        if is_valid_transaction(t) and (not filtering or passes_filters(t, region, min_amount, max_amount)):
+            valid.append(t)
+            if len(valid) >= 10000:
+                results.update(valid)
+                valid = []
+    results.update(valid)
+
+    return results, parsed_count, parsed_count - results.transaction_count
+
+def plan_ranges(paths, workers, chunk_size=CHUNK_SIZE, encoding=None, end=None, whole_file=False):
+    """
+    Work units (filename, start, end, encoding) for one or more input files.
+    - a single plain file is split into line-aligned ranges (end limits it to
+      its first end bytes), several per worker so the pool stays busy
+    - with several files, each is a unit of its own and only plain files over
+      chunk_size are split; compressed files can't be split
+    Split files get their encoding detected here so all ranges agree (sniffed
+    from a prefix unless whole_file, see detect_encoding); whole-file units
+    (end None) leave it to the worker. Raises FileNotFoundError / UnicodeError.
+    """
+    files = expand_inputs(paths)
+    if not files:
+        raise FileNotFoundError(errno.ENOENT, "No input files found", str(paths))
+    units = []
+    for filename in files:
+        size = os.path.getsize(filename) if end is None else end
+        if is_compressed(filename) or (len(files) > 1 and size <= chunk_size):
+            units.append((filename, 0, None, encoding))
+            continue
+        file_encoding = encoding or detect_encoding(filename, whole_file=whole_file)
+        if file_encoding is None:
+            raise UnicodeError(f"Could not decode {filename} with common encodings")
+        # Chunks are capped at chunk_size bytes; several per worker keeps the pool
+        # busy when chunks are uneven
+        n_chunks = max(-(-size // chunk_size), workers * 4 if workers > 1 and len(files) == 1 else 1)
+        units += [(filename, start, stop, file_encoding) for start, stop in split_file_ranges(filename, n_chunks, size)]
+    return units
+
+def _aggregate_range_task(args):
+    return aggregate_range(*args)
+
+@metrics.instrumented()
+def parallel_aggregate(filename, workers=None, region=None, min_amount=None, max_amount=None,
+                       chunk_size=CHUNK_SIZE, end=None, encoding=None, distinct_error=None):
+    """
+    Multiprocess equivalent of read → parse → validate → aggregate_transactions.
+    filename may also be a directory, glob or list of files (see plan_ranges).
+    end limits processing to the first end bytes (must be a line boundary).
+    Returns (aggregate, filter_summary), or (None, None) if the file can't be read.
+
+    Counts, unique-customer/product sets and revenue (summed exactly, see
+    SalesAggregate) are exact, so results match the single-process path.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    def run(whole_file):
+        tasks = [
+            (name, start, stop, file_encoding, region, min_amount, max_amount, distinct_error)
+            for name, start, stop, file_encoding in plan_ranges(filename, workers, chunk_size, encoding, end, whole_file)
+        ]
+        if workers == 1 or len(tasks) <= 1:
+            partials = map(_aggregate_range_task, tasks)
+            return _merge_partials(partials, region, min_amount, max_amount, distinct_error)
+
+        from concurrent.futures import ProcessPoolExecutor  # Pulls in multiprocessing: only when needed
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order, so merging preserves first-seen order
+            partials = pool.map(_aggregate_range_task, tasks)
+            return _merge_partials(partials, region, min_amount, max_amount, distinct_error)
+
+    try:
+        return _run_sniffed(run, encoding)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}. Ensure data/sales_data.txt exists.")
+        return None, None
+    except UnicodeError as e:
+        print(e)
+        return None, None
+
+def _run_sniffed(run, encoding):
+    """run(whole_file=False), and again with whole-file encoding checks if a byte past a sniffed prefix didn't decode"""
+    try:
+        return run(False)
+    except UnicodeDecodeError:
+        if encoding is not None:
+            raise
+        return run(True)
+
+def _merge_partials(partials, region, min_amount, max_amount, distinct_error=None):
+    results = SalesAggregate(distinct_error=distinct_error)
+    parsed_count = 0
+    invalid_count = 0
+    for partial, parsed, invalid in partials:
+        results.merge(partial)
+        parsed_count += parsed
+        invalid_count += invalid
+
+    summary = build_filter_summary(parsed_count, invalid_count, results.transaction_count,
+                                   region, min_amount, max_amount)
+    print(f"Valid: {results.transaction_count}, Invalid: {invalid_count}")
+    return results, summary
+
+def aggregate_range_specs(filename, start, end, encoding, specs, count_products=False, distinct_error=None,
+                          keep_valid=False):
+    """
+    One parse of a byte range feeding every filter spec's aggregate.
+    count_products also counts each spec's rows per Product_ID (for enrichment_stats_for).
+    keep_valid also returns the range's valid rows (before the spec filters), as a
+    columnar store or a list of Transactions, so later passes needn't parse again.
+    Returns (aggregates, product counts or None, parsed_count, valid rows or None),
+    lists in spec order.
+    """
+    if scans_columns(filename):
+        from utils.fast_parser import scan_range
+        store = scan_range(filename, start, end, encoding)
+        valid = store.valid_mask()
+        kept = [store.select(valid & store.filter_mask(spec['region'], spec['min_amount'], spec['max_amount']))
+                for spec in specs]
+        aggregates = [_columnar_aggregate(part, distinct_error) for part in kept]
+        product_counts = [Counter(part.product_counts()) for part in kept] if count_products else None
+        return aggregates, product_counts, len(store), store.select(valid) if keep_valid else None
+
+    filters = [(spec['region'], spec['min_amount'], spec['max_amount']) for spec in specs]
+    aggregates = [SalesAggregate(distinct_error=distinct_error) for _ in specs]
+    product_counts = [Counter() for _ in specs] if count_products else None
+    batches = [[] for _ in specs]
+    valid_rows = [] if keep_valid else None
+    parsed_count = 0
+
+    def flush():
+        for i, batch in enumerate(batches):
+            aggregates[i].update(batch)
+            if product_counts is not None:
+                product_counts[i].update(t.Product_ID for t in batch)
+            batch.clear()
+
+    for t in iter_transactions(iter_range_lines(filename, start, end, encoding)):
+        parsed_count += 1
+        if is_valid_transaction(t):
+            if valid_rows is not None:
+                valid_rows.append(t)
+            for batch, (region, min_amount, max_amount) in zip(batches, filters):
+                if passes_filters(t, region, min_amount, max_amount):
+                    batch.append(t)
+        if parsed_count % 10000 == 0:
+            flush()
+    flush()
+
+    return aggregates, product_counts, parsed_count, valid_rows
+
+def _aggregate_range_specs_task(args):
+    return aggregate_range_specs(*args)
+
+@metrics.instrumented()
+def parallel_aggregate_specs(filename, specs, workers=None, count_products=False,
+                             chunk_size=CHUNK_SIZE, encoding=None, distinct_error=None, valid_rows=None):
+    """
+    Evaluate many filter specs (see utils.filter_specs) in one parse of the input:
+    a file, directory, glob or list of them (see plan_ranges).
+    Returns [(aggregate, filter_summary, Product_ID counts or None)] in spec order,
+    or None if an input can't be read. The counts need no catalog, so the
+    catalog can be fetched while this runs (see enrichment_stats_for).
+    valid_rows, if a list, gets every valid row of that parse appended in input
+    order, one row collection per work unit (see aggregate_range_specs).
+    """
+    workers = workers or os.cpu_count() or 1
+
+    def run(whole_file):
+        results = [SalesAggregate(distinct_error=distinct_error) for _ in specs]
+        product_counts = [Counter() for _ in specs] if count_products else None
+        rows = [] if valid_rows is not None else None
+        parsed_count = 0
+
+        def merge(partials):
+            nonlocal parsed_count
+            for aggregates, partial_counts, parsed, unit_rows in partials:
+                for i, aggregate in enumerate(aggregates):
+                    results[i].merge(aggregate)
+                    if product_counts is not None:
+                        product_counts[i].update(partial_counts[i])
+                parsed_count += parsed
+                if rows is not None:
+                    rows.append(unit_rows)
+
+        tasks = [
+            (name, start, stop, file_encoding, specs, count_products, distinct_error, rows is not None)
+            for name, start, stop, file_encoding in plan_ranges(filename, workers, chunk_size, encoding,
+                                                                whole_file=whole_file)
+        ]
+        if workers == 1 or len(tasks) <= 1:
+            merge(map(_aggregate_range_specs_task, tasks))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                merge(pool.map(_aggregate_range_specs_task, tasks))  # In order, like parallel_aggregate
+        if rows is not None:
+            valid_rows.extend(rows)
+        return results, product_counts, parsed_count
+
+    try:
+        results, product_counts, parsed_count = _run_sniffed(run, encoding)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}")
+        return None
+    except UnicodeError as e:
+        print(e)
+        return None
+
+    outcomes = []
+    for i, spec in enumerate(specs):
+        kept = results[i].transaction_count
+        summary = build_filter_summary(parsed_count, parsed_count - kept, kept,
+                                       spec['region'], spec['min_amount'], spec['max_amount'])
+        print(f"[{spec['name']}] Valid: {kept}, Invalid: {parsed_count - kept}")
+        outcomes.append((results[i], summary, product_counts[i] if product_counts is not None else None))
+    return outcomes
@@ -0,0 +1,197 @@
+# utils/pipeline.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+
+__all__ = ['Pipeline', 'MAX_WORKERS']
+
+MAX_WORKERS = 4
+
+class Pipeline:
+    """
+    Dependency-driven stage scheduler.
+    Each stage declares the stages (or external inputs) it needs; it runs on a
+    worker thread as soon as they are all available and gets their results as
+    keyword arguments named after them. Stages with no dependencies start at
+    start(), so slow I/O (catalog fetch, cache load) overlaps everything else.
+
+        with Pipeline() as pipeline:
+            pipeline.add('product_mapping', get_product_mapping)
+            pipeline.expect('valid')  # provided later by the caller
+            pipeline.add('stats', enrich, after=('valid', 'product_mapping'))
+            pipeline.start()
+            ...
+            pipeline.provide('valid', valid)
+            results = pipeline.wait()
+
+    Stages added with main_thread=True are run by wait() on the calling
+    thread, one at a time in the order they were added, so stages that print
+    progress don't interleave their output.
+
+    The first stage error is re-raised by wait(); stages that depend on a
+    failed stage never run. Long-running stages can watch the cancelled event
+    (set by cancel() or the first failure) to stop early.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.stages = {}    # name -> (func, dependency names)
+        self.main_thread = set()  # stages wait() runs on the calling thread
+        self.inputs = set()
+        self.results = {}
+        self._waiting = {}  # name -> dependencies not available yet
+        self._running = 0
+        self._error = None
+        self._cancelled = False
+        self.cancelled = threading.Event()
+        self._pool = None
+        self._changed = threading.Condition()
+
+    def add(self, name, func, after=(), main_thread=False):
+        """Declare a stage; func(**{dependency: result}) runs once its dependencies are done"""
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        self.stages[name] = (func, tuple(after))
+        if main_thread:
+            self.main_thread.add(name)
+        return self
+
+    def expect(self, name):
+        """Declare an external input the caller will provide()"""
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        self.inputs.add(name)
+        return self
+
+    def _check(self):
+        known = set(self.stages) | self.inputs
+        for name, (_, after) in self.stages.items():
+            missing = set(after) - known
+            if missing:
+                raise ValueError(f"Stage {name} depends on unknown stage(s): {', '.join(sorted(missing))}")
+
+        # Repeatedly peel off stages whose dependencies are all resolved; anything left is a cycle
+        resolved = set(self.inputs)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, (_, after) in remaining.items() if resolved.issuperset(after)]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle among: {', '.join(sorted(remaining))}")
+            resolved.update(ready)
+            for name in ready:
+                del remaining[name]
+
+    def start(self):
+        """Check the graph and launch every stage whose dependencies are met"""
+        self._check()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline')
+        with self._changed:
+            self._waiting = {name: set(after) for name, (_, after) in self.stages.items()}
+            for name in list(self.results):
+                self._available(name)
+            self._launch_ready()
+        return self
+
+    def provide(self, name, value):
+        """Hand in an expected input; stages waiting only on it start now"""
+        if name not in self.inputs:
+            raise ValueError(f"{name} was not declared with expect()")
+        with self._changed:
+            self.results[name] = value
+            if self._pool is not None:
+                self._available(name)
+                self._launch_ready()
+            self._changed.notify_all()
+
+    def _available(self, name):
+        for dependencies in self._waiting.values():
+            dependencies.discard(name)
+
+    def _ready(self, main_thread=False):
+        """Stages (on the pool or on the main thread) whose dependencies are all done"""
+        if self._error is not None or self._cancelled:
+            return []
+        return [name for name, dependencies in self._waiting.items()
+                if not dependencies and (name in self.main_thread) == main_thread]
+
+    def _take(self, name):
+        """Mark a ready stage as running; returns (func, kwargs)"""
+        del self._waiting[name]
+        func, after = self.stages[name]
+        self._running += 1
+        return func, {dependency: self.results[dependency] for dependency in after}
+
+    def _launch_ready(self):
+        for name in self._ready():
+            self._pool.submit(self._run_stage, name, *self._take(name))
+
+    def _run_stage(self, name, func, kwargs):
+        try:
+            with metrics.stage(f"pipeline.{name}"):
+                result = func(**kwargs)
+        except BaseException as e:
+            with self._changed:
+                if self._error is None:
+                    self._error = e
+                    self.cancelled.set()
+                self._running -= 1
+                self._changed.notify_all()
+            return
+        with self._changed:
+            self.results[name] = result
+            self._running -= 1
+            self._available(name)
+            self._launch_ready()
+            self._changed.notify_all()
+
+    def _stalled(self):
+        """Nothing running and nothing can start (failure, or inputs never provided)"""
+        return self._running == 0 and (
+            self._error is not None or self._cancelled
+            or all(dependencies for dependencies in self._waiting.values())
+        )
+
+    def wait(self):
+        """
+        Run the main-thread stages as they become ready and block until every
+        stage has run; returns {name: result} or raises the first stage error.
+        """
+        while True:
+            with self._changed:
+                ready = self._ready(main_thread=True)
+                while not ready and not self._stalled():
+                    self._changed.wait()
+                    ready = self._ready(main_thread=True)
+                if not ready:
+                    error, waiting = self._error, sorted(self._waiting)
+                    break
+                name = ready[0]
+                func, kwargs = self._take(name)
+            self._run_stage(name, func, kwargs)
+        self._pool.shutdown(wait=True)
+        if error is not None:
+            raise error
+        if waiting and not self._cancelled:
+            raise RuntimeError(f"Pipeline stages never ran (inputs not provided): {', '.join(waiting)}")
+        return self.results
+
+    def run(self):
+        """start() then wait() – for pipelines without external inputs"""
+        return self.start().wait()
+
+    def cancel(self):
+        """Start no further stages and set cancelled; running ones finish in the background"""
+        with self._changed:
+            self._cancelled = True
+            self.cancelled.set()
+            self._changed.notify_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
@@ -0,0 +1,240 @@
+# utils/rollups.py
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+from operator import attrgetter
+
+from utils.aggregator import SalesAggregate
+from utils.file_handler import as_transaction
+
+__all__ = ['parse_day', 'bucket_label', 'DateRollup', 'as_rollup', 'GROUPINGS', 'GRANULARITIES']
+
+GROUPINGS = {'region': 'Region', 'product': 'Product_Name'}
+GRANULARITIES = ('day', 'week', 'month')
+
+def parse_day(text):
+    """Date string ('YYYY-MM-DD') as a day ordinal, or 0 if it isn't a valid date"""
+    try:
+        return date.fromisoformat(text).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+def bucket_label(day, granularity):
+    """Label of the day/week/month bucket an ordinal falls in: 2024-12-09, 2024-W50, 2024-12"""
+    d = date.fromordinal(day)
+    if granularity == 'day':
+        return d.isoformat()
+    if granularity == 'week':
+        year, week, _ = d.isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == 'month':
+        return f"{d.year}-{d.month:02d}"
+    raise ValueError(f"Unknown granularity: {granularity} (choose from {', '.join(GRANULARITIES)})")
+
+class DateRollup:
+    """
+    Revenue and transaction counts stored as prefix sums. All sales sit on a
+    dense day index (any date-range total is O(1)); each region / product
+    keeps only the days it has sales on (O(log days) per range), so a
+    group's cost never depends on the overall date span. Day/week/month
+    buckets are O(buckets).
+    Rows whose Date doesn't parse are counted in unparsed and left out.
+    """
+
+    def __init__(self):
+        self.first_day = 0  # ordinal of day index 0
+        self.days = 0
+        self.groupings = ()
+        # (grouping, value) -> (day indexes or None if dense, revenue prefix, count prefix);
+        # (None, None) is all sales
+        self.series = {}
+        self.unparsed = 0
+
+    @classmethod
+    def from_transactions(cls, transactions, by=tuple(GROUPINGS)):
+        """One pass over any iterable of transactions; by picks the groupings to keep"""
+        key_of = attrgetter('Date', *[GROUPINGS[grouping] for grouping in by])
+        cells = {}  # date string, or (date string, group values...) -> [revenue, count]
+        for t in map(as_transaction, transactions):
+            key = key_of(t)
+            stats = cells.get(key)
+            if stats is None:
+                cells[key] = [t.amount, 1]
+            else:
+                stats[0] += t.amount
+                stats[1] += 1
+        return cls.from_cells(cells, by)
+
+    @classmethod
+    def from_cells(cls, cells, by=()):
+        """
+        Rollup from pre-summed cells: {date string: [revenue, count]}, or with
+        groupings {(date string, value per grouping...): [revenue, count]}
+        (e.g. from a GROUP BY query)
+        """
+        # Few distinct cells: spread each onto the all-sales and per-group day series
+        totals = {}
+        unparsed = 0
+        for key, (amount, count) in cells.items():
+            text, values = (key[0], key[1:]) if by else (key, ())
+            day = parse_day(text)
+            if not day:
+                unparsed += count
+                continue
+            for series_key in [(None, None)] + list(zip(by, values)):
+                stats = totals.setdefault(series_key, {}).setdefault(day, [0, 0])
+                stats[0] += amount
+                stats[1] += count
+
+        rollup = cls._build(totals)
+        rollup.groupings = tuple(by)
+        rollup.unparsed = unparsed
+        return rollup
+
+    @classmethod
+    def from_daily(cls, daily):
+        """All-sales rollup from SalesAggregate.daily – no rescan, no groupings"""
+        totals = {}
+        unparsed = 0
+        for text, stats in daily.items():
+            day = parse_day(text)
+            if day:
+                totals[day] = [stats['revenue'], stats['transaction_count']]
+            else:
+                unparsed += stats['transaction_count']
+        rollup = cls._build({(None, None): totals})
+        rollup.unparsed = unparsed
+        return rollup
+
+    @classmethod
+    def _build(cls, totals):
+        """
+        totals: series key -> {ordinal: [revenue, count]} → prefix arrays.
+        All sales get one slot per day of the range; groups get one per day with sales.
+        """
+        rollup = cls()
+        all_days = [day for series in totals.values() for day in series]
+        if not all_days:
+            return rollup
+        rollup.first_day = min(all_days)
+        rollup.days = max(all_days) - rollup.first_day + 1
+
+        for key, series in totals.items():
+            if key == (None, None):
+                offsets = None
+                revenue = [0] * rollup.days
+                counts = [0] * rollup.days
+                for day, (amount, count) in series.items():
+                    revenue[day - rollup.first_day] = amount
+                    counts[day - rollup.first_day] = count
+            else:
+                days = sorted(series)
+                offsets = array('q', [day - rollup.first_day for day in days])
+                revenue = [series[day][0] for day in days]
+                counts = [series[day][1] for day in days]
+            rollup.series[key] = (
+                offsets,
+                array('d', accumulate(revenue, initial=0)),
+                array('q', accumulate(counts, initial=0))
+            )
+        return rollup
+
+    def _offset(self, day):
+        """Day index of a date string / date / ordinal (may fall outside the range)"""
+        if isinstance(day, str):
+            ordinal = parse_day(day)
+            if not ordinal:
+                raise ValueError(f"Invalid date: {day!r} (expected YYYY-MM-DD)")
+            return ordinal - self.first_day
+        if isinstance(day, date):
+            return day.toordinal() - self.first_day
+        return day - self.first_day
+
+    def _series(self, region=None, product=None):
+        if region is not None and product is not None:
+            raise ValueError("Rollups group by region or by product, not both")
+        if region is not None:
+            grouping, value = 'region', region
+        elif product is not None:
+            grouping, value = 'product', product
+        else:
+            return self.series.get((None, None))
+        if grouping not in self.groupings:
+            raise ValueError(f"Rollup was built without the {grouping} grouping")
+        return self.series.get((grouping, value))
+
+    def _totals(self, series, lo, hi):
+        if series is None or lo >= hi:
+            return {'revenue': 0, 'transaction_count': 0}
+        offsets, revenue, counts = series
+        if offsets is not None:  # Sparse: day indexes -> positions among the days with sales
+            lo, hi = bisect_left(offsets, lo), bisect_left(offsets, hi)
+        return {'revenue': revenue[hi] - revenue[lo], 'transaction_count': counts[hi] - counts[lo]}
+
+    def query(self, start=None, end=None, region=None, product=None):
+        """
+        {'revenue', 'transaction_count'} from start to end inclusive (None = open),
+        for all sales or one region / product. O(1).
+        """
+        lo = 0 if start is None else min(max(self._offset(start), 0), self.days)
+        hi = self.days if end is None else min(max(self._offset(end) + 1, 0), self.days)
+        return self._totals(self._series(region, product), lo, hi)
+
+    def revenue(self, start=None, end=None, region=None, product=None):
+        return self.query(start, end, region, product)['revenue']
+
+    def transaction_count(self, start=None, end=None, region=None, product=None):
+        return self.query(start, end, region, product)['transaction_count']
+
+    def bucket_bounds(self, granularity='week'):
+        """[(label, lo, hi)] day-index ranges of each bucket, in date order"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity} (choose from {', '.join(GRANULARITIES)})")
+        bounds = []
+        for index in range(self.days):
+            label = bucket_label(self.first_day + index, granularity)
+            if bounds and bounds[-1][0] == label:
+                bounds[-1][2] = index + 1
+            else:
+                bounds.append([label, index, index + 1])
+        return [tuple(bound) for bound in bounds]
+
+    def buckets(self, granularity='week', by=None):
+        """
+        Totals per bucket, oldest first: {label: {'revenue', 'transaction_count'}}.
+        by='region' or 'product' gives {value: {label: {...}}} instead.
+        Buckets cover the whole date range (for a group, from its first to its
+        last day with sales), empty ones included.
+        """
+        bounds = self.bucket_bounds(granularity)
+        if by is None:
+            series = self.series.get((None, None))
+            return {label: self._totals(series, lo, hi) for label, lo, hi in bounds}
+        if by not in self.groupings:
+            raise ValueError(f"Rollup was built without the {by} grouping")
+        starts = [lo for _, lo, _ in bounds]
+        buckets = {}
+        for (grouping, value), series in self.series.items():
+            if grouping == by:
+                offsets = series[0]
+                first = bisect_right(starts, offsets[0]) - 1
+                last = bisect_right(starts, offsets[-1])
+                buckets[value] = {label: self._totals(series, lo, hi) for label, lo, hi in bounds[first:last]}
+        return buckets
+
+def as_rollup(data, by=()):
+    """
+    Return data unchanged if already a DateRollup, otherwise build one.
+    A SalesAggregate can only give the all-sales rollup (by must be empty).
+    """
+    if isinstance(data, DateRollup):
+        missing = set(by) - set(data.groupings)
+        if missing:
+            raise ValueError(f"Rollup was built without: {', '.join(sorted(missing))}")
+        return data
+    if isinstance(data, SalesAggregate):
+        if by:
+            raise ValueError("Grouped rollups need transactions, not a SalesAggregate")
+        return DateRollup.from_daily(data.daily)
+    return DateRollup.from_transactions(data, by)
@@ -0,0 +1,424 @@
+# utils/server.py
+import contextlib
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils.aggregator import aggregate_transactions
+from utils.api_handler import enrichment_stats_for
+from utils.data_processor import (
+    calculate_total_revenue, region_wise_sales, top_selling_products, customer_analysis, daily_sales_trend,
+    sales_by_period, sales_in_range, find_peak_sales_day, low_performing_products
+)
+from utils.file_handler import expand_inputs, gc_paused, input_signature, stream_transactions
+from utils.filter_index import build_transaction_index
+from utils.pipeline import Pipeline
+from utils.report_generator import REPORT_SECTIONS, OPTIONAL_SECTIONS, generate_sales_report
+
+__all__ = [
+    'ResultCache', 'ThreadQuietStdout', 'WarmDataset', 'AnalyticsService', 'AnalyticsRequestHandler', 'UnixHTTPServer',
+    'create_server', 'serve', 'DEFAULT_HOST', 'DEFAULT_PORT', 'CACHE_SIZE', 'QUERIES'
+]
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_SIZE = 256  # results kept by the LRU cache
+
+class ResultCache:
+    """Thread-safe LRU cache of query results with hit/miss counters"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'size': len(self), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+class ThreadQuietStdout:
+    """
+    Stand-in for sys.stdout that drops what threads inside quiet() print and
+    passes every other thread's output on to the stream it wraps, so quieting
+    one request never swallows or captures another thread's output (unlike
+    contextlib.redirect_stdout, which swaps the stream for the whole process).
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @classmethod
+    @contextlib.contextmanager
+    def quiet(cls):
+        """Silence the calling thread's prints (installing the stand-in if needed)"""
+        stdout = sys.stdout
+        if not isinstance(stdout, cls):
+            stdout = sys.stdout = cls(stdout)
+        previous = getattr(stdout._local, 'quiet', False)
+        stdout._local.quiet = True
+        try:
+            yield
+        finally:
+            stdout._local.quiet = previous
+
+    def write(self, text):
+        if getattr(self._local, 'quiet', False):
+            return len(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class WarmDataset:
+    """
+    Sales inputs held in memory: the transaction index (validated once, see
+    TransactionIndex) and the product mapping. load() reads everything;
+    changed() compares the inputs' size and mtime against the last load.
+    catalog is a function returning the product mapping (None: no enrichment).
+    """
+
+    def __init__(self, paths, catalog=None):
+        self.paths = paths
+        self.catalog = catalog
+        self.index = None
+        self.product_mapping = None
+        self.signature = None
+        self.version = 0      # bumped by every load, so cached results never outlive their data
+        self.loaded_at = None
+
+    def _read(self):
+        files = expand_inputs(self.paths)
+        if not files:
+            raise FileNotFoundError(f"No input files found: {self.paths}")
+        signature = input_signature(files)
+        with gc_paused():
+            transactions = list(stream_transactions(files))
+        print(f"Parsed {len(transactions)} transactions from {len(files)} file(s)")
+        return signature, build_transaction_index(transactions)
+
+    def load(self):
+        """(Re)read the inputs – and fetch the catalog alongside – then index them"""
+        with Pipeline() as pipeline:
+            pipeline.add('data', self._read)
+            if self.catalog is not None:
+                pipeline.add('product_mapping', self.catalog)
+            done = pipeline.run()
+        self.signature, self.index = done['data']
+        self.product_mapping = done.get('product_mapping')
+        self.version += 1
+        self.loaded_at = time.time()
+        return self
+
+    def changed(self):
+        """True if an input was added, removed or rewritten since the last load"""
+        try:
+            return input_signature(expand_inputs(self.paths)) != self.signature
+        except OSError:
+            return True
+
+    def info(self):
+        return {
+            'files': [filename for filename, _, _ in self.signature or ()],
+            'transactions': self.index.total_input if self.index else 0,
+            'valid': len(self.index.valid) if self.index else 0,
+            'products_in_catalog': len(self.product_mapping) if self.product_mapping is not None else None,
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+        }
+
+def _text(params, name, default=None):
+    values = params.get(name)
+    return (values[-1].strip() or default) if values else default
+
+def _number(params, name, kind=float, default=None):
+    value = _text(params, name)
+    if value is None:
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+def _choice(params, name, choices, default=None):
+    value = _text(params, name, default)
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(str(c) for c in choices)}, got {value!r}")
+    return value
+
+def _report_sections(params):
+    value = _text(params, 'sections')
+    if value is None:
+        return REPORT_SECTIONS
+    sections = tuple(s.strip() for s in value.split(',') if s.strip())
+    unknown = set(sections) - set(REPORT_SECTIONS + OPTIONAL_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown report sections: {', '.join(sorted(unknown))}")
+    return sections
+
+# name -> (options parsed from the query string, analysis over a filtered slice)
+QUERIES = {
+    'summary': (lambda p: {}, lambda s: s['summary']),
+    'revenue': (lambda p: {}, lambda s: calculate_total_revenue(s['results'])),
+    'regions': (lambda p: {}, lambda s: region_wise_sales(s['results'])),
+    'products': (lambda p: {'n': _number(p, 'n', int, 5)},
+                 lambda s, n: top_selling_products(s['results'], n)),
+    'customers': (lambda p: {'top': _number(p, 'top', int)},
+                  lambda s, top: customer_analysis(s['results'], top)),
+    'daily': (lambda p: {}, lambda s: daily_sales_trend(s['results'])),
+    'periods': (lambda p: {'granularity': _choice(p, 'granularity', ('day', 'week', 'month'), 'week'),
+                           'by': _choice(p, 'by', (None, 'region', 'product'))},
+                lambda s, granularity, by: sales_by_period(s['valid'] if by else s['results'], granularity, by)),
+    'range': (lambda p: {'start': _text(p, 'start'), 'end': _text(p, 'end'), 'product': _text(p, 'product')},
+              lambda s, start, end, product: sales_in_range(s['valid'], start, end, product=product)),
+    'peak': (lambda p: {}, lambda s: find_peak_sales_day(s['results']) if s['results'].daily else None),
+    'low-performers': (lambda p: {'threshold': _number(p, 'threshold', int, 10)},
+                       lambda s, threshold: low_performing_products(s['results'], threshold)),
+}
+
+class _Slice(dict):
+    """A cached slice whose 'valid' rows come from rows() when first looked up"""
+
+    def __init__(self, cached, rows):
+        super().__init__(cached)
+        self._rows = rows
+
+    def __missing__(self, key):
+        if key != 'valid':
+            raise KeyError(key)
+        self['valid'] = self._rows()
+        return self['valid']
+
+class AnalyticsService:
+    """
+    Answers analytics queries from a WarmDataset.
+    Filtered slices (filter summary and aggregate) and query results share one
+    LRU cache keyed by dataset version, query and parameters; a query that
+    finds the inputs changed reloads the dataset first. The rows of a slice are
+    not cached: the few queries that need them get them from the index again.
+    Analysis output normally printed to the console is suppressed unless
+    verbose, for the computing thread only (see ThreadQuietStdout).
+    """
+
+    def __init__(self, dataset, cache_size=CACHE_SIZE, verbose=False):
+        self.dataset = dataset
+        self.cache = ResultCache(cache_size)
+        self.verbose = verbose
+        self.reloads = 0
+        self._lock = threading.RLock()  # one reload or computation at a time
+
+    @contextlib.contextmanager
+    def _computing(self):
+        with self._lock:
+            if self.verbose:
+                yield
+            else:
+                with ThreadQuietStdout.quiet():
+                    yield
+
+    def refresh(self):
+        """Reload the dataset if its inputs changed; returns True if it was reloaded"""
+        if self.dataset.index is not None and not self.dataset.changed():
+            return False
+        with self._computing():
+            if self.dataset.index is not None and not self.dataset.changed():
+                return False  # Another request reloaded it meanwhile
+            self.dataset.load()
+            self.cache.clear()
+            self.reloads += 1
+        return True
+
+    def _cached(self, key, compute):
+        """(value, cached) for key, computing and storing it on a miss"""
+        key = (self.dataset.version,) + key
+        missing = object()
+        value = self.cache.get(key, missing)
+        if value is not missing:
+            return value, True
+        with self._computing():
+            value = compute()
+        self.cache.put(key, value)
+        return value, False
+
+    def _slice(self, filters):
+        """{'summary', 'results', 'valid'} for filters; 'valid' is filtered again on first use"""
+        index = self.dataset.index
+
+        def build():
+            valid, _, summary = index.filter(*filters)
+            return {'summary': summary, 'results': aggregate_transactions(valid)}
+        return _Slice(self._cached(('slice',) + filters, build)[0], lambda: index.filter(*filters)[0])
+
+    @staticmethod
+    def filters(params):
+        """(region, min_amount, max_amount) from query parameters"""
+        return (_text(params, 'region'), _number(params, 'min_amount'), _number(params, 'max_amount'))
+
+    def query(self, name, params):
+        """
+        Run a QUERIES analysis for query-string params (dict of value lists, as
+        from parse_qs). Returns (result, cached). Raises KeyError for unknown
+        queries and ValueError for bad parameters.
+        """
+        parse_options, analysis = QUERIES[name]
+        filters = self.filters(params)
+        options = parse_options(params)
+        self.refresh()
+        key = (name, filters, tuple(sorted(options.items())))
+        return self._cached(key, lambda: analysis(self._slice(filters), **options))
+
+    def report(self, params):
+        """The formatted sales report text for the filters and sections in params; returns (text, cached)"""
+        filters = self.filters(params)
+        sections = _report_sections(params)
+        self.refresh()
+        mapping = self.dataset.product_mapping
+        if mapping is None:
+            sections = tuple(s for s in sections if s != 'enrichment')
+
+        def build():
+            data = self._slice(filters)
+            stats = None
+            if 'enrichment' in sections:
+                stats = enrichment_stats_for(Counter(t.Product_ID for t in data['valid']), mapping)
+            with tempfile.TemporaryDirectory() as tmp:
+                output_file = os.path.join(tmp, 'sales_report.txt')
+                generate_sales_report(None, None, output_file, results=data['results'],
+                                      enrichment_stats=stats, sections=sections)
+                with open(output_file) as f:
+                    return f.read()
+        return self._cached(('report', filters, sections), build)
+
+    def status(self):
+        return {'dataset': self.dataset.info(), 'cache': self.cache.stats(), 'reloads': self.reloads}
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class AnalyticsRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /<query>?region=..&min_amount=..&max_amount=..&<options> -> JSON
+    (see QUERIES), GET /report -> plain text, GET /status -> dataset and cache
+    stats. Responses carry the server-side latency in X-Elapsed-Ms.
+    """
+    server_version = 'SalesAnalytics/1.0'
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        name = url.path.strip('/')
+        params = parse_qs(url.query)
+        service = self.server.service
+        cached = False
+        try:
+            if name == 'status':
+                status, body, content_type = 200, service.status(), 'json'
+            elif name == 'report':
+                body, cached = service.report(params)
+                status, content_type = 200, 'text'
+            else:
+                result, cached = service.query(name, params)
+                status, body, content_type = 200, {'query': name, 'result': result}, 'json'
+        except KeyError:
+            status, body, content_type = 404, {'error': f"Unknown query: {name or '(none)'}",
+                                               'queries': sorted(QUERIES) + ['report', 'status']}, 'json'
+        except ValueError as e:
+            status, body, content_type = 400, {'error': str(e)}, 'json'
+        except Exception as e:
+            status, body, content_type = 500, {'error': f"{type(e).__name__}: {e}"}, 'json'
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if content_type == 'json':
+            body['cached'] = cached
+            body['elapsed_ms'] = round(elapsed_ms, 3)
+            data = json.dumps(body, default=_json_default).encode()
+            content_type = 'application/json'
+        else:
+            data = body.encode()
+            content_type = 'text/plain; charset=utf-8'
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Cache', 'hit' if cached else 'miss')
+        self.send_header('X-Elapsed-Ms', f"{elapsed_ms:.3f}")
+        self.end_headers()
+        self.wfile.write(data)
+        if not self.server.quiet:
+            self.log_message('"%s" %d %.2f ms%s', self.requestline, status, elapsed_ms, ' (cached)' if cached else '')
+
+    def log_request(self, code='-', size='-'):
+        pass  # do_GET logs each request with its latency instead
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ThreadingHTTPServer listening on a Unix domain socket"""
+    daemon_threads = True
+
+    def server_bind(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)
+        super().server_bind()
+        self.server_name, self.server_port = self.server_address, 0
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, quiet=False):
+    """HTTP server for service on host:port (port 0 picks a free one), or on a Unix socket"""
+    if socket_path:
+        server = UnixHTTPServer(socket_path, AnalyticsRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), AnalyticsRequestHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
+
+def serve(paths, catalog=None, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None,
+          cache_size=CACHE_SIZE, verbose=False):
+    """Load paths once, then answer queries until interrupted"""
+    dataset = WarmDataset(paths, catalog).load()
+    server = create_server(AnalyticsService(dataset, cache_size, verbose), host, port, socket_path)
+    where = socket_path or f"http://{server.server_address[0]}:{server.server_address[1]}"
+    print(f"Serving {dataset.index.total_input} transactions on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(socket_path)
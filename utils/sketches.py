@@ -0,0 +1,228 @@
+# utils/sketches.py
+"""
+Mergeable sketches for the approximate aggregate mode.
+
+- HyperLogLog: distinct counts in fixed memory (2**precision bytes once
+  dense; small sketches stay sparse)
+- add_distinct / merge_distinct: exact sets for small groups, switching to
+  a HyperLogLog once a set would take more memory than the sketch
+- SpaceSaving: heavy hitters (top items by weight) in O(capacity) memory
+
+Values are hashed with blake2b, not hash(): Python's string hash changes
+per process, and sketches built in different worker processes or runs
+must agree to be merged.
+"""
+import math
+from functools import lru_cache
+from hashlib import blake2b
+from heapq import heappush, heappop
+
+__all__ = [
+    'precision_for_error', 'exact_limit', 'stable_hash64', 'add_distinct', 'merge_distinct', 'HyperLogLog',
+    'SpaceSaving', 'MIN_PRECISION', 'MAX_PRECISION', 'DEFAULT_DISTINCT_ERROR', 'HASH_CACHE_SIZE'
+]
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+DEFAULT_DISTINCT_ERROR = 0.01  # ~1% relative standard error (16 KB per dense sketch)
+HASH_CACHE_SIZE = 1 << 14       # ids and names repeat across rows; skip re-hashing them
+
+def precision_for_error(error):
+    """Smallest HyperLogLog precision with standard error 1.04/sqrt(2**p) <= error"""
+    p = math.ceil(math.log2((1.04 / error) ** 2))
+    return max(MIN_PRECISION, min(MAX_PRECISION, p))
+
+def exact_limit(precision):
+    """
+    Most values a group keeps in an exact set before switching to a sketch:
+    a set costs up to ~64 bytes per (shared) value, a dense sketch 2**precision bytes
+    """
+    return (1 << precision) // 64
+
+@lru_cache(maxsize=HASH_CACHE_SIZE)
+def stable_hash64(value):
+    """64-bit hash of a string that is the same in every process"""
+    return int.from_bytes(blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'little')
+
+class HyperLogLog:
+    """
+    Distinct-count sketch. len() is the estimate; relative standard error
+    is about 1.04 / sqrt(2**precision). Supports add, merge and |=, so it
+    can stand in for a set of ids wherever only the count is needed.
+    """
+    __slots__ = ('precision', 'registers', 'sparse')
+
+    def __init__(self, precision=None, error=DEFAULT_DISTINCT_ERROR):
+        self.precision = precision or precision_for_error(error)
+        self.registers = None  # bytearray of 2**precision ranks once dense
+        self.sparse = {}       # register index -> rank while few are set
+
+    @classmethod
+    def from_values(cls, values, precision):
+        """Dense sketch of an exact set of values (see add_distinct)"""
+        sketch = cls(precision)
+        sketch._densify()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def add(self, value):
+        self.add_hash(stable_hash64(value))
+
+    def add_hash(self, h):
+        """Add a value by its stable_hash64 (lets callers hash once for several sketches)"""
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        registers = self.registers
+        if registers is not None:
+            if rank > registers[index]:
+                registers[index] = rank
+        elif rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > (1 << self.precision) // 32:
+                self._densify()
+
+    def _densify(self):
+        self.registers = bytearray(1 << self.precision)
+        for index, rank in self.sparse.items():
+            self.registers[index] = rank
+        self.sparse = {}
+
+    def merge(self, other):
+        """Fold another sketch (same precision) into this one"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog precision {other.precision} into {self.precision}")
+        if other.registers is not None and self.registers is None:
+            self._densify()
+        if self.registers is not None:
+            registers = self.registers
+            if other.registers is not None:
+                self.registers = bytearray(map(max, registers, other.registers))
+            else:
+                for index, rank in other.sparse.items():
+                    if rank > registers[index]:
+                        registers[index] = rank
+        else:
+            for index, rank in other.sparse.items():
+                if rank > self.sparse.get(index, 0):
+                    self.sparse[index] = rank
+            if len(self.sparse) > (1 << self.precision) // 32:
+                self._densify()
+        return self
+
+    __ior__ = merge
+
+    def count(self):
+        m = 1 << self.precision
+        if self.registers is not None:
+            zeros = self.registers.count(0)
+            harmonic = sum(self.registers.count(rank) * 2.0 ** -rank for rank in range(66 - self.precision))
+        else:
+            zeros = m - len(self.sparse)
+            harmonic = zeros + sum(2.0 ** -rank for rank in self.sparse.values())
+
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / harmonic
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting for small sets
+        return estimate
+
+    def __len__(self):
+        return round(self.count())
+
+    def __repr__(self):
+        return f"HyperLogLog(~{len(self)}, precision={self.precision})"
+
+def add_distinct(stats, key, value, precision):
+    """
+    Add value to the distinct collector stats[key]: a plain set while it
+    holds at most exact_limit(precision) values, then a HyperLogLog
+    """
+    seen = stats[key]
+    seen.add(value)
+    if seen.__class__ is set and len(seen) > exact_limit(precision):
+        stats[key] = HyperLogLog.from_values(seen, precision)
+
+def merge_distinct(seen, other, precision):
+    """Union of two distinct collectors (see add_distinct); returns the result, other is left as is"""
+    if seen is None:
+        seen = set()
+    if seen.__class__ is set:
+        if other.__class__ is set:
+            seen |= other
+            return HyperLogLog.from_values(seen, precision) if len(seen) > exact_limit(precision) else seen
+        seen = HyperLogLog.from_values(seen, precision)
+    if other.__class__ is set:
+        for value in other:
+            seen.add(value)
+        return seen
+    return seen.merge(other)
+
+class SpaceSaving:
+    """
+    Heavy-hitter summary keeping at most capacity items.
+    For every kept item the true weight lies in [count - error, count];
+    any item with true weight above total / capacity is guaranteed kept.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}  # item -> count (an overestimate by at most errors[item])
+        self.errors = {}
+        self.total = 0
+        self._heap = []   # (count, item), one entry per item; may lag behind counts
+
+    def add(self, item, weight=1):
+        self.total += weight
+        counts = self.counts
+        if item in counts:
+            counts[item] += weight
+        elif len(counts) < self.capacity:
+            counts[item] = weight
+            self.errors[item] = 0
+            heappush(self._heap, (weight, item))
+        else:
+            floor, victim = self._pop_min()
+            del counts[victim]
+            del self.errors[victim]
+            counts[item] = floor + weight
+            self.errors[item] = floor
+            heappush(self._heap, (floor + weight, item))
+
+    def _pop_min(self):
+        heap = self._heap
+        while True:
+            count, item = heappop(heap)
+            current = self.counts[item]
+            if current == count:
+                return count, item
+            heappush(heap, (current, item))  # Stale entry: re-file at its current count
+
+    def _floor(self):
+        """Weight assumed for items this summary does not hold"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """
+        Fold in another summary (mergeable summaries, Agarwal et al.):
+        an item missing from one side is charged that side's minimum count.
+        """
+        mine, theirs = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for item in list(self.counts) + [item for item in other.counts if item not in self.counts]:
+            counts[item] = self.counts.get(item, mine) + other.counts.get(item, theirs)
+            errors[item] = self.errors.get(item, mine) + other.errors.get(item, theirs)
+
+        kept = sorted(counts, key=counts.__getitem__, reverse=True)[:self.capacity]
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self.total += other.total
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        self._heap.sort()
+        return self
+
+    def top(self, n=None):
+        """[(item, count, error)] heaviest first"""
+        ranked = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:n]
+        return [(item, count, self.errors[item]) for item, count in ranked]
@@ -0,0 +1,434 @@
+# utils/sqlite_store.py
+import copy
+import errno
+import os
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from utils import metrics
+from utils.aggregator import SECTIONS, SalesAggregate, to_units
+from utils.api_handler import extract_numeric_id, new_enrichment_stats
+from utils.columnar import has_numpy
+from utils.file_handler import (
+    TRANSACTION_FIELDS, Transaction, build_filter_summary, detect_encoding, expand_inputs,
+    input_signature, is_compressed, is_valid_transaction, stream_transactions
+)
+from utils.mmap_reader import line_aligned_ranges
+from utils.rollups import GROUPINGS, DateRollup
+
+__all__ = [
+    'SalesDatabase', 'query_specs', 'DB_FILE', 'LOAD_BATCH_SIZE', 'LOAD_CHUNK_SIZE', 'LOAD_CACHE_KB',
+    'INDEXES', 'SCHEMA'
+]
+
+DB_FILE = 'data/sales.db'
+LOAD_BATCH_SIZE = 50000    # rows per executemany / committed transaction
+LOAD_CHUNK_SIZE = 64 * 1024 * 1024  # bytes of a plain file scanned columnar at a time
+LOAD_CACHE_KB = 64 * 1024  # page cache while loading
+# Each index leads with the column it is for and also covers the columns its
+# GROUP BY queries read, so they scan the index alone instead of the table
+INDEXES = {
+    'idx_transactions_date': 'Date, Customer_ID, amount',
+    'idx_transactions_region': 'Region, amount',
+    'idx_transactions_product': 'Product_ID, catalog_id',
+    'idx_transactions_customer': 'Customer_ID, Product_Name, amount',
+    'idx_transactions_product_name': 'Product_Name, Quantity, amount',
+}
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    Transaction_ID TEXT, Date TEXT, Product_ID TEXT, Product_Name TEXT,
+    Quantity INTEGER, Unit_Price REAL, Customer_ID TEXT, Region TEXT,
+    amount REAL,      -- Quantity * Unit_Price, computed once at load
+    catalog_id TEXT   -- numeric part of Product_ID, the catalog join key
+);
+CREATE TABLE IF NOT EXISTS catalog (
+    catalog_id TEXT PRIMARY KEY, title TEXT, category TEXT, brand TEXT, price REAL, rating REAL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    filename TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, parsed INTEGER, loaded INTEGER
+);
+"""
+_ROW_SQL = f"INSERT INTO transactions VALUES ({', '.join('?' * (len(TRANSACTION_FIELDS) + 2))})"
+
+def _catalog_id(product_id, catalog_ids):
+    """Numeric part of a Product_ID ('' if none), extracted once per product"""
+    catalog_id = catalog_ids.get(product_id)
+    if catalog_id is None:
+        catalog_id = catalog_ids[product_id] = extract_numeric_id(product_id) or ''
+    return catalog_id
+
+def _row(t, catalog_ids):
+    return (t.Transaction_ID, t.Date, t.Product_ID, t.Product_Name, t.Quantity,
+            t.Unit_Price, t.Customer_ID, t.Region, t.amount, _catalog_id(t.Product_ID, catalog_ids))
+
+def _file_rows(filename, counts, catalog_ids):
+    """
+    Row tuples for the valid transactions of one file; counts gets [parsed, valid].
+    Plain files are scanned columnar in line-aligned ranges when NumPy is
+    installed (no per-row records); otherwise rows are streamed one by one.
+    """
+    if not has_numpy() or is_compressed(filename):
+        for t in stream_transactions(filename):
+            counts[0] += 1
+            if is_valid_transaction(t):
+                counts[1] += 1
+                yield _row(t, catalog_ids)
+        return
+
+    encoding = detect_encoding(filename, whole_file=True)  # Can't start over halfway
+    if encoding is None:
+        raise UnicodeError(f"Could not decode {filename} with common encodings")
+    from utils.fast_parser import scan_range
+    n_chunks = -(-os.path.getsize(filename) // LOAD_CHUNK_SIZE)
+    for start, end in line_aligned_ranges(filename, n_chunks):
+        store = scan_range(filename, start, end, encoding)
+        valid = store.select(store.valid_mask())
+        counts[0] += len(store)
+        counts[1] += len(valid)
+        product_ids = [_catalog_id(product_id, catalog_ids) for product_id in valid.values['Product_ID']]
+        yield from zip(*valid.columns(), valid.amount.tolist(),
+                       [product_ids[code] for code in valid.codes['Product_ID'].tolist()])
+
+class SalesDatabase:
+    """
+    Validated transactions in a local SQLite file, queried in SQL.
+    Lets the analyses run on datasets larger than memory, and a loaded
+    dataset is reused by later runs while its input files are unchanged.
+
+        with SalesDatabase('data/sales.db') as db:
+            db.load_files('data/sales_data.txt')
+            top_selling_products(db, n=5)          # data_processor accepts a database
+            north = db.where(region='North')       # filtered view, same queries
+
+    Groups come back in first-seen (load) order, like SalesAggregate. Sums are
+    added by SQLite in floating point, so fractional amounts may differ from
+    the exact Python pass in the last bit.
+    """
+
+    def __init__(self, path=DB_FILE):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')  # Readers don't block a running load
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._filter = ('', ())  # WHERE clause and parameters of a where() view
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Loading
+
+    @contextmanager
+    def _loading(self):
+        """
+        Pragmas tuned for bulk inserts. Into an empty table the indexes are
+        dropped and rebuilt afterwards in one sort each, which is much faster
+        than maintaining them row by row.
+        """
+        conn = self.conn
+        rebuild = not conn.execute('SELECT 1 FROM transactions LIMIT 1').fetchone()
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(f'PRAGMA cache_size=-{LOAD_CACHE_KB}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        if rebuild:
+            for name in INDEXES:
+                conn.execute(f'DROP INDEX IF EXISTS {name}')
+        try:
+            yield
+        finally:
+            with conn:
+                self.create_indexes()
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA optimize')
+
+    def create_indexes(self):
+        for name, columns in INDEXES.items():
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON transactions ({columns})')
+
+    def _insert(self, rows, batch_size=LOAD_BATCH_SIZE):
+        """executemany row tuples in batches, one committed SQLite transaction each; returns the count"""
+        loaded = 0
+        with self._loading():
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    return loaded
+                with self.conn:
+                    self.conn.executemany(_ROW_SQL, batch)
+                loaded += len(batch)
+
+    def load(self, transactions, batch_size=LOAD_BATCH_SIZE):
+        """Append already-validated transactions in batches; returns the rows loaded"""
+        catalog_ids = {}
+        return self._insert((_row(t, catalog_ids) for t in transactions), batch_size)
+
+    def clear(self):
+        """Drop every loaded row (the catalog table is kept)"""
+        with self.conn:
+            self.conn.execute('DROP TABLE IF EXISTS transactions')
+            self.conn.execute('DELETE FROM sources')
+        self.conn.executescript(SCHEMA)
+
+    def _sources(self):
+        return self.conn.execute('SELECT filename, size, mtime_ns FROM sources ORDER BY rowid').fetchall()
+
+    def load_files(self, paths, reload=False):
+        """
+        Load the valid rows of sales files (file, directory, glob or list; see
+        expand_inputs). When the database already holds exactly these files,
+        unchanged in size and mtime, the stored rows are reused. reload forces
+        a fresh load. Returns True if the files were loaded.
+        """
+        files = expand_inputs(paths)
+        if not files:
+            raise FileNotFoundError(errno.ENOENT, "No input files found", str(paths))
+        signature = input_signature(files)
+        if not reload and self._sources() == signature:
+            print(f"Reusing {len(self)} transactions in {self.path}")
+            return False
+
+        self.clear()
+        counts = []
+        catalog_ids = {}
+
+        def valid_rows():
+            for filename in files:
+                parsed = [0, 0]  # rows parsed, rows valid
+                yield from _file_rows(filename, parsed, catalog_ids)
+                counts.append(tuple(parsed))
+
+        with metrics.stage('sqlite.load'):
+            loaded = self._insert(valid_rows())
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO sources VALUES (?, ?, ?, ?, ?)',
+                    [sig + count for sig, count in zip(signature, counts)]
+                )
+            if metrics.is_enabled():
+                metrics.record_bytes(read=sum(size for _, size, _ in signature))
+                metrics.record_rows(rows_out=loaded)
+        print(f"Loaded {loaded} valid transactions into {self.path}")
+        return True
+
+    def parsed_count(self):
+        """Rows parsed from the source files, valid or not (for filter summaries)"""
+        return self.conn.execute('SELECT COALESCE(SUM(parsed), 0) FROM sources').fetchone()[0]
+
+    # Queries
+
+    def where(self, region=None, min_amount=None, max_amount=None):
+        """View of the rows that pass the filters (as passes_filters), sharing this connection"""
+        clauses, params = [], []
+        if region:
+            clauses.append('Region = ?')
+            params.append(region)
+        if min_amount:
+            clauses.append('amount >= ?')
+            params.append(min_amount)
+        if max_amount:
+            clauses.append('amount <= ?')
+            params.append(max_amount)
+        view = copy.copy(self)
+        view._filter = (' WHERE ' + ' AND '.join(clauses) if clauses else '', tuple(params))
+        return view
+
+    def _query(self, select, tail='', params=()):
+        """Run 'select FROM transactions [WHERE filters] tail' for this view"""
+        where, filter_params = self._filter
+        return self.conn.execute(f"{select} FROM transactions{where} {tail}", filter_params + tuple(params))
+
+    def __len__(self):
+        return self._query('SELECT COUNT(*)').fetchone()[0]
+
+    def __iter__(self):
+        """Yield rows back as Transaction records, in load order"""
+        for row in self._query(f"SELECT {', '.join(TRANSACTION_FIELDS)}", 'ORDER BY rowid'):
+            yield Transaction(*row)
+
+    def total_revenue(self):
+        return self._query('SELECT COALESCE(SUM(amount), 0)').fetchone()[0]
+
+    def _distinct_pairs(self, key, value, keys=None):
+        """{key: set of values}, optionally only for the given keys"""
+        tail, params = '', ()
+        if keys is not None:
+            where, _ = self._filter
+            tail = f"{'AND' if where else 'WHERE'} {key} IN ({', '.join('?' * len(keys))})"
+            params = tuple(keys)
+        pairs = {}
+        for k, v in self._query(f'SELECT DISTINCT {key}, {value}', tail, params):
+            pairs.setdefault(k, set()).add(v)
+        return pairs
+
+    def aggregate(self, sections=SECTIONS):
+        """
+        SalesAggregate of this view built from GROUP BY queries (exact mode),
+        so everything written against SalesAggregate works on the database.
+        Only the requested sections are queried.
+        """
+        results = SalesAggregate(sections)
+        count, revenue = self._query('SELECT COUNT(*), SUM(amount)').fetchone()
+        if count:
+            results.add_total_units(to_units(revenue))
+            results.transaction_count = count
+
+        if 'regions' in sections:
+            rows = self._query('SELECT Region, SUM(amount), COUNT(*)', 'GROUP BY Region ORDER BY MIN(rowid)').fetchall()
+            for region, _, count in rows:
+                results.regions[region] = {'total_sales': 0, 'transaction_count': count}
+            results.add_units('regions', {region: to_units(revenue) for region, revenue, _ in rows})
+        if 'products' in sections:
+            rows = self._query('SELECT Product_Name, SUM(Quantity), SUM(amount)',
+                               'GROUP BY Product_Name ORDER BY MIN(rowid)').fetchall()
+            for product, qty, _ in rows:
+                results.products[product] = {'total_qty': qty, 'total_revenue': 0}
+            results.add_units('products', {product: to_units(revenue) for product, _, revenue in rows})
+        if 'customers' in sections:
+            products = self._distinct_pairs('Customer_ID', 'Product_Name')
+            rows = self._query('SELECT Customer_ID, SUM(amount), COUNT(*)',
+                               'GROUP BY Customer_ID ORDER BY MIN(rowid)').fetchall()
+            for customer, _, count in rows:
+                results.customers[customer] = {'total_spent': 0, 'purchase_count': count,
+                                               'products': products[customer]}
+            results.add_units('customers', {customer: to_units(revenue) for customer, revenue, _ in rows})
+        if 'daily' in sections:
+            customers = self._distinct_pairs('Date', 'Customer_ID')
+            rows = self._query('SELECT Date, SUM(amount), COUNT(*)', 'GROUP BY Date ORDER BY MIN(rowid)').fetchall()
+            for date, _, count in rows:
+                results.daily[date] = {'revenue': 0, 'transaction_count': count,
+                                       'unique_customers': customers[date]}
+            results.add_units('daily', {date: to_units(revenue) for date, revenue, _ in rows})
+        return results
+
+    def top_products(self, n=5):
+        """[(product, total_qty, total_revenue)] for the n products with the most quantity sold"""
+        return self._query('SELECT Product_Name, SUM(Quantity), SUM(amount)',
+                           'GROUP BY Product_Name ORDER BY SUM(Quantity) DESC, MIN(rowid) LIMIT ?', (n,)).fetchall()
+
+    def top_customers(self, n=None):
+        """
+        [(customer, {'total_spent', 'purchase_count', 'products'})] by spend,
+        biggest first; only n customers (default: all) have their products fetched.
+        """
+        limit = 'LIMIT ?' if n is not None else ''
+        ranked = self._query('SELECT Customer_ID, SUM(amount), COUNT(*)',
+                             f'GROUP BY Customer_ID ORDER BY SUM(amount) DESC, MIN(rowid) {limit}',
+                             (n,) if n is not None else ()).fetchall()
+        products = self._distinct_pairs('Customer_ID', 'Product_Name', [c for c, _, _ in ranked] if n is not None else None)
+        return [
+            (customer, {'total_spent': spent, 'purchase_count': count, 'products': products[customer]})
+            for customer, spent, count in ranked
+        ]
+
+    def daily_trend(self):
+        """{date: {'revenue', 'transaction_count', 'unique_customers'}} in date order"""
+        return {
+            date: {'revenue': revenue, 'transaction_count': count, 'unique_customers': customers}
+            for date, revenue, count, customers in self._query(
+                'SELECT Date, SUM(amount), COUNT(*), COUNT(DISTINCT Customer_ID)', 'GROUP BY Date ORDER BY Date')
+        }
+
+    def peak_day(self):
+        """(date, stats) of the highest-revenue day (earliest on ties), or None without rows"""
+        row = self._query('SELECT Date, SUM(amount), COUNT(*), COUNT(DISTINCT Customer_ID)',
+                          'GROUP BY Date ORDER BY SUM(amount) DESC, Date LIMIT 1').fetchone()
+        if row is None:
+            return None
+        date, revenue, count, customers = row
+        return date, {'revenue': revenue, 'transaction_count': count, 'unique_customers': customers}
+
+    def low_performers(self, threshold=10):
+        """[(product, total_qty, total_revenue)] with total_qty < threshold, lowest first"""
+        return self._query('SELECT Product_Name, SUM(Quantity), SUM(amount)',
+                           'GROUP BY Product_Name HAVING SUM(Quantity) < ? ORDER BY SUM(Quantity), MIN(rowid)',
+                           (threshold,)).fetchall()
+
+    def rollup(self, by=()):
+        """DateRollup (see utils.rollups) from per-day, per-grouping sums"""
+        keys = ', '.join(['Date'] + [GROUPINGS[grouping] for grouping in by])
+        rows = self._query(f'SELECT {keys}, SUM(amount), COUNT(*)', f'GROUP BY {keys} ORDER BY MIN(rowid)')
+        cells = {tuple(row[:-2]) if by else row[0]: list(row[-2:]) for row in rows}
+        return DateRollup.from_cells(cells, by)
+
+    def product_counts(self):
+        """Rows per Product_ID in first-seen order (for enrichment_stats_for)"""
+        return Counter(dict(self._query('SELECT Product_ID, COUNT(*)', 'GROUP BY Product_ID ORDER BY MIN(rowid)')))
+
+    # Catalog
+
+    def load_catalog(self, product_mapping):
+        """Replace the catalog table with a product mapping (see create_product_mapping)"""
+        with self.conn:
+            self.conn.execute('DELETE FROM catalog')
+            self.conn.executemany('INSERT INTO catalog VALUES (?, ?, ?, ?, ?, ?)', [
+                (catalog_id, p['title'], p['category'], p['brand'], p['price'], p['rating'])
+                for catalog_id, p in product_mapping.items()
+            ])
+
+    def enrichment_stats(self):
+        """The stats iter_enriched would produce, from a join against the catalog table"""
+        stats = new_enrichment_stats()
+        where, params = self._filter
+        for product_id, count, matched in self.conn.execute(
+                'SELECT Product_ID, COUNT(*), catalog.catalog_id IS NOT NULL '
+                f'FROM transactions LEFT JOIN catalog USING (catalog_id){where} '
+                'GROUP BY Product_ID ORDER BY MIN(transactions.rowid)', params):
+            stats['total'] += count
+            if matched:
+                stats['matched'] += count
+            else:
+                stats['unmatched_ids'][product_id] += count
+        return stats
+
+    def iter_enriched(self):
+        """Yield enriched rows (as iter_enriched in 'copy' mode) from the catalog join, in load order"""
+        where, params = self._filter
+        columns = ', '.join(f'transactions.{field}' for field in TRANSACTION_FIELDS)
+        rows = self.conn.execute(
+            f'SELECT {columns}, category, brand, rating, catalog.catalog_id IS NOT NULL '
+            f'FROM transactions LEFT JOIN catalog USING (catalog_id){where} ORDER BY transactions.rowid', params)
+        for *fields, category, brand, rating, matched in rows:
+            row = dict(zip(TRANSACTION_FIELDS, fields))
+            row.update({'API_Category': category, 'API_Brand': brand, 'API_Rating': rating, 'API_Match': bool(matched)})
+            yield row
+
+@metrics.instrumented()
+def query_specs(database, paths, specs, count_products=False, reload=False):
+    """
+    parallel_aggregate_specs answered from a SQLite database: the inputs are
+    loaded into database (skipped while they are unchanged, see load_files)
+    and each filter spec becomes a where() view aggregated in SQL.
+    Returns [(aggregate, filter_summary, Product_ID counts or None)] in spec
+    order, or None if an input can't be read.
+    """
+    with SalesDatabase(database) as db:
+        try:
+            db.load_files(paths, reload)
+        except FileNotFoundError as e:
+            print(f"File not found: {e.filename}")
+            return None
+        except UnicodeError as e:
+            print(e)
+            return None
+
+        parsed_count = db.parsed_count()
+        outcomes = []
+        for spec in specs:
+            view = db.where(spec['region'], spec['min_amount'], spec['max_amount'])
+            results = view.aggregate()
+            kept = results.transaction_count
+            summary = build_filter_summary(parsed_count, parsed_count - kept, kept,
+                                           spec['region'], spec['min_amount'], spec['max_amount'])
+            print(f"[{spec['name']}] Valid: {kept}, Invalid: {parsed_count - kept}")
+            outcomes.append((results, summary, view.product_counts() if count_products else None))
+        return outcomes
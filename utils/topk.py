@@ -0,0 +1,54 @@
+# utils/topk.py
+import heapq
+from itertools import count
+
+from utils.file_handler import as_transaction
+
+__all__ = ['top_n', 'TopK', 'top_transactions']
+
+def top_n(items, n, key=None):
+    """
+    The n largest items, largest first – same result (ties included) as
+    sorted(items, key=key, reverse=True)[:n], but O(len * log n) with a bounded heap.
+    """
+    return heapq.nlargest(n, items, key=key)
+
+class TopK:
+    """
+    Streaming top-k: keeps only the k largest items seen so far.
+    Push items one at a time or in batches; memory stays O(k).
+    result() matches sorted(all_items, key=key, reverse=True)[:k]:
+    on equal keys the earlier item wins.
+    """
+
+    def __init__(self, k, key=None):
+        self.k = k
+        self.key = key
+        self._heap = []  # min-heap of (key, -arrival, item)
+        self._arrival = count()
+
+    def push(self, item):
+        if self.k <= 0:
+            return
+        value = item if self.key is None else self.key(item)
+        entry = (value, -next(self._arrival), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif value > self._heap[0][0]:  # Equal keys keep the earlier item
+            heapq.heapreplace(self._heap, entry)
+
+    def update(self, items):
+        for item in items:
+            self.push(item)
+        return self
+
+    def __len__(self):
+        return len(self._heap)
+
+    def result(self):
+        """Current top items, largest first"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+def top_transactions(transactions, n=5):
+    """Largest n transactions by amount from any iterable (streamed, O(n) memory)"""
+    return TopK(n, key=lambda t: t.amount).update(map(as_transaction, transactions)).result()